@@ -7,29 +7,150 @@ set -euo pipefail
 #     • YAML → .tex generation
 #     • Structure validation
 #     • Auto-input generation
-#     • Full XeLaTeX + biber pipeline
+#     • Appendix tables rendered from data/ (YAML/CSV)
+#     • XeLaTeX + biber pipeline with fixed-point reruns
 #     • Bibliography mirroring (fixes biber path issues)
+#     • Incremental mode driven by build/core_manifest.json
+#
+#  Usage:
+#     ./build_core.sh                 full build (default, used by CI)
+#     ./build_core.sh --incremental   skip unchanged stages, keep .aux
+#     ./build_core.sh --parallel      compile chunks concurrently + merge
+#     ./build_core.sh --format        reuse a dumped preamble format
+#     ./build_core.sh --figure-cache  include cached PDFs of figures/*.tex
+#     ./build_core.sh --trim-bib      give biber only the cited .bib entries
+#     ./build_core.sh --profile       time/CPU/RSS per stage and pass → build/
+#     ./build_core.sh --search-index  also refresh the full-text search index
 # ---------------------------------------------------------------
 
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$ROOT_DIR"
 
-echo "===[1/4] Generate missing .tex from YAML ====================="
-python tools/generate_core_from_yaml.py master_core_structure.yaml
+INCREMENTAL=0
+PARALLEL=0
+USE_FORMAT=0
+FIGURE_CACHE=0
+TRIM_BIB=0
+PROFILE=0
+SEARCH_INDEX=0
+MAX_PASSES=6
+
+for arg in "$@"; do
+    case "$arg" in
+        --incremental) INCREMENTAL=1 ;;
+        --parallel) PARALLEL=1 ;;
+        --format) USE_FORMAT=1 ;;
+        --figure-cache) FIGURE_CACHE=1 ;;
+        --trim-bib) TRIM_BIB=1 ;;
+        --profile) PROFILE=1 ;;
+        --search-index) SEARCH_INDEX=1 ;;
+        -h|--help)
+            sed -n '4,24p' "$0"
+            exit 0
+            ;;
+        *)
+            echo "[ERROR] Unknown option: $arg" >&2
+            exit 2
+            ;;
+    esac
+done
+
+if [ "$PARALLEL" -eq 1 ] && [ "$USE_FORMAT" -eq 1 ]; then
+    # Chunk roots carry their own preamble; there is no format to load.
+    echo "[ERROR] --format cannot be combined with --parallel." >&2
+    exit 2
+fi
+
+# ---------------------------------------------------------------
+# Incremental mode: ask the manifest which stages are affected
+# ---------------------------------------------------------------
+CHANGED="structure data tex bib"
+if [ "$INCREMENTAL" -eq 1 ]; then
+    if [ -f build/main.pdf ] && [ -f build/core_manifest.json ]; then
+        CHANGED="$(python tools/build_manifest.py status --stages)"
+        if [ -z "$CHANGED" ]; then
+            echo "[incremental] No inputs changed — build/main.pdf is up to date."
+            exit 0
+        fi
+        echo "[incremental] Affected stages: $CHANGED"
+    else
+        echo "[incremental] No previous build found — running all stages."
+    fi
+fi
+
+stage_changed() {
+    case " $CHANGED " in
+        *" $1 "*) return 0 ;;
+    esac
+    return 1
+}
+
+# ---------------------------------------------------------------
+# Profiling: run a stage through tools/build_profile.py, which records
+# wall/CPU time and peak RSS (build/profile_trace.json + summary)
+# ---------------------------------------------------------------
+if [ "$PROFILE" -eq 1 ]; then
+    export CORE_PROFILE=1
+    python tools/build_profile.py start
+fi
+
+stage() {
+    local name="$1"
+    shift
+    if [ "$PROFILE" -eq 1 ]; then
+        python tools/build_profile.py run "$name" -- "$@"
+    else
+        "$@"
+    fi
+}
+
+if stage_changed structure || [ ! -f content/_auto_core_inputs.tex ]; then
+    echo "===[1/4] Generate missing .tex from YAML ====================="
+    stage generate python tools/generate_core_from_yaml.py master_core_structure.yaml --quiet
+
+    echo "===[2/4] Validate structure =================================="
+    if ! stage validate python tools/validate_core_structure.py; then
+        echo "[WARN] Validator reported issues (missing files)."
+        echo "       Продолжаю сборку, но лучше проверить лог."
+    fi
+else
+    echo "===[1-2/4] YAML unchanged — skipping generation/validation ==="
+fi
+
+if stage_changed data; then
+    echo "===[2.2/4] Render appendix tables from data/ ==============="
+    stage tables python tools/generate_tables.py
+fi
 
-echo "===[2/4] Validate structure =================================="
-if ! python tools/validate_core_structure.py; then
-    echo "[WARN] Validator reported issues (missing files)."
-    echo "       Продолжаю сборку, но лучше проверить лог."
+if stage_changed tex || stage_changed structure; then
+    echo "===[2.5/4] Normalize headings / fix math in headings ========="
+    stage demote python tools/demote_module_headings.py
+    stage fix_math python tools/fix_math_in_headings.py
 fi
 
-echo "===[2.5/4] Fix math in headings/captions ====================="
-python tools/fix_math_in_headings.py
+if stage_changed structure || [ ! -f content/_auto_core_inputs.tex ]; then
+    echo "===[3/4] Generate auto include file =========================="
+    stage auto_inputs python tools/generate_auto_inputs.py \
+        --yaml master_core_structure.yaml \
+        --output content/_auto_core_inputs.tex
+fi
 
-echo "===[3/4] Generate auto include file =========================="
-python tools/generate_auto_inputs.py \
-    --yaml master_core_structure.yaml \
-    --output content/_auto_core_inputs.tex
+if stage_changed tex || stage_changed structure; then
+    echo "===[3.5/4] Check cross-references / include graph ============"
+    if ! stage check_refs python tools/check_refs.py; then
+        echo "[WARN] Unresolved \\ref targets (see above)."
+    fi
+    if ! stage include_graph python tools/check_include_graph.py; then
+        echo "[WARN] Include graph issues (see above, build/include_graph.json)."
+    fi
+    if ! stage fig_index python tools/generate_fig_index.py; then
+        echo "[WARN] Missing or duplicate figures (see above, fig_index.md)."
+    fi
+    # Full-text search index: opt-in, a query builds it on first use
+    if [ "$SEARCH_INDEX" -eq 1 ]; then
+        stage search python tools/search_core.py index
+    fi
+fi
 
 echo "===[4/4] Build PDF (manual XeLaTeX + biber) =================="
 
@@ -42,64 +163,65 @@ mkdir -p build/bib
 
 # Mirror bibliography files so that biber sees them correctly
 if ls bib/*.bib >/dev/null 2>&1; then
-    cp bib/*.bib build/bib/
-    echo "[bib] Copied bibliography files into build/bib/"
+    if [ "$TRIM_BIB" -eq 1 ]; then
+        # Only the cited entries (\nocite{*} then covers just those)
+        if ! stage bib python tools/bib_usage.py --trim build/bib; then
+            echo "[WARN] Cited keys missing from bib/*.bib (see above)."
+        fi
+    else
+        stage bib cp bib/*.bib build/bib/
+        echo "[bib] Copied bibliography files into build/bib/"
+    fi
 else
     echo "[bib] WARNING: No .bib files found in bib/ directory"
 fi
 
-# Clean old auxiliary files
-rm -f build/main.{aux,bcf,blg,bbl,log,run.xml} || true
-
-
-# ---------------------------------------------------------------
-# XeLaTeX pass 1 — generate .bcf
-# ---------------------------------------------------------------
-echo "---- [4a] First XeLaTeX run ----------------------------------"
-xelatex \
-    -interaction=nonstopmode \
-    -halt-on-error \
-    -file-line-error \
-    -output-directory=build \
-    main.tex
-
-
 # ---------------------------------------------------------------
-# Biber pass — build bibliography
+# XeLaTeX + biber until refs/TOC reach a fixed point
+# (tools/run_latex.py reports passes and time per pass)
 # ---------------------------------------------------------------
-if [ -f build/main.bcf ]; then
-    echo "---- [4b] Run biber ------------------------------------------"
-    (
-        cd build
-        biber main
-    )
+if [ "$PARALLEL" -eq 1 ]; then
+    # Independent chunks on all cores, merged into build/main.pdf
+    PARALLEL_ARGS=(--max-passes "$MAX_PASSES")
+    if [ "$FIGURE_CACHE" -eq 1 ]; then
+        echo "---- [4-] Update figure cache (changed figures only) --------"
+        stage figure_cache python tools/figure_cache.py
+        PARALLEL_ARGS+=(--figure-cache)
+    fi
+    if [ "$INCREMENTAL" -eq 0 ]; then
+        # Full build: every chunk from clean auxiliary files
+        PARALLEL_ARGS+=(--fresh)
+    fi
+    stage latex python tools/build_parallel.py "${PARALLEL_ARGS[@]}"
 else
-    echo "[WARN] build/main.bcf not found – skipping biber!"
+    LATEX_ARGS=(--root main.tex --outdir build --max-passes "$MAX_PASSES")
+    if [ "$USE_FORMAT" -eq 1 ]; then
+        # Precompiled preamble (rebuilt only if preamble/engine changed)
+        if stage preamble_format python tools/preamble_format.py; then
+            LATEX_ARGS=(--root build/fmt/main.tex --jobname main --format
+                        --outdir build --max-passes "$MAX_PASSES")
+        else
+            echo "[WARN] Format dump failed — falling back to plain preamble."
+        fi
+    fi
+    if [ "$FIGURE_CACHE" -eq 1 ]; then
+        echo "---- [4-] Update figure cache (changed figures only) --------"
+        stage figure_cache python tools/figure_cache.py
+        LATEX_ARGS+=(--figure-cache)
+    fi
+    if [ "$INCREMENTAL" -eq 0 ]; then
+        # Full build: start from clean auxiliary files
+        LATEX_ARGS+=(--fresh)
+    fi
+    stage latex python tools/run_latex.py "${LATEX_ARGS[@]}"
 fi
 
+# Record the inputs of this successful build for the next --incremental run
+stage manifest python tools/build_manifest.py update
 
-# ---------------------------------------------------------------
-# XeLaTeX pass 2 — resolve citations, references
-# ---------------------------------------------------------------
-echo "---- [4c] Second XeLaTeX run ---------------------------------"
-xelatex \
-    -interaction=nonstopmode \
-    -halt-on-error \
-    -file-line-error \
-    -output-directory=build \
-    main.tex
-
-
-# ---------------------------------------------------------------
-# XeLaTeX pass 3 — stabilize TOC, crossrefs, links
-# ---------------------------------------------------------------
-echo "---- [4d] Third XeLaTeX run (stabilize TOC/refs) -------------"
-xelatex \
-    -interaction=nonstopmode \
-    -halt-on-error \
-    -file-line-error \
-    -output-directory=build \
-    main.tex
+if [ "$PROFILE" -eq 1 ]; then
+    python tools/build_profile.py report
+fi
 
 echo "==============================================================="
 echo " Build finished successfully!"
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Benchmark harness for the pre-LaTeX tools on synthetic corpora.
+
+The real tree (~150 files, 1.4 MB) is too small to show how the tools
+scale. This script generates a synthetic repository with the same
+master_core_structure.yaml schema (range/template module families, see
+tools/core_structure.py) and with the label/heading/math density of the
+1.1 content, then times each tool on it — no TeX needed.
+
+Each repetition runs the tools in build order in three modes:
+
+  cold   fresh copy of the corpus, no build/.cache
+  warm   immediately again (caches valid, nothing changed)
+  edit   after appending a paragraph with math in a heading to one file
+
+Wall time, CPU time and peak RSS (tools/build_profile.measure) are
+recorded; the median over --repeat runs goes to build/bench/history.jsonl
+together with the commit and the corpus parameters. Each run is compared
+with the median of the previous --baseline runs on the same corpus; a
+tool/mode that got slower by more than --threshold (and by more than
+--min-delta seconds) is a regression and makes the exit code 1.
+
+Usage (from repo root):
+
+    python tools/bench_pipeline.py                      # preset "small"
+    python tools/bench_pipeline.py --preset large       # 10k nodes, 100 families, 50 MB
+    python tools/bench_pipeline.py --nodes 3000 --families 30 --mb 15 --repeat 5
+    python tools/bench_pipeline.py --tool fix_math_in_headings --no-record
+    python tools/bench_pipeline.py --generate-only --preset large
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from build_profile import measure
+
+TOOLS_DIR = Path(__file__).resolve().parent
+BENCH_DIR = Path("build") / "bench"
+HISTORY_FILE = BENCH_DIR / "history.jsonl"
+
+# Bump when the generated corpus changes (invalidates old corpora/baselines).
+CORPUS_VERSION = 1
+
+PRESETS = {
+    "small": {"nodes": 1000, "families": 10, "mb": 5.0},
+    "medium": {"nodes": 3000, "families": 30, "mb": 15.0},
+    "large": {"nodes": 10000, "families": 100, "mb": 50.0},
+}
+
+# Tools in build_core.sh order: (name, arguments).
+TOOLS = [
+    ("generate_auto_inputs", ["--yaml", "master_core_structure.yaml",
+                              "--output", "content/_auto_core_inputs.tex"]),
+    ("validate_core_structure", []),
+    ("demote_module_headings", []),
+    ("fix_math_in_headings", []),
+    ("find_duplicate_labels", []),
+    ("check_refs", []),
+    ("check_include_graph", ["--quiet"]),
+]
+MODES = ("cold", "warm", "edit")
+
+DEFAULT_REPEAT = 3
+DEFAULT_BASELINE = 5
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA = 0.05
+
+# Densities per KiB of content, measured on the 1.1 tree (content/).
+TOP_SECTIONS = 15
+HEADINGS_PER_KB = 2.1
+MATH_PER_KB = 4.8
+HEADING_MATH_SHARE = 0.35
+LABEL_PER_HEADING = 0.07
+REF_PER_HEADING = 0.02
+CAPTION_PER_HEADING = 0.01
+DUPLICATE_LABEL_SHARE = 0.002
+
+WORDS = (
+    "continuum level boundary threshold operator flow potential closure "
+    "network transition axis state space structure invariant collapse "
+    "rebirth branching topology gradient membrane coherence emergence "
+    "dimension admissible representation cycle process prediction jet "
+    "experiment falsifiable constraint composition catalytic stable the of "
+    "and in to a is which are for with as by on this that"
+).split()
+MATH = (
+    "$K_{%d}$", r"$\Omega(K_{%d})$", r"$\Psi_{%d\to%d}$", r"$\mathcal{K}_{%d}$",
+    r"$\partial\Omega_{%d}$", r"$A_{%d}$", r"$\{A_1,\dots,A_{%d}\}$", r"$\Delta V_{%d}$",
+)
+
+
+# --------------------------------------------------------------------
+# Corpus generator
+# --------------------------------------------------------------------
+
+class CorpusSpec:
+    __slots__ = ("nodes", "families", "mb", "seed")
+
+    def __init__(self, nodes, families, mb, seed):
+        self.nodes = nodes
+        self.families = families
+        self.mb = mb
+        self.seed = seed
+
+    def as_dict(self):
+        return {"nodes": self.nodes, "families": self.families, "mb": self.mb,
+                "seed": self.seed, "version": CORPUS_VERSION}
+
+    @property
+    def name(self) -> str:
+        return f"corpus-{self.nodes}n-{self.families}f-{self.mb:g}mb-s{self.seed}"
+
+    @property
+    def per_family(self) -> int:
+        """Template children per family (the rest of the node budget)."""
+        return max(1, (self.nodes - TOP_SECTIONS - 1) // max(1, self.families) - 1)
+
+
+class _Text:
+    """Deterministic LaTeX-ish prose with the measured densities."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.labels = []
+
+    def math(self) -> str:
+        m = self.rng.choice(MATH)
+        n = self.rng.randrange(13)
+        return m % ((n, n + 1) if m.count("%d") == 2 else n)
+
+    def sentence(self, n_math: int) -> str:
+        words = [self.rng.choice(WORDS) for _ in range(self.rng.randrange(8, 18))]
+        for _ in range(n_math):
+            words.insert(self.rng.randrange(len(words) + 1), self.math())
+        text = " ".join(words)
+        return text[:1].upper() + text[1:] + "."
+
+    def block(self, stem: str, counter: int) -> str:
+        rng = self.rng
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(2, 5))).title()
+        if rng.random() < HEADING_MATH_SHARE:
+            title += " " + self.math()
+        out = [f"\\subsubsection{{{title}}}\n"]
+        if rng.random() < LABEL_PER_HEADING:
+            if self.labels and rng.random() < DUPLICATE_LABEL_SHARE / LABEL_PER_HEADING:
+                label = rng.choice(self.labels)
+            else:
+                label = f"sec:{stem}-{counter}"
+                self.labels.append(label)
+            out.append(f"\\label{{{label}}}\n")
+        out.append("\n")
+        # ~480 bytes of prose per heading with ~2.3 inline math expressions
+        n_math = round(MATH_PER_KB / HEADINGS_PER_KB)
+        for _ in range(3):
+            out.append(self.sentence(rng.randrange(n_math + 1)) + "\n")
+        if self.labels and rng.random() < REF_PER_HEADING:
+            out.append(f"See Section~\\ref{{{rng.choice(self.labels)}}}.\n")
+        if rng.random() < CAPTION_PER_HEADING:
+            out.append(
+                "\\begin{figure}[h]\n\\centering\n"
+                f"\\caption{{Flow on {self.math()}}}\n\\end{{figure}}\n"
+            )
+        out.append("\n")
+        return "".join(out)
+
+    def file(self, rel: str, heading: str, target_bytes: int) -> str:
+        stem = Path(rel).stem
+        out = [f"% {rel} (synthetic)\n\n{heading}{{{stem.replace('_', ' ').title()}}}\n",
+               f"\\label{{sec:{stem}}}\n\n"]
+        self.labels.append(f"sec:{stem}")
+        size = sum(len(s) for s in out)
+        counter = 0
+        while size < target_bytes:
+            block = self.block(stem, counter)
+            out.append(block)
+            size += len(block)
+            counter += 1
+        return "".join(out)
+
+
+def generate_corpus(spec: CorpusSpec, dest: Path) -> int:
+    """Write the synthetic repository to dest; returns the number of files."""
+    rng = random.Random(spec.seed)
+    text = _Text(rng)
+    per = spec.per_family
+    n_files = TOP_SECTIONS + 1 + spec.families * (1 + per)
+    target = int(spec.mb * 1024 * 1024 / n_files)
+
+    yaml = ["root:", "  entrypoint: main.tex", "sections:"]
+    files = []
+    for i in range(1, TOP_SECTIONS + 1):
+        rel = f"content/{i:02d}_section.tex"
+        yaml += [f"- id: section_{i:02d}", f"  path: {rel}"]
+        files.append((rel, "\\section"))
+    yaml += ["- id: modules_master", "  path: content/modules_master.tex", "  children:"]
+    files.append(("content/modules_master.tex", "\\section"))
+    modules = ["", "modules:"]
+    for f in range(spec.families):
+        fam = f"fam{f:03d}"
+        master = f"content/{fam}/{fam}_master.tex"
+        yaml += [
+            f"  - id: {fam}_master",
+            f"    path: {master}",
+            "    children:",
+            f"    - pattern: content/{fam}/{fam}_k{{k}}.tex",
+            f"      k: 0..{per - 1}",
+        ]
+        modules += [f"  {fam}:", "    master:", f"      path: {master}"]
+        files.append((master, "\\section"))
+        files += [(f"content/{fam}/{fam}_k{k}.tex", "\\subsubsection") for k in range(per)]
+
+    if dest.exists():
+        shutil.rmtree(dest)
+    (dest / "content").mkdir(parents=True)
+    (dest / "master_core_structure.yaml").write_text("\n".join(yaml + modules) + "\n", encoding="utf-8")
+    (dest / "main.tex").write_text(
+        "\\documentclass{article}\n\\input{preamble}\n\\begin{document}\n"
+        "\\input{content/_auto_core_inputs.tex}\n\\end{document}\n",
+        encoding="utf-8",
+    )
+    (dest / "preamble.tex").write_text("% synthetic preamble\n", encoding="utf-8")
+    for rel, heading in files:
+        path = dest / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text.file(rel, heading, target), encoding="utf-8")
+    (dest / "corpus.json").write_text(json.dumps(spec.as_dict()) + "\n", encoding="utf-8")
+    return len(files)
+
+
+def ensure_corpus(spec: CorpusSpec, regenerate: bool = False) -> Path:
+    """Return the pristine corpus directory, generating it if needed."""
+    pristine = BENCH_DIR / spec.name
+    try:
+        current = json.loads((pristine / "corpus.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        current = None
+    if regenerate or current != spec.as_dict():
+        print(f"[bench] Generating {pristine} ...", flush=True)
+        n = generate_corpus(spec, pristine)
+        size = sum(p.stat().st_size for p in (pristine / "content").rglob("*.tex"))
+        print(f"[bench] {n} file(s), {size / 1024 / 1024:.1f} MB of .tex")
+    return pristine
+
+
+# --------------------------------------------------------------------
+# Runs
+# --------------------------------------------------------------------
+
+def run_tool(name, args, cwd: Path):
+    m = measure([sys.executable, str(TOOLS_DIR / f"{name}.py"), *args], cwd=cwd, quiet=True)
+    return {"wall": m.wall, "cpu": m.cpu, "maxrss_kb": m.maxrss_kb, "returncode": m.returncode}
+
+
+def edit_one_file(work: Path, rng: random.Random) -> None:
+    files = sorted((work / "content").rglob("*_k*.tex"))
+    path = rng.choice(files)
+    with path.open("a", encoding="utf-8") as f:
+        f.write("\n\\subsubsection{Edited $K_{3}$ level}\nEdited paragraph.\n")
+
+
+def run_once(pristine: Path, tools, rng: random.Random):
+    """One cold/warm/edit round on a fresh copy; returns {tool: {mode: result}}."""
+    work = pristine.with_name(pristine.name + ".work")
+    if work.exists():
+        shutil.rmtree(work)
+    shutil.copytree(pristine, work)
+    results = {name: {} for name, _ in tools}
+    for mode in MODES:
+        if mode == "edit":
+            edit_one_file(work, rng)
+        for name, args in tools:
+            results[name][mode] = run_tool(name, args, work)
+    shutil.rmtree(work)
+    return results
+
+
+def median_results(runs):
+    out = {}
+    for name in runs[0]:
+        out[name] = {}
+        for mode in runs[0][name]:
+            samples = [r[name][mode] for r in runs]
+            out[name][mode] = {
+                key: (statistics.median(s[key] for s in samples)
+                      if all(s[key] is not None for s in samples) else None)
+                for key in ("wall", "cpu", "maxrss_kb")
+            }
+            out[name][mode]["returncode"] = max(s["returncode"] for s in samples)
+    return out
+
+
+# --------------------------------------------------------------------
+# History / regressions
+# --------------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=TOOLS_DIR,
+                             capture_output=True, text=True)
+    except OSError:
+        return "unknown"
+    return out.stdout.strip() or "unknown"
+
+
+def load_history(path: Path = HISTORY_FILE):
+    entries = []
+    try:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def baseline(history, spec: CorpusSpec, n: int):
+    """Median wall time per (tool, mode) over the last n runs on this corpus."""
+    same = [h for h in history if h.get("corpus") == spec.as_dict()][-n:]
+    walls = {}
+    for h in same:
+        for name, modes in h["results"].items():
+            for mode, r in modes.items():
+                walls.setdefault((name, mode), []).append(r["wall"])
+    return {key: statistics.median(v) for key, v in walls.items()}, len(same)
+
+
+def compare(results, base, threshold: float, min_delta: float):
+    """Return (rows, regressions); rows are printable table lines."""
+    rows = []
+    regressions = []
+    for name, modes in results.items():
+        for mode, r in modes.items():
+            prev = base.get((name, mode))
+            cpu = f"{r['cpu']:7.2f}s" if r["cpu"] is not None else f"{'-':>8}"
+            rss = f"{r['maxrss_kb'] / 1024:7.1f} MB" if r["maxrss_kb"] is not None else f"{'-':>10}"
+            line = f"  {name:<24} {mode:<5} {r['wall']:7.2f}s {cpu} {rss}"
+            if prev:
+                delta = r["wall"] - prev
+                line += f"   {delta / prev:+7.1%} vs {prev:.2f}s"
+                if delta > prev * threshold and delta > min_delta:
+                    line += "  REGRESSION"
+                    regressions.append((name, mode, prev, r["wall"]))
+            if r["returncode"]:
+                line += f"  (exit {r['returncode']})"
+            rows.append(line)
+    return rows, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the tools/ pipeline on synthetic corpora")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--nodes", type=int, help="YAML nodes (overrides the preset)")
+    parser.add_argument("--families", type=int, help="Module families (overrides the preset)")
+    parser.add_argument("--mb", type=float, help="Total .tex size in MB (overrides the preset)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--tool", action="append", choices=[n for n, _ in TOOLS],
+                        help="Only benchmark these tools (repeatable)")
+    parser.add_argument("--baseline", type=int, default=DEFAULT_BASELINE,
+                        help=f"Previous runs forming the baseline (default: {DEFAULT_BASELINE})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+                        help=f"Ignore slowdowns below this many seconds (default: {DEFAULT_MIN_DELTA})")
+    parser.add_argument("--no-record", action="store_true", help="Do not append to the history")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate the corpus")
+    parser.add_argument("--generate-only", action="store_true", help="Only (re)generate the corpus")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    spec = CorpusSpec(
+        args.nodes or preset["nodes"],
+        args.families or preset["families"],
+        args.mb or preset["mb"],
+        args.seed,
+    )
+    pristine = ensure_corpus(spec, args.regenerate)
+    if args.generate_only:
+        return 0
+
+    tools = [t for t in TOOLS if not args.tool or t[0] in args.tool]
+    rng = random.Random(spec.seed)
+    runs = []
+    for i in range(1, args.repeat + 1):
+        print(f"[bench] Run {i}/{args.repeat} ({', '.join(MODES)}) ...", flush=True)
+        runs.append(run_once(pristine, tools, rng))
+    results = median_results(runs)
+
+    history = load_history()
+    base, n_base = baseline(history, spec, args.baseline)
+    rows, regressions = compare(results, base, args.threshold, args.min_delta)
+
+    print(f"[bench] {spec.name}, median of {args.repeat} run(s), "
+          f"baseline: {n_base} previous run(s)")
+    print(f"  {'tool':<24} {'mode':<5} {'wall':>8} {'cpu':>8} {'peak RSS':>10}")
+    for line in rows:
+        print(line)
+
+    if not args.no_record:
+        entry = {
+            "time": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+            "corpus": spec.as_dict(),
+            "repeat": args.repeat,
+            "results": results,
+        }
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with HISTORY_FILE.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"[bench] Recorded in {HISTORY_FILE}")
+
+    if regressions:
+        print(f"[bench] {len(regressions)} regression(s) above {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
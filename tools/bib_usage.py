@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Bibliography usage analyzer.
+
+main.tex has \nocite{*}, so biber processes (and the bibliography
+typesets) every entry of bib/*.bib, cited or not. This tool
+
+  1) parses bib/*.bib once into a key → entry table,
+  2) collects the \cite-family keys of all files reachable from main.tex
+     and appendix/*.tex from the shared .tex index (tools/tex_index.py),
+  3) reports missing keys (cited but not in any .bib, as file:line) and
+     unused keys (in a .bib but never cited),
+  4) optionally (--trim DIR) writes trimmed copies of the .bib files to
+     DIR that contain only the cited entries, plus everything they
+     reference via crossref/xdata/related and all @string/@preamble
+     blocks. If no citation is found at all, every entry is kept (with a
+     warning) instead of writing empty files.
+
+\nocite{*} itself is not counted as a citation: with the trimmed files
+in build/bib/ it still pulls in "everything", which is now exactly the
+cited set. Explicit \nocite{key} entries do count.
+
+Usage (from repo root):
+
+    python tools/bib_usage.py                  # report only
+    python tools/bib_usage.py --trim build/bib # write trimmed .bib files
+    ./build_core.sh --trim-bib                 # same, as part of the build
+
+Exit code: 1 if a cited key is missing from the .bib files, else 0.
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+from check_refs import default_entries
+from core_io import write_if_changed
+from tex_index import load_index
+
+BIB_DIR = Path("bib")
+
+ENTRY_START_RE = re.compile(r"@([A-Za-z]+)\s*([{(])")
+KEY_RE = re.compile(r"\s*([^,\s]+)\s*,")
+LINK_FIELD_RE = re.compile(
+    r"\b(?:crossref|xdata|related)\s*=\s*[{\"]([^}\"]+)[}\"]", re.IGNORECASE
+)
+META_TYPES = {"string", "preamble", "comment"}
+
+
+class BibEntry:
+    """One @type{key, ...} block of a .bib file."""
+
+    __slots__ = ("type", "key", "source", "line", "text")
+
+    def __init__(self, type_, key, source, line, text):
+        self.type = type_
+        self.key = key
+        self.source = source
+        self.line = line
+        self.text = text
+
+    def links(self):
+        """Keys referenced via crossref/xdata/related."""
+        keys = []
+        for m in LINK_FIELD_RE.finditer(self.text):
+            keys.extend(k.strip() for k in m.group(1).split(",") if k.strip())
+        return keys
+
+
+def _block_end(text: str, i: int, close: str) -> int:
+    """Index just past the delimiter that closes the block opened before i."""
+    opener = "{" if close == "}" else "("
+    depth = 1
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == opener:
+            depth += 1
+        elif ch == close:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(text)
+
+
+def parse_bib(path: Path):
+    """Return (entries, meta_blocks) of one .bib file, in file order."""
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    entries, meta = [], []
+    pos = 0
+    while True:
+        m = ENTRY_START_RE.search(text, pos)
+        if not m:
+            break
+        end = _block_end(text, m.end(), "}" if m.group(2) == "{" else ")")
+        block = text[m.start():end]
+        type_ = m.group(1).lower()
+        line = text.count("\n", 0, m.start()) + 1
+        if type_ in META_TYPES:
+            if type_ != "comment":
+                meta.append(block)
+        else:
+            km = KEY_RE.match(text, m.end())
+            if km:
+                entries.append(BibEntry(type_, km.group(1), path, line, block))
+        pos = end
+    return entries, meta
+
+
+def load_bib(bib_dir: Path = BIB_DIR):
+    """Parse all .bib files: returns (table key → entry, files in order)."""
+    table = {}
+    files = []
+    for path in sorted(bib_dir.glob("*.bib")):
+        entries, meta = parse_bib(path)
+        files.append((path, entries, meta))
+        for e in entries:
+            table.setdefault(e.key, e)
+    return table, files
+
+
+def cited_keys(index, entries):
+    """Map cited key → first (path, line), over the reachable files."""
+    keys = {}
+    for path, e in index.iter_entries("cite", index.reachable(entries)):
+        if e.arg == "*":
+            continue
+        keys.setdefault(e.arg, (path, e.line))
+    return keys
+
+
+def closure(keys, table):
+    """Cited keys plus everything they pull in via crossref/xdata/related."""
+    needed = set()
+    stack = [k for k in keys if k in table]
+    while stack:
+        key = stack.pop()
+        if key in needed:
+            continue
+        needed.add(key)
+        stack.extend(k for k in table[key].links() if k in table)
+    return needed
+
+
+def write_trimmed(files, needed, outdir: Path):
+    """Write trimmed copies of the .bib files; unchanged files are not touched."""
+    outdir.mkdir(parents=True, exist_ok=True)
+    for path, entries, meta in files:
+        kept = [e.text for e in entries if e.key in needed]
+        text = (
+            f"% Trimmed from {path.as_posix()} by tools/bib_usage.py — DO NOT EDIT\n\n"
+            + "".join(b + "\n\n" for b in meta + kept)
+        )
+        target = outdir / path.name
+        if write_if_changed(target, text):
+            print(f"[bib] Wrote {target} ({len(kept)}/{len(entries)} entries)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report missing/unused .bib keys")
+    parser.add_argument("--bib-dir", type=Path, default=BIB_DIR)
+    parser.add_argument(
+        "--trim",
+        metavar="DIR",
+        type=Path,
+        help="Write .bib files with only the cited entries to DIR",
+    )
+    args = parser.parse_args()
+
+    table, files = load_bib(args.bib_dir)
+    cited = cited_keys(load_index(), default_entries())
+
+    missing = sorted(k for k in cited if k not in table)
+    needed = closure(cited, table)
+    unused = sorted(k for k in table if k not in needed)
+
+    for key in missing:
+        path, line = cited[key]
+        print(f"{path}:{line}: citation '{key}' not found in {args.bib_dir}/*.bib")
+    if unused:
+        print(f"[bib] {len(unused)} unused entr{'y' if len(unused) == 1 else 'ies'}:")
+        for key in unused:
+            e = table[key]
+            print(f"   - {key} ({e.source.as_posix()}:{e.line})")
+    print(
+        f"[bib] {len(table)} entries, {len(cited)} cited key(s), "
+        f"{len(missing)} missing, {len(unused)} unused."
+    )
+
+    if args.trim:
+        if not needed and table:
+            # Nothing cited (or only through commands the index does not
+            # know): a trimmed copy would silently drop the bibliography.
+            print(f"[WARN] No citations found — not trimming, {args.trim}/ gets all "
+                  f"{len(table)} entries.")
+            needed = set(table)
+        write_trimmed(files, needed, args.trim)
+
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
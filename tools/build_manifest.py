@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Persistent build manifest for incremental Core builds.
+
+The manifest records a content hash for every file that can influence
+build/main.pdf:
+
+  • every \input / \include reachable from main.tex
+    (including everything listed in content/_auto_core_inputs.tex and
+    the figures/*.tex it includes — unused figures are not inputs),
+  • preamble.tex,
+  • bib/*.bib,
+  • the table data in data/ (YAML/CSV, see tools/generate_tables.py),
+  • master_core_structure.yaml.
+
+It is stored as build/core_manifest.json after each successful build.
+build_core.sh --incremental asks it which pipeline stages are affected:
+
+    python tools/build_manifest.py status --stages
+        → prints e.g. "tex bib" (empty output = nothing changed)
+
+    python tools/build_manifest.py update
+        → records the current state (called at the end of a build)
+
+    python tools/build_manifest.py fingerprint build/main.aux build/main.toc
+        → one combined SHA-256 over the given files (missing files count
+          as empty), used to detect the .aux/.toc fixed point and
+          unchanged .bcf files between passes.
+
+Stages:
+  structure — master_core_structure.yaml changed (regenerate + validate)
+  data      — any data/**/*.yaml or *.csv changed (re-render appendix tables)
+  tex       — any reachable .tex source or figure changed (XeLaTeX)
+  bib       — any bib/*.bib changed (biber)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from latex_scan import iter_commands, resolve_tex
+
+MANIFEST_FILE = Path("build") / "core_manifest.json"
+MANIFEST_VERSION = 1
+
+ENTRYPOINT = "main.tex"
+STRUCTURE_FILE = "master_core_structure.yaml"
+EXTRA_GLOBS = ("preamble.tex", "bib/*.bib", "data/**/*.yaml", "data/**/*.csv")
+
+# \input{...} and \include{...}, found by the brace-aware scanner
+# (tools/latex_scan.py), which also skips comments.
+INPUT_COMMANDS = {"input", "include"}
+
+STAGE_ORDER = ("structure", "data", "tex", "bib")
+
+
+# --------------------------------------------------------------------
+# Hashing helpers
+# --------------------------------------------------------------------
+
+def file_digest(path) -> str:
+    """SHA-256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(paths) -> str:
+    """Combined SHA-256 over several files; missing files hash as empty."""
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(str(p).encode("utf-8") + b"\0")
+        try:
+            h.update(file_digest(p).encode("ascii"))
+        except FileNotFoundError:
+            h.update(b"-")
+    return h.hexdigest()
+
+
+# --------------------------------------------------------------------
+# Input graph
+# --------------------------------------------------------------------
+
+def iter_inputs(path: Path):
+    """Yield raw \\input/\\include arguments of one file (comments ignored)."""
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    for cmd in iter_commands(text, INPUT_COMMANDS):
+        yield cmd.arg.strip()
+
+
+def collect_tex_graph(root: Path, entry: str = ENTRYPOINT):
+    """All .tex files reachable from the entry point via \\input (DFS order)."""
+    start = resolve_tex(entry, root)
+    if start is None:
+        return []
+
+    order = []
+    seen = set()
+    stack = [start]
+    while stack:
+        path = stack.pop()
+        rel = path.relative_to(root).as_posix()
+        if rel in seen:
+            continue
+        seen.add(rel)
+        order.append(rel)
+        children = []
+        for arg in iter_inputs(path):
+            child = resolve_tex(arg, root)
+            if child is not None:
+                children.append(child)
+        stack.extend(reversed(children))
+    return order
+
+
+def input_stage(rel: str) -> str:
+    if rel.endswith(".bib"):
+        return "bib"
+    if rel.startswith("data/"):
+        return "data"
+    return "tex"
+
+
+def collect_build_inputs(root: Path):
+    """Map of relative path → stage for every file that affects the PDF."""
+    inputs = {}
+    for rel in collect_tex_graph(root):
+        inputs[rel] = "tex"
+    for pattern in EXTRA_GLOBS:
+        for p in sorted(root.glob(pattern)):
+            if p.is_file():
+                rel = p.relative_to(root).as_posix()
+                inputs[rel] = input_stage(rel)
+    if (root / STRUCTURE_FILE).is_file():
+        inputs[STRUCTURE_FILE] = "structure"
+    return inputs
+
+
+# --------------------------------------------------------------------
+# Manifest I/O
+# --------------------------------------------------------------------
+
+def load_manifest(path: Path):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def scan(root: Path, previous=None):
+    """
+    Build the current manifest entries. Files whose mtime and size match
+    the previous manifest are not re-hashed.
+    """
+    old_files = (previous or {}).get("files", {})
+    files = {}
+    for rel, stage in collect_build_inputs(root).items():
+        st = (root / rel).stat()
+        old = old_files.get(rel)
+        if old and old["mtime_ns"] == st.st_mtime_ns and old["size"] == st.st_size:
+            digest = old["sha256"]
+        else:
+            digest = file_digest(root / rel)
+        files[rel] = {
+            "stage": stage,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha256": digest,
+        }
+    return {"version": MANIFEST_VERSION, "files": files}
+
+
+def diff(previous, current):
+    """Return (changed, added, removed) relative path lists."""
+    old = previous.get("files", {})
+    new = current.get("files", {})
+    changed = sorted(p for p in new if p in old and new[p]["sha256"] != old[p]["sha256"])
+    added = sorted(p for p in new if p not in old)
+    removed = sorted(p for p in old if p not in new)
+    return changed, added, removed
+
+
+def affected_stages(previous, current):
+    """Ordered list of stages touched by the difference of two manifests."""
+    if previous is None:
+        return list(STAGE_ORDER)
+    old = previous.get("files", {})
+    new = current.get("files", {})
+    changed, added, removed = diff(previous, current)
+    stages = set()
+    for p in changed + added:
+        stages.add(new[p]["stage"])
+    for p in removed:
+        stages.add(old[p]["stage"])
+    return [s for s in STAGE_ORDER if s in stages]
+
+
+def write_manifest(path: Path, manifest) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# --------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------
+
+def cmd_status(args, root: Path) -> int:
+    manifest_path = root / args.manifest
+    previous = load_manifest(manifest_path)
+    current = scan(root, previous)
+    stages = affected_stages(previous, current)
+
+    if args.stages:
+        print(" ".join(stages))
+        return 0
+
+    if previous is None:
+        print(f"[manifest] No manifest at {manifest_path} — full build required.")
+        return 1
+
+    changed, added, removed = diff(previous, current)
+    for label, items in (("changed", changed), ("added", added), ("removed", removed)):
+        for p in items:
+            print(f"[manifest] {label:8} {p}")
+    if not stages:
+        print(f"[manifest] Up to date ({len(current['files'])} tracked file(s)).")
+        return 0
+    print(f"[manifest] Affected stages: {' '.join(stages)}")
+    return 1
+
+
+def cmd_update(args, root: Path) -> int:
+    manifest_path = root / args.manifest
+    current = scan(root, load_manifest(manifest_path))
+    write_manifest(manifest_path, current)
+    print(f"[manifest] Recorded {len(current['files'])} file(s) in {manifest_path}")
+    return 0
+
+
+def cmd_fingerprint(args, root: Path) -> int:
+    print(fingerprint(args.files))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Track build inputs for incremental Core builds"
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(MANIFEST_FILE),
+        help="Manifest location relative to the repo root",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_status = sub.add_parser("status", help="Compare the tree against the manifest")
+    p_status.add_argument(
+        "--stages",
+        action="store_true",
+        help="Only print the affected stages (space-separated, empty if none)",
+    )
+    sub.add_parser("update", help="Record the current state of all inputs")
+    p_fp = sub.add_parser("fingerprint", help="Combined hash of the given files")
+    p_fp.add_argument("files", nargs="+")
+
+    args = parser.parse_args()
+    root = Path.cwd()
+
+    handlers = {
+        "status": cmd_status,
+        "update": cmd_update,
+        "fingerprint": cmd_fingerprint,
+    }
+    return handlers[args.command](args, root)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Parallel Core build: compile independent chunks concurrently, then merge.
+
+Usage (from repo root):
+
+    python tools/build_parallel.py              # all cores
+    python tools/build_parallel.py --jobs 8
+    ./build_core.sh --parallel                  # same, inside the pipeline
+
+Chunks (in document order):
+
+  • frontmatter — main.tex body before \input{content/_auto_core_inputs.tex}
+  • one chunk per top-level section of master_core_structure.yaml,
+  • for modules_master: its own file, then one chunk per module subtree,
+  • backmatter — main.tex body after the auto inputs (appendices,
+    bibliography).
+
+Each chunk is compiled by tools/run_latex.py as its own XeLaTeX/biber job
+in build/parallel/<chunk>/. Consistency across chunks is kept through a
+shared table derived from the previous round:
+
+  • start counters (page, section, figure, table) = end counters of the
+    preceding chunk, written by each chunk into <chunk>.layout,
+  • a global \newlabel table (all chunk .aux files, falling back to the
+    last serial build in build/main.aux),
+  • a combined TOC that the frontmatter chunk typesets.
+
+A chunk is recompiled only when its sources, start counters, imported
+labels or (frontmatter) TOC changed; rounds repeat until nothing is
+stale. The chunk PDFs are then merged by a pdfpages document that
+recreates section bookmarks from the chunk TOCs, and copied to
+build/main.pdf.
+
+--fresh drops build/parallel/ first (all chunks from clean auxiliary
+files, like the serial full build); --figure-cache lets every chunk
+resolve \input{figures/x} to the cached PDFs of tools/figure_cache.py.
+The precompiled preamble format (--format) is not supported: chunk roots
+carry their own preamble.
+
+Differences from the serial build: every chunk starts on a new page, and
+hyperlinks inside the merged PDF do not cross chunk boundaries. Release
+PDFs should still come from the serial ./build_core.sh.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from build_manifest import collect_tex_graph, fingerprint
+from core_io import write_if_changed
+from build_partial import (
+    FULL_AUX,
+    NEWLABEL_RE,
+    collect_local_labels,
+    mirror_bib,
+    read_documentclass,
+    write_external_labels,
+)
+from core_structure import STRUCTURE_FILE, load_structure
+from figure_cache import SHIM_DIR, texinputs_env
+from run_latex import DEFAULT_MAX_PASSES, LatexJob, run_build
+
+ENTRYPOINT = Path("main.tex")
+PARALLEL_ROOT = Path("build") / "parallel"
+STATE_FILE = PARALLEL_ROOT / "state.json"
+COMBINED_TOC = PARALLEL_ROOT / "combined.toc"
+OUTPUT_PDF = Path("build") / "main.pdf"
+
+MODULES_ID = "modules_master"
+MAX_ROUNDS = 4
+
+# Extra environment of every chunk job (TEXINPUTS with --figure-cache).
+JOB_ENV = {}
+
+# Counters carried from one chunk to the next.
+COUNTERS = ("page", "section", "figure", "table")
+INITIAL_COUNTERS = {"page": 1, "section": 0, "figure": 0, "table": 0}
+
+AUTO_INPUT_RE = re.compile(r"\\input\{content/_auto_core_inputs(?:\.tex)?\}")
+INPUT_ARG_RE = re.compile(r"\\input\{([^}]+)\}")
+CONTENTSLINE_RE = re.compile(r"^\\contentsline\s*")
+NUMBERLINE_RE = re.compile(r"\\numberline\s*\{([^}]*)\}")
+
+CHUNK_TEMPLATE = r"""% ==========================================
+%  Auto-generated by tools/build_parallel.py
+%  Chunk: {chunk_id}
+%  DO NOT EDIT THIS FILE MANUALLY
+% ==========================================
+{documentclass}
+\input{{preamble}}
+\makeatletter
+{toc_override}% Report end counters for the next chunk
+\newwrite\oc@layout
+\AtEndDocument{{\clearpage
+  \immediate\openout\oc@layout=\jobname.layout\relax
+{layout_writes}
+  \immediate\closeout\oc@layout}}
+\makeatother
+
+\begin{{document}}
+
+\makeatletter
+\input{{{xref}}}
+\makeatother
+{start_counters}
+
+{body}
+
+\end{{document}}
+"""
+
+TOC_OVERRIDE = r"""% Typeset the TOC combined from all chunks instead of \jobname.toc
+\renewcommand\tableofcontents{{%
+  \section*{{\contentsname\@mkboth{{\MakeUppercase\contentsname}}{{\MakeUppercase\contentsname}}}}%
+  \IfFileExists{{{toc}}}{{\@input{{{toc}}}}}{{}}}}
+"""
+
+MERGE_TEMPLATE = r"""% ==========================================
+%  Auto-generated by tools/build_parallel.py
+%  Merge of all chunk PDFs
+% ==========================================
+{documentclass}
+\usepackage{{pdfpages}}
+\usepackage[bookmarks=true,bookmarksopen=true]{{hyperref}}
+
+\begin{{document}}
+{includes}
+\end{{document}}
+"""
+
+
+class Chunk:
+    """One independently compiled part of the document."""
+
+    __slots__ = ("id", "body", "inputs", "reads_toc")
+
+    def __init__(self, chunk_id, body, inputs, reads_toc=False):
+        self.id = chunk_id
+        self.body = body
+        self.inputs = inputs
+        self.reads_toc = reads_toc
+
+    @property
+    def outdir(self) -> Path:
+        return PARALLEL_ROOT / self.id
+
+    def job(self, quiet=True) -> LatexJob:
+        return LatexJob(
+            root=self.outdir / f"{self.id}.tex",
+            outdir=self.outdir,
+            jobname=self.id,
+            env=dict(JOB_ENV) or None,
+            quiet=quiet,
+        )
+
+    def sources(self, root: Path):
+        """All .tex files this chunk reads (transitively)."""
+        files = []
+        for p in self.inputs:
+            files.extend(collect_tex_graph(root, p))
+        return files
+
+
+# --------------------------------------------------------------------
+# Planning
+# --------------------------------------------------------------------
+
+def _split_main():
+    """Return (front, back) body slices of main.tex around the auto inputs."""
+    text = ENTRYPOINT.read_text(encoding="utf-8")
+    begin = text.index("\\begin{document}") + len("\\begin{document}")
+    end = text.rindex("\\end{document}")
+    m = AUTO_INPUT_RE.search(text, begin, end)
+    if not m:
+        raise SystemExit(f"{ENTRYPOINT}: \\input{{content/_auto_core_inputs.tex}} nicht gefunden.")
+    return text[begin:m.start()].strip("\n"), text[m.end():end].strip("\n")
+
+
+def _inputs_body(paths):
+    return "\n".join(f"\\input{{{p}}}" for p in paths)
+
+
+def plan_chunks(structure):
+    front, back = _split_main()
+    chunks = [Chunk("frontmatter", front, INPUT_ARG_RE.findall(front), reads_toc=True)]
+
+    for node in structure.roots:
+        if node.id == MODULES_ID:
+            if node.path:
+                chunks.append(Chunk(node.id, _inputs_body([node.path]), [node.path]))
+            for child in node.children:
+                paths = structure.tex_paths([child])
+                chunks.append(Chunk(child.id or Path(child.path).stem, _inputs_body(paths), paths))
+            continue
+        paths = structure.tex_paths([node])
+        if paths:
+            chunks.append(Chunk(node.id or Path(paths[0]).stem, _inputs_body(paths), paths))
+
+    chunks.append(Chunk("backmatter", back, INPUT_ARG_RE.findall(back)))
+    return chunks
+
+
+# --------------------------------------------------------------------
+# Shared tables
+# --------------------------------------------------------------------
+
+def read_layout(job: LatexJob):
+    """Parse the 'name=value' lines a chunk wrote at \\end{document}."""
+    path = job.out(".layout")
+    if not path.exists():
+        return None
+    values = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        key, _, value = line.partition("=")
+        if key in COUNTERS and value.strip().lstrip("-").isdigit():
+            values[key] = int(value)
+    return values if len(values) == len(COUNTERS) else None
+
+
+def global_labels(chunks):
+    r"""\newlabel lines of the last serial build, overridden by all chunks."""
+    table = {}
+    for source in [FULL_AUX] + [c.job().out(".aux") for c in chunks]:
+        if not source.exists():
+            continue
+        for line in source.read_text(encoding="utf-8", errors="ignore").splitlines():
+            m = NEWLABEL_RE.match(line)
+            if m:
+                table[m.group(1)] = line
+    return list(table.values())
+
+
+def write_combined_toc(chunks) -> None:
+    lines = []
+    for c in chunks:
+        if c.reads_toc:
+            continue
+        toc = c.job().out(".toc")
+        if toc.exists():
+            lines.extend(toc.read_text(encoding="utf-8", errors="ignore").splitlines())
+    write_if_changed(COMBINED_TOC, "\n".join(lines) + "\n")
+
+
+def write_chunk_root(chunk, documentclass, start, labels) -> None:
+    outdir = chunk.outdir
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    xref = outdir / f"{chunk.id}-xref.tex"
+    write_external_labels(xref, collect_local_labels(chunk.sources(Path("."))), labels)
+
+    toc_override = ""
+    if chunk.reads_toc:
+        toc_override = TOC_OVERRIDE.format(toc=COMBINED_TOC.as_posix())
+
+    layout_writes = "\n".join(
+        f"  \\immediate\\write\\oc@layout{{{name}=\\the\\c@{name}}}" for name in COUNTERS
+    )
+    start_counters = "\n".join(
+        f"\\setcounter{{{name}}}{{{start[name]}}}" for name in COUNTERS
+    )
+
+    write_if_changed(
+        chunk.job().root,
+        CHUNK_TEMPLATE.format(
+            chunk_id=chunk.id,
+            documentclass=documentclass,
+            toc_override=toc_override,
+            layout_writes=layout_writes,
+            xref=xref.with_suffix("").as_posix(),
+            start_counters=start_counters,
+            body=chunk.body,
+        ),
+    )
+
+
+def chunk_signature(chunk) -> str:
+    """Hash of everything that can change the chunk's PDF."""
+    job = chunk.job()
+    files = [job.root, job.root.with_name(f"{chunk.id}-xref.tex"), Path("preamble.tex")]
+    files += sorted(Path("bib").glob("*.bib"))
+    files += chunk.sources(Path("."))
+    if chunk.reads_toc:
+        files.append(COMBINED_TOC)
+    if JOB_ENV:
+        # cached figures: the shims name the current renders
+        files += sorted(SHIM_DIR.glob("*.tex"))
+    return fingerprint(files)
+
+
+# --------------------------------------------------------------------
+# Compilation
+# --------------------------------------------------------------------
+
+def compile_chunk(chunk, max_passes):
+    job = chunk.job()
+    mirror_bib(chunk.outdir)
+    try:
+        report = run_build(job, max_passes=max_passes)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        return chunk, None, e
+    return chunk, report, None
+
+
+def chunk_delta(entry):
+    """Counters a chunk consumed: its end minus the start it was compiled with.
+
+    Only valid while "start" is still the start of the last compile.
+    """
+    end, start = entry.get("end"), entry.get("start")
+    if not end or not start:
+        return None
+    return {k: end[k] - start[k] for k in COUNTERS}
+
+
+def run_rounds(chunks, jobs, max_passes, state):
+    documentclass = read_documentclass()
+
+    for round_no in range(1, MAX_ROUNDS + 1):
+        labels = global_labels(chunks)
+        write_combined_toc(chunks)
+
+        start = dict(INITIAL_COUNTERS)
+        stale = []
+        for c in chunks:
+            entry = state.setdefault(c.id, {})
+            write_chunk_root(c, documentclass, start, labels)
+            signature = chunk_signature(c)
+            if entry.get("signature") != signature or not c.job().out(".pdf").exists():
+                stale.append(c)
+            entry["signature"] = signature
+            delta = entry["delta"] if "delta" in entry else chunk_delta(entry)
+            entry["start"] = dict(start)
+            if delta:
+                # Add what this chunk itself consumed, not the absolute end
+                # it reached from an old start: every chunk's start is then
+                # right as soon as all chunks before it have been compiled once.
+                start = {k: start[k] + delta[k] for k in COUNTERS}
+            else:
+                # Unknown yet: guess one page, fixed in the next round.
+                start = dict(start, page=start["page"] + 1)
+
+        if not stale:
+            print(f"[parallel] Round {round_no}: all {len(chunks)} chunk(s) up to date.")
+            return True
+
+        print(f"[parallel] Round {round_no}: compiling {len(stale)} of {len(chunks)} chunk(s) on {jobs} worker(s)")
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(lambda c: compile_chunk(c, max_passes), stale))
+
+        failed = False
+        for chunk, report, error in results:
+            if error is not None:
+                failed = True
+                state[chunk.id].pop("signature", None)
+                print(f"[parallel] FAILED {chunk.id}: {error} (see {chunk.job().out('.log')})", file=sys.stderr)
+                continue
+            entry = state[chunk.id]
+            entry["end"] = read_layout(chunk.job())
+            entry["delta"] = chunk_delta(entry)
+            print(f"[parallel]   {chunk.id:<28} {len(report.passes)} pass(es), {report.total:.1f}s")
+        if failed:
+            return False
+
+    print(f"[WARN] Chunks still changing after {MAX_ROUNDS} rounds; merging anyway.", file=sys.stderr)
+    return True
+
+
+# --------------------------------------------------------------------
+# Merge
+# --------------------------------------------------------------------
+
+def _brace_group(text: str, i: int):
+    """Return (content, end) of the {...} group starting at text[i]."""
+    depth = 0
+    j = i
+    while j < len(text):
+        ch = text[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[i + 1:j], j + 1
+        j += 1
+    raise ValueError("unbalanced braces")
+
+
+def toc_bookmarks(chunk, start_page):
+    """(pdf page, level name, level number, heading) from a chunk's .toc."""
+    toc = chunk.job().out(".toc")
+    if not toc.exists():
+        return []
+    levels = {"section": 1, "subsection": 2}
+    marks = []
+    for line in toc.read_text(encoding="utf-8", errors="ignore").splitlines():
+        m = CONTENTSLINE_RE.match(line)
+        if not m:
+            continue
+        try:
+            level, i = _brace_group(line, m.end())
+            heading, i = _brace_group(line, i)
+            page, _ = _brace_group(line, i)
+        except ValueError:
+            continue
+        if level not in levels or not page.strip().isdigit():
+            continue
+        heading = NUMBERLINE_RE.sub(r"\1 ", heading).strip()
+        marks.append((int(page) - start_page + 1, level, levels[level], heading))
+    return marks
+
+
+def merge(chunks, state) -> Path:
+    includes = []
+    n = 0
+    for c in chunks:
+        pdf = c.job().out(".pdf")
+        if not pdf.exists():
+            continue
+        toc = []
+        for page, level, depth, heading in toc_bookmarks(c, state[c.id]["start"]["page"]):
+            n += 1
+            toc.append(f"{max(page, 1)},{level},{depth},{{{heading}}},oc-bm-{n}")
+        opts = "pages=-"
+        if toc:
+            opts += ",addtotoc={" + ",".join(toc) + "}"
+        includes.append(f"\\includepdf[{opts}]{{{pdf.as_posix()}}}")
+
+    outdir = PARALLEL_ROOT / "_merge"
+    outdir.mkdir(parents=True, exist_ok=True)
+    root = outdir / "merge.tex"
+    write_if_changed(
+        root,
+        MERGE_TEMPLATE.format(documentclass=read_documentclass(), includes="\n".join(includes)),
+    )
+    report = run_build(LatexJob(root=root, outdir=outdir, quiet=True), max_passes=3)
+    print(f"[parallel] Merged {len(includes)} chunk PDF(s) in {report.total:.1f}s")
+    return outdir / "merge.pdf"
+
+
+# --------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compile Core chunks in parallel and merge them into build/main.pdf"
+    )
+    parser.add_argument("--yaml", default=STRUCTURE_FILE, help="Structure YAML")
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of concurrent XeLaTeX jobs (default: all cores)",
+    )
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES)
+    parser.add_argument("--list", action="store_true", help="Only print the chunk plan")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Drop build/parallel/ and compile every chunk from scratch")
+    parser.add_argument("--figure-cache", action="store_true",
+                        help="Resolve \\input{figures/...} to the PDFs in build/figcache/")
+    args = parser.parse_args()
+
+    chunks = plan_chunks(load_structure(args.yaml))
+    if args.list:
+        for c in chunks:
+            print(f"{c.id:<28} {len(c.inputs)} input(s)")
+        return 0
+
+    if args.figure_cache:
+        JOB_ENV.update(texinputs_env())
+    if args.fresh and PARALLEL_ROOT.exists():
+        shutil.rmtree(PARALLEL_ROOT)
+    PARALLEL_ROOT.mkdir(parents=True, exist_ok=True)
+    try:
+        state = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {}
+
+    ok = run_rounds(chunks, max(1, args.jobs), args.max_passes, state)
+    STATE_FILE.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+    if not ok:
+        return 1
+
+    try:
+        merged = merge(chunks, state)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"[ERROR] Merge failed: {e}", file=sys.stderr)
+        return 1
+
+    shutil.copy2(merged, OUTPUT_PDF)
+    print(f"[parallel] Output PDF: {OUTPUT_PDF}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
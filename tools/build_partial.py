@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Partial build: compile one section / module subtree as a standalone PDF.
+
+Usage (from repo root):
+
+    python tools/build_partial.py cycles_master      # content/cycles/*
+    python tools/build_partial.py k7                 # a single K-level file
+    python tools/build_partial.py --list             # show available ids
+
+The section id is looked up in master_core_structure.yaml. The tool
+
+  1) collects the \input list of that subtree with the same DFS as
+     generate_auto_inputs.extract_tex_paths,
+  2) writes build/partial/<id>/<id>.tex: main.tex's \documentclass,
+     preamble.tex, the subtree's \input lines and a bibliography,
+  3) imports the \newlabel entries of the last full build
+     (build/main.aux) for labels defined OUTSIDE the subtree, so \ref's
+     into the rest of the book still resolve,
+  4) compiles it with the fixed-point driver (tools/run_latex.py),
+     optionally (--format) on top of the dumped preamble format.
+
+Output: build/partial/<id>/<id>.pdf
+"""
+
+import argparse
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from core_io import write_if_changed
+from latex_scan import iter_commands
+from core_structure import STRUCTURE_FILE, load_structure
+from generate_auto_inputs import extract_tex_paths
+from preamble_format import ensure_format, job_options, preamble_block
+from run_latex import DEFAULT_MAX_PASSES, LatexJob, run_build
+
+ENTRYPOINT = Path("main.tex")
+FULL_AUX = Path("build") / "main.aux"
+PARTIAL_ROOT = Path("build") / "partial"
+
+DOCUMENTCLASS_RE = re.compile(r"^\s*\\documentclass.*$", re.MULTILINE)
+NEWLABEL_RE = re.compile(r"^\\newlabel\{([^}]+)\}")
+
+ROOT_TEMPLATE = r"""% ==========================================
+%  Auto-generated by tools/build_partial.py
+%  Partial build of: {node_id}
+%  DO NOT EDIT THIS FILE MANUALLY
+% ==========================================
+{documentclass}
+{preamble}
+
+\begin{{document}}
+
+% Cross-reference targets from the last full build (outside this subtree)
+\makeatletter
+\input{{{xref}}}
+\makeatother
+
+{inputs}
+
+\clearpage
+\printbibliography[heading=bibintoc,title={{References}}]
+
+\end{{document}}
+"""
+
+
+def read_documentclass() -> str:
+    text = ENTRYPOINT.read_text(encoding="utf-8")
+    m = DOCUMENTCLASS_RE.search(text)
+    if not m:
+        raise SystemExit(f"{ENTRYPOINT}: kein \\documentclass gefunden.")
+    return m.group(0).strip()
+
+
+def collect_local_labels(paths) -> set:
+    """Labels defined inside the subtree (they come from the partial's own .aux)."""
+    labels = set()
+    for p in paths:
+        path = Path(p)
+        if not path.is_file():
+            continue
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        labels.update(cmd.arg.strip() for cmd in iter_commands(text, {"label"}))
+    return labels
+
+
+def read_newlabels(aux_path: Path):
+    r"""Return the \newlabel lines of an .aux file (empty if missing)."""
+    if not aux_path.exists():
+        return []
+    text = aux_path.read_text(encoding="utf-8", errors="ignore")
+    return [line for line in text.splitlines() if NEWLABEL_RE.match(line)]
+
+
+def write_external_labels(out_path: Path, local_labels, newlabels=None) -> int:
+    r"""
+    Copy \newlabel lines (default: those of the last full build), minus
+    the subtree's own labels and their cleveref '@cref' twins. Returns the
+    number of labels written.
+    """
+    if newlabels is None:
+        newlabels = read_newlabels(FULL_AUX)
+    lines = ["% External labels imported from a previous build"]
+    for line in newlabels:
+        name = NEWLABEL_RE.match(line).group(1)
+        base = name[:-5] if name.endswith("@cref") else name
+        if base in local_labels:
+            continue
+        lines.append(line)
+    write_if_changed(out_path, "\n".join(lines) + "\n")
+    return len(lines) - 1
+
+
+def mirror_bib(outdir: Path) -> None:
+    """Same mirroring as build_core.sh, so biber finds bib/*.bib."""
+    bib_dir = outdir / "bib"
+    bib_dir.mkdir(parents=True, exist_ok=True)
+    for bib in Path("bib").glob("*.bib"):
+        shutil.copy2(bib, bib_dir / bib.name)
+
+
+def generate_root(node_id: str, paths, outdir: Path, use_format: bool = False) -> Path:
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    xref = outdir / f"{node_id}-xref.tex"
+    imported = write_external_labels(xref, collect_local_labels(paths))
+    if not FULL_AUX.exists():
+        print(f"[partial] WARNING: {FULL_AUX} not found — refs outside the subtree stay undefined.")
+    else:
+        print(f"[partial] Imported {imported} external label(s) from {FULL_AUX}")
+
+    inputs = "\n".join(f"\\input{{{p}}}" for p in paths)
+    root = outdir / f"{node_id}.tex"
+    write_if_changed(
+        root,
+        ROOT_TEMPLATE.format(
+            node_id=node_id,
+            documentclass=read_documentclass(),
+            preamble=preamble_block() if use_format else "\\input{preamble}",
+            xref=xref.with_suffix("").as_posix(),
+            inputs=inputs,
+        ),
+    )
+    return root
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compile one section/module subtree of the Core as a standalone PDF"
+    )
+    parser.add_argument("section", nargs="?", help="Section id from the structure YAML")
+    parser.add_argument("--yaml", default=STRUCTURE_FILE, help="Structure YAML")
+    parser.add_argument("--list", action="store_true", help="List available section ids")
+    parser.add_argument(
+        "--no-compile",
+        action="store_true",
+        help="Only generate the root .tex, do not run XeLaTeX",
+    )
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES)
+    parser.add_argument(
+        "--format",
+        action="store_true",
+        help="Load the precompiled preamble format (tools/preamble_format.py)",
+    )
+    args = parser.parse_args()
+
+    structure = load_structure(args.yaml)
+
+    if args.list or not args.section:
+        for node in structure.iter_nodes():
+            if node.id:
+                print(f"{'  ' * node.level}{node.id:<30} {node.path or ''}")
+        return 0 if args.list else 2
+
+    node = structure.find(args.section)
+    if node is None:
+        print(f"[ERROR] Unknown section id: {args.section} (see --list)", file=sys.stderr)
+        return 2
+
+    paths = extract_tex_paths(structure, nodes=[node])
+    outdir = PARTIAL_ROOT / args.section
+    root = generate_root(args.section, paths, outdir, use_format=args.format)
+    print(f"[partial] {args.section}: {len(paths)} file(s) → {root}")
+
+    if args.no_compile:
+        return 0
+
+    mirror_bib(outdir)
+    try:
+        options = {}
+        if args.format:
+            ensure_format()
+            options = job_options()
+        job = LatexJob(root=root, outdir=outdir, jobname=args.section, **options)
+        report = run_build(job, max_passes=args.max_passes)
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] {e.cmd[0]} failed with exit code {e.returncode}", file=sys.stderr)
+        return e.returncode or 1
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e.filename} not found in PATH", file=sys.stderr)
+        return 127
+
+    print(report.summary())
+    print(f"[partial] Output PDF: {job.out('.pdf')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Build profiling: wall time, CPU time and peak RSS per stage and per pass.
+
+./build_core.sh --profile exports CORE_PROFILE=1 and runs every stage
+through `build_profile.py run NAME -- cmd ...`, which measures the child
+with wait4() (wall, user+sys CPU, peak RSS) and appends one event to
+build/profile/events.jsonl. tools/run_latex.py adds an event per XeLaTeX
+pass and biber run; during a pass it streams the engine's output through
+latex_log.LogAnalyzer, so every \input'ed file gets its page span and
+the time TeX spent inside it.
+
+`build_profile.py report` turns the events into
+
+  build/profile_trace.json   Chrome trace-event format (chrome://tracing,
+                             https://ui.perfetto.dev): stages, passes and
+                             nested files on separate tracks
+  build/profile_summary.txt  stage/pass table and the heaviest files of
+                             the last pass (self time, pages)
+
+Usage (from repo root):
+
+    ./build_core.sh --profile
+    python tools/build_profile.py start                  # truncate events
+    python tools/build_profile.py run fix_math -- python tools/fix_math_in_headings.py
+    python tools/build_profile.py report [--top 25]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from core_io import write_if_changed
+
+PROFILE_ENV = "CORE_PROFILE"
+EVENTS_FILE = Path("build") / "profile" / "events.jsonl"
+TRACE_FILE = Path("build") / "profile_trace.json"
+SUMMARY_FILE = Path("build") / "profile_summary.txt"
+
+DEFAULT_TOP = 25
+
+# Chrome trace: one track (tid) per category.
+TRACKS = {"stage": 1, "pass": 2, "file": 3}
+
+
+class Measurement:
+    """Resources used by one child process."""
+
+    __slots__ = ("returncode", "start", "wall", "cpu", "maxrss_kb")
+
+    def __init__(self, returncode, start, wall, cpu=None, maxrss_kb=None):
+        self.returncode = returncode
+        self.start = start          # epoch seconds (comparable across processes)
+        self.wall = wall
+        self.cpu = cpu              # user + system seconds
+        self.maxrss_kb = maxrss_kb  # peak resident set size (Linux: KiB)
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV) == "1"
+
+
+def measure(cmd, cwd=None, env=None, quiet=False, on_line=None) -> Measurement:
+    """
+    Run cmd and measure it. With on_line, stdout is read line by line and
+    on_line(line, epoch_time) is called for each (the line is still echoed
+    unless quiet).
+    """
+    if on_line is not None:
+        stdout = subprocess.PIPE
+    else:
+        stdout = subprocess.DEVNULL if quiet else None
+    start = time.time()
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=stdout)
+    if on_line is not None:
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace")
+            if not quiet:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            on_line(line, time.time())
+        proc.stdout.close()
+
+    cpu = maxrss = None
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        cpu = usage.ru_utime + usage.ru_stime
+        maxrss = usage.ru_maxrss
+    else:
+        proc.wait()
+    return Measurement(proc.returncode, start, time.perf_counter() - started, cpu, maxrss)
+
+
+# --------------------------------------------------------------------
+# Events
+# --------------------------------------------------------------------
+
+def record(name, cat, m: Measurement, **args) -> None:
+    """Append one event (no-op unless profiling is enabled)."""
+    if not profiling_enabled():
+        return
+    event = {
+        "name": name,
+        "cat": cat,
+        "start": m.start,
+        "wall": m.wall,
+        "cpu": m.cpu,
+        "maxrss_kb": m.maxrss_kb,
+        "args": args,
+    }
+    EVENTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with EVENTS_FILE.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def record_files(spans, **args) -> None:
+    """One "file" event per FileSpan with timestamps (see latex_log.py)."""
+    for span in spans:
+        if span.elapsed is None or span.path.startswith("/"):
+            continue
+        record(
+            span.path,
+            "file",
+            Measurement(0, span.start, span.elapsed),
+            first_page=span.first_page,
+            last_page=span.last_page,
+            depth=span.depth,
+            self_time=span.self_time,
+            **args,
+        )
+
+
+def load_events(path: Path = EVENTS_FILE):
+    events = []
+    try:
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+
+# --------------------------------------------------------------------
+# Output
+# --------------------------------------------------------------------
+
+def chrome_trace(events):
+    """Chrome trace-event JSON ("X" complete events, microseconds)."""
+    t0 = min((e["start"] for e in events), default=0.0)
+    trace = [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": cat}}
+        for cat, tid in TRACKS.items()
+    ]
+    for e in events:
+        args = dict(e.get("args") or {})
+        if e.get("cpu") is not None:
+            args["cpu_s"] = round(e["cpu"], 3)
+        if e.get("maxrss_kb") is not None:
+            args["peak_rss_mb"] = round(e["maxrss_kb"] / 1024, 1)
+        trace.append({
+            "name": e["name"],
+            "cat": e["cat"],
+            "ph": "X",
+            "pid": 1,
+            "tid": TRACKS.get(e["cat"], 0),
+            "ts": round((e["start"] - t0) * 1e6),
+            "dur": round(e["wall"] * 1e6),
+            "args": args,
+        })
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def _fmt_row(e) -> str:
+    cpu = f"{e['cpu']:8.2f}s" if e.get("cpu") is not None else f"{'-':>9}"
+    rss = f"{e['maxrss_kb'] / 1024:8.1f} MB" if e.get("maxrss_kb") is not None else f"{'-':>11}"
+    return f"  {e['name']:<32} {e['wall']:8.2f}s {cpu} {rss}"
+
+
+def summary(events, top: int = DEFAULT_TOP) -> str:
+    stages = [e for e in events if e["cat"] == "stage"]
+    passes = [e for e in events if e["cat"] == "pass"]
+    files = [e for e in events if e["cat"] == "file"]
+
+    header = f"  {'':<32} {'wall':>9} {'cpu':>9} {'peak RSS':>11}"
+    lines = ["Build profile", ""]
+    if stages:
+        lines += ["Stages", header]
+        lines += [_fmt_row(e) for e in stages]
+        lines.append(f"  {'total':<32} {sum(e['wall'] for e in stages):8.2f}s")
+        lines.append("")
+    if passes:
+        lines += ["XeLaTeX / biber", header]
+        lines += [_fmt_row(e) for e in passes]
+        lines.append("")
+    if files:
+        # The last XeLaTeX pass is the representative one.
+        newest = max(files, key=lambda e: e["start"])["args"]
+        last = (newest.get("job"), newest.get("pass", 0))
+        latest = [e for e in files if (e["args"].get("job"), e["args"].get("pass", 0)) == last]
+        latest.sort(key=lambda e: e["args"].get("self_time") or 0.0, reverse=True)
+        lines.append(f"Heaviest files (job {last[0]}, pass {last[1]}, self time)")
+        lines.append(f"  {'':<56} {'self':>8} {'incl.':>8}  pages")
+        for e in latest[:top]:
+            a = e["args"]
+            pages = f"{a['first_page']}-{a['last_page']}"
+            lines.append(
+                f"  {e['name']:<56} {a.get('self_time') or 0.0:7.2f}s {e['wall']:7.2f}s  {pages}"
+            )
+        lines.append("")
+    if len(lines) == 2:
+        lines.append(f"(no events in {EVENTS_FILE})")
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------
+
+def cmd_start(args) -> int:
+    EVENTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    EVENTS_FILE.write_text("", encoding="utf-8")
+    return 0
+
+
+def cmd_run(args) -> int:
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        print("[profile] run: no command given", file=sys.stderr)
+        return 2
+    os.environ[PROFILE_ENV] = "1"         # children record their passes too
+    try:
+        m = measure(cmd)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e.filename} not found in PATH", file=sys.stderr)
+        return 127
+    record(args.name, "stage", m, returncode=m.returncode)
+    return m.returncode
+
+
+def cmd_report(args) -> int:
+    events = load_events()
+    write_if_changed(TRACE_FILE, json.dumps(chrome_trace(events)) + "\n")
+    text = summary(events, args.top)
+    write_if_changed(SUMMARY_FILE, text)
+    print(text, end="")
+    print(f"[profile] {len(events)} event(s) → {TRACE_FILE}, {SUMMARY_FILE}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-stage/per-pass build profiling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("start", help="Start a new profile (truncate the event log)")
+
+    run = sub.add_parser("run", help="Run and measure one stage")
+    run.add_argument("name", help="Stage name shown in the report")
+    run.add_argument("cmd", nargs=argparse.REMAINDER, help="-- command ...")
+
+    report = sub.add_parser("report", help="Write the Chrome trace and the text summary")
+    report.add_argument("--top", type=int, default=DEFAULT_TOP, help="Files listed in the summary")
+
+    args = parser.parse_args()
+    return {"start": cmd_start, "run": cmd_run, "report": cmd_report}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
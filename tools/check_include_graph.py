@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Include-graph validator: check the \input/\include DAG before running XeLaTeX.
+
+The build follows main.tex through content/_auto_core_inputs.tex, the
+hand-written masters, appendix/ and the TikZ sources in figures/. Mistakes
+in that graph only show up late (TeX recursion limits, duplicated
+sections, "File ... not found" in the middle of a pass) or not at all (a
+file that is never typeset). This tool builds the real graph from the
+shared .tex index (tools/tex_index.py; \input inside verbatim is not an
+edge) and reports:
+
+  missing      \input targets that resolve to no file
+  cycles       include cycles (a file that ends up including itself)
+  double       files included from more than one place
+  unreachable  .tex files under content/, appendix/ and figures/ that are
+               not reachable from main.tex (content/placeholders/ holds
+               templates and is ignored)
+  leftovers    editor/backup files (*.bak, *.bak2, *~, *.orig, ...) in
+               those directories
+
+The full report (graph + findings) is written as JSON, by default to
+build/include_graph.json; diagnostics are printed as file:line.
+
+Exit code: 0 if the graph is clean, 1 otherwise (for CI gating).
+
+Usage (from repo root):
+
+    python tools/check_include_graph.py
+    python tools/check_include_graph.py --json - --quiet
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from build_manifest import ENTRYPOINT
+from core_io import write_if_changed
+from latex_scan import resolve_tex
+from tex_index import load_index
+
+REPORT_FILE = Path("build") / "include_graph.json"
+REPORT_VERSION = 1
+
+SOURCE_DIRS = ("content", "appendix", "figures")
+IGNORED_UNREACHABLE = ("content/placeholders/",)
+LEFTOVER_RE = re.compile(r"(\.bak\d*|\.orig|\.rej|\.old|~)$|^#.*#$|^\.#")
+
+
+def build_graph(index, root: Path):
+    """Return (edges, missing): edges are (source, line, target) in file order."""
+    edges = []
+    missing = []
+    for path, e in index.iter_entries("input"):
+        target = resolve_tex(e.arg, root)
+        if target is None:
+            missing.append({"file": path, "line": e.line, "target": e.arg})
+        else:
+            edges.append((path, e.line, target.relative_to(root).as_posix()))
+    return edges, missing
+
+
+def find_cycles(start: str, children):
+    """Cycles reachable from start (iterative DFS, white/grey/black)."""
+    GREY, BLACK = 1, 2
+    color = {start: GREY}
+    path = [start]
+    stack = [iter(children.get(start, ()))]
+    cycles = []
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            color[path.pop()] = BLACK
+            continue
+        state = color.get(child)
+        if state == GREY:
+            cycles.append(path[path.index(child):] + [child])
+        elif state is None:
+            color[child] = GREY
+            path.append(child)
+            stack.append(iter(children.get(child, ())))
+    return cycles
+
+
+def find_leftovers(root: Path):
+    found = []
+    for top in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(root / top):
+            for name in filenames:
+                if LEFTOVER_RE.search(name):
+                    found.append((Path(dirpath) / name).relative_to(root).as_posix())
+    return sorted(found)
+
+
+def check(index, entry: str = ENTRYPOINT, root=Path(".")):
+    """Return the report dict (see module docstring)."""
+    edges, missing = build_graph(index, root)
+    reachable = index.reachable([entry], root)
+    reached = set(reachable)
+
+    children = {}
+    sites = {}
+    for source, line, target in edges:
+        if source not in reached:
+            continue
+        children.setdefault(source, []).append(target)
+        sites.setdefault(target, []).append({"file": source, "line": line})
+
+    start = resolve_tex(entry, root)
+    start = start.relative_to(root).as_posix() if start is not None else entry
+    cycles = find_cycles(start, children) if start in reached else []
+
+    unreachable = sorted(
+        p for p in index.files
+        if p.startswith(tuple(d + "/" for d in SOURCE_DIRS))
+        and p not in reached
+        and not p.startswith(IGNORED_UNREACHABLE)
+    )
+
+    report = {
+        "version": REPORT_VERSION,
+        "entry": start,
+        "files": reachable,
+        "edges": [{"file": s, "line": l, "target": t} for s, l, t in edges if s in reached],
+        "missing": [m for m in missing if m["file"] in reached],
+        "cycles": cycles,
+        "double": {t: s for t, s in sorted(sites.items()) if len(s) > 1},
+        "unreachable": unreachable,
+        "leftovers": find_leftovers(root),
+    }
+    if start not in reached:
+        report["missing"].insert(0, {"file": None, "line": None, "target": entry})
+    report["ok"] = not any(
+        report[k] for k in ("missing", "cycles", "double", "unreachable", "leftovers")
+    )
+    return report
+
+
+def print_report(report) -> None:
+    for m in report["missing"]:
+        where = f"{m['file']}:{m['line']}" if m["file"] else "[include-graph]"
+        print(f"{where}: missing include target '{m['target']}'")
+    for cycle in report["cycles"]:
+        print(f"[include-graph] cycle: {' -> '.join(cycle)}")
+    for target, sites in report["double"].items():
+        for s in sites:
+            print(f"{s['file']}:{s['line']}: '{target}' is included {len(sites)} times")
+    for path in report["unreachable"]:
+        print(f"{path}: not reachable from {report['entry']}")
+    for path in report["leftovers"]:
+        print(f"{path}: leftover backup file")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Validate the \\input/\\include graph reachable from main.tex"
+    )
+    parser.add_argument("--entry", default=ENTRYPOINT, help=f"Root file (default: {ENTRYPOINT})")
+    parser.add_argument(
+        "--json",
+        default=str(REPORT_FILE),
+        metavar="PATH",
+        help=f"Write the JSON report here ('-' for stdout, default: {REPORT_FILE})",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary line")
+    args = parser.parse_args()
+
+    report = check(load_index(), args.entry)
+    text = json.dumps(report, indent=1) + "\n"
+    if args.json == "-":
+        sys.stdout.write(text)
+    else:
+        write_if_changed(args.json, text)
+
+    if not args.quiet and args.json != "-":
+        print_report(report)
+    counts = ", ".join(
+        f"{len(report[k])} {k}"
+        for k in ("missing", "cycles", "double", "unreachable", "leftovers")
+    )
+    out = sys.stderr if args.json == "-" else sys.stdout
+    status = "OK" if report["ok"] else "issues found"
+    print(f"[include-graph] {len(report['files'])} file(s) reachable; {counts} — {status}.", file=out)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
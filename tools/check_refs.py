@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Cross-reference checker: resolve every \ref before running XeLaTeX.
+
+Broken \ref{sec:...}, \ref{tab:...}, \ref{thm:...} targets otherwise only
+show up as "Reference ... undefined" warnings after a full build. This
+tool works on the shared .tex index (tools/tex_index.py):
+
+  1) collects the files reachable from main.tex and appendix/*.tex via
+     \input/\include,
+  2) builds a label → definition table of those files,
+  3) resolves every \ref / \eqref / \autoref / \pageref / \nameref /
+     \cref / \Cref in them against that table.
+
+Diagnostics are printed as file:line so editors can jump to them:
+
+  content/toe/toe_k2:39: undefined reference 'tab:toe-k2-...'
+  content/x.tex:12: reference 'sec:y' points to unreachable file content/y.tex:3
+
+Exit code: 0 if every reference resolves, 1 otherwise.
+
+Usage (from repo root):
+
+    python tools/check_refs.py
+    python tools/check_refs.py --entry main.tex --entry appendix/toe_data.tex
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from tex_index import load_index
+
+DEFAULT_ENTRIES = ("main.tex",)
+APPENDIX_DIR = Path("appendix")
+
+
+def default_entries():
+    return list(DEFAULT_ENTRIES) + sorted(p.as_posix() for p in APPENDIX_DIR.glob("*.tex"))
+
+
+def check(index, entries):
+    """Return (problems, number of refs); problems are (path, line, message)."""
+    reachable = index.reachable(entries)
+
+    defined = {}
+    for path, e in index.iter_entries("label", reachable):
+        defined.setdefault(e.arg, (path, e.line))
+    everywhere = index.labels()
+
+    problems = []
+    refs = 0
+    for path, e in index.iter_entries("ref", reachable):
+        refs += 1
+        if e.arg in defined:
+            continue
+        elsewhere = everywhere.get(e.arg)
+        if elsewhere:
+            where, line = elsewhere[0]
+            msg = f"reference '{e.arg}' points to unreachable file {where}:{line}"
+        else:
+            msg = f"undefined reference '{e.arg}'"
+        problems.append((path, e.line, msg))
+    return problems, refs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Resolve all \\ref targets against the labels reachable from main.tex"
+    )
+    parser.add_argument(
+        "--entry",
+        action="append",
+        help="Entry point(s) for reachability (default: main.tex + appendix/*.tex)",
+    )
+    args = parser.parse_args()
+
+    index = load_index()
+    entries = args.entry or default_entries()
+    problems, refs = check(index, entries)
+
+    for path, line, msg in problems:
+        print(f"{path}:{line}: {msg}")
+
+    if problems:
+        print(f"[refs] {len(problems)} of {refs} reference(s) do not resolve.")
+        return 1
+    print(f"[refs] All {refs} reference(s) resolve.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Write-avoidance for generated files.
+
+Generators render their output to memory and hand it to
+write_if_changed(). The file is only replaced when its content differs
+(SHA-256 of old vs. new bytes), so unchanged outputs keep their mtime
+and make/latexmk-style up-to-date checks downstream stay cheap. Writes go
+to a temp file in the target directory followed by os.replace(), so a
+concurrent reader (or a second build) never sees a half-written file.
+
+Every call is counted in a WriteStats object (by default the module-wide
+STATS), so a tool can end with a one-line summary:
+
+    from core_io import STATS, write_if_changed
+
+    write_if_changed(out_path, text)
+    print(STATS.summary("[inputs]"))
+    # [inputs] 1 file(s) written, 0 unchanged
+
+Outputs too large to render to memory first are streamed through
+atomic_open() instead: same temp file + rename, but always replaced.
+"""
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# Mode for newly created files (tempfile.mkstemp would use 0600).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+class WriteStats:
+    """Counts of files written vs. left untouched."""
+
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+
+    def summary(self, tag: str) -> str:
+        return f"{tag} {len(self.written)} file(s) written, {len(self.unchanged)} unchanged"
+
+
+STATS = WriteStats()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_bytes_if_changed(path, data: bytes, stats: WriteStats = STATS) -> bool:
+    """Atomically replace `path` with `data` unless it already holds it."""
+    path = Path(path)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        st = None
+    if st is not None and st.st_size == len(data) and _digest(path.read_bytes()) == _digest(data):
+        stats.unchanged.append(path)
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, (st.st_mode & 0o7777) if st is not None else NEW_FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    stats.written.append(path)
+    return True
+
+
+def write_if_changed(path, text: str, encoding: str = "utf-8", stats: WriteStats = STATS) -> bool:
+    """Text variant of write_bytes_if_changed(). Returns True if written."""
+    return write_bytes_if_changed(path, text.encode(encoding), stats)
+
+
+@contextmanager
+def atomic_open(path, encoding: str = "utf-8"):
+    """
+    Text file handle for streaming `path`; the file is replaced on a clean
+    exit only, an exception leaves the previous version in place.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            yield f
+        os.chmod(tmp, NEW_FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
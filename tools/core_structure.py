@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Shared loader for master_core_structure.yaml.
+
+All tools/ scripts used to call yaml.safe_load on the structure file and
+walk the result with their own extract_root_nodes / iter_children /
+flatten_paths variants. This module parses the YAML once into a compact
+node tree and keeps a pickled copy of it under build/.cache/, keyed on
+the YAML's mtime, size and SHA-256, so every build_core.sh step reuses
+the same parsed structure.
+
+Usage from another script in tools/:
+
+    from core_structure import load_structure
+
+    structure = load_structure("master_core_structure.yaml")
+    for node in structure.iter_nodes():
+        print(node.level, node.id, node.path)
+
+    paths = structure.tex_paths()      # DFS order, deduplicated
+
+Supported YAML shapes (tolerant, same as the historical tools):
+
+1) Core 1.1 schema (recommended):
+
+root:
+  entrypoint: main.tex
+sections:
+  - id: intro
+    path: content/01_intro.tex
+  - id: modules_master
+    path: content/16_modules_master.tex
+    children:
+      - id: k_levels_master
+        path: content/k_levels/klevels_master.tex
+        children: [...]
+
+2) Legacy examples:
+
+- top-level list of paths or nodes
+- dict with keys: root / sections / nodes / chapters / toc / content
+- dict-of-dicts: {Title: {file: ..., children: [...]}, ...}
+
+Each node may contain:
+  - path or file: path to .tex
+  - title / id: optional metadata
+  - children / subsections / nodes / sections: optional nested nodes
+
+Range/template nodes
+--------------------
+
+Instead of listing every K-file by hand, a list entry may be a template
+that expands to one node per value of a range variable:
+
+    children:
+      - pattern: content/cycles/cycles_k{k}.tex
+        k: 0..12                       # inclusive; a YAML list also works
+      - pattern: content/crossk/crossk_k{k}_k{k+1}.tex
+        k: 0..11
+
+Placeholders are {var}, {var+N} and {var-N}; they may appear in
+pattern, id and title. id defaults to the file name without extension
+(cycles_k3, crossk_k3_k4, ...). Several range variables expand as their
+product, in key order. Expansion happens while the tree is built, so
+all tools see ordinary nodes.
+
+Errors are raised as StructureError (EmptyStructure for an empty YAML).
+Both derive from SystemExit, so a tool that does not catch them still
+stops with the message; validate_core_structure.py catches them.
+"""
+
+import hashlib
+import itertools
+import os
+import pickle
+import re
+import sys
+from pathlib import Path
+
+try:
+    import yaml
+except ImportError:
+    print("[ERROR] PyYAML is required: pip install pyyaml", file=sys.stderr)
+    sys.exit(1)
+
+
+STRUCTURE_FILE = "master_core_structure.yaml"
+
+# Cache lives next to the YAML, inside the (git-ignored) build directory.
+CACHE_DIR = Path("build") / ".cache"
+
+# Bump whenever StructureNode / CoreStructure change shape.
+CACHE_VERSION = 2
+
+CHILD_KEYS = ("children", "subsections", "nodes", "sections")
+
+# Keys of a template node that are not range variables.
+TEMPLATE_KEYS = {"pattern", "id", "title", "path", "file"} | set(CHILD_KEYS)
+
+
+class StructureError(SystemExit):
+    """The structure YAML cannot be turned into a node tree."""
+
+
+class EmptyStructure(StructureError):
+    """The structure YAML is empty (no document at all)."""
+
+
+RANGE_RE = re.compile(r"^\s*(-?\d+)\s*\.\.\s*(-?\d+)\s*$")
+PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_]\w*)\s*(?:([+-])\s*(\d+))?\s*\}")
+
+
+# --------------------------------------------------------------------
+# Node tree
+# --------------------------------------------------------------------
+
+class StructureNode:
+    """One entry of the structure tree (a section, module or K-file)."""
+
+    __slots__ = ("id", "path", "title", "level", "parent", "children")
+
+    def __init__(self, node_id=None, path=None, title=None, level=0, parent=None):
+        self.id = node_id
+        self.path = path
+        self.title = title
+        self.level = level
+        self.parent = parent
+        self.children = []
+
+    def iter_subtree(self):
+        """Yield this node and all descendants in DFS (document) order."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def __repr__(self):
+        return f"StructureNode(id={self.id!r}, path={self.path!r}, level={self.level})"
+
+
+class CoreStructure:
+    """Parsed structure: raw YAML data plus the typed node tree."""
+
+    __slots__ = ("source", "digest", "data", "roots", "_by_id")
+
+    def __init__(self, source, digest, data, roots):
+        self.source = source
+        self.digest = digest
+        self.data = data
+        self.roots = roots
+        self._by_id = None
+
+    def iter_nodes(self):
+        """Yield every node of the tree in DFS (document) order."""
+        for root in self.roots:
+            yield from root.iter_subtree()
+
+    def find(self, node_id):
+        """Return the node with the given id, or None."""
+        if self._by_id is None:
+            self._by_id = {}
+            for node in self.iter_nodes():
+                if node.id is not None:
+                    self._by_id.setdefault(node.id, node)
+        return self._by_id.get(node_id)
+
+    def tex_paths(self, nodes=None):
+        """
+        Collect .tex paths in DFS order, normalized to forward slashes and
+        deduplicated while preserving order.
+
+        `nodes` restricts the walk to the given subtrees (default: all roots).
+        """
+        uniq = []
+        seen = set()
+        for root in self.roots if nodes is None else nodes:
+            for node in root.iter_subtree():
+                if not node.path:
+                    continue
+                if node.path in seen:
+                    continue
+                seen.add(node.path)
+                uniq.append(node.path)
+        return uniq
+
+
+# --------------------------------------------------------------------
+# YAML extractors
+# --------------------------------------------------------------------
+
+def extract_root_nodes(data):
+    """
+    Extract the top-level list of nodes from various wrapper schemes.
+
+    Supports:
+      - top-level list
+      - {root: {sections: [...]}}
+      - {sections: [...]}
+      - {root: [...]}
+      - {nodes|chapters|toc|content: [...]}
+      - first list-of-dicts in values
+      - dict-of-dicts fallback
+    """
+    # 1) Direct list
+    if isinstance(data, list):
+        return data
+
+    if isinstance(data, dict):
+        # Core 1.1 schema: root: {entrypoint: ..., sections: [...]}
+        root = data.get("root")
+        if isinstance(root, dict) and isinstance(root.get("sections"), list):
+            return root["sections"]
+
+        # Simple wrapper: sections: [...]
+        if isinstance(data.get("sections"), list):
+            return data["sections"]
+
+        # Legacy: root: [...]
+        if isinstance(root, list):
+            return root
+
+        # Legacy: other typical keys
+        for key in ("nodes", "chapters", "toc", "content"):
+            value = data.get(key)
+            if isinstance(value, list):
+                return value
+
+        # Fallback: first list-of-dicts
+        for value in data.values():
+            if isinstance(value, list) and (not value or isinstance(value[0], dict)):
+                return value
+
+        # Ultimate fallback: dict-of-dicts → list of nodes
+        nodes = []
+        for key, value in data.items():
+            node = {"title": str(key)}
+            if isinstance(value, dict):
+                node.update(value)
+            nodes.append(node)
+        return nodes
+
+    raise StructureError(
+        "Не могу понять структуру YAML даже после всех попыток. "
+        "Ожидал list или dict с вложенными нодами."
+    )
+
+
+def iter_children(node):
+    """
+    Return list of children for a raw YAML node.
+
+    Supports keys:
+      - children
+      - subsections
+      - nodes
+      - sections
+    """
+    if not isinstance(node, dict):
+        return []
+    for key in CHILD_KEYS:
+        value = node.get(key)
+        if isinstance(value, list):
+            return value
+    return []
+
+
+def _normalize_path(path):
+    return str(path).replace("\\", "/")
+
+
+def parse_range(value):
+    """'0..12' → [0, ..., 12] (inclusive); a list is taken as-is."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, int):
+        return [value]
+    m = RANGE_RE.match(str(value))
+    if not m:
+        raise StructureError(f"Ungültiger Bereich im Template: {value!r} (erwartet z.B. 0..12)")
+    start, stop = int(m.group(1)), int(m.group(2))
+    step = 1 if stop >= start else -1
+    return list(range(start, stop + step, step))
+
+
+def fill_template(text, values):
+    """Substitute {k}, {k+1}, {k-1}, ... with the given variable values."""
+    def repl(m):
+        name, sign, offset = m.group(1), m.group(2), m.group(3)
+        if name not in values:
+            raise StructureError(f"Unbekannte Template-Variable {{{name}}} in {text!r}")
+        value = values[name]
+        if sign:
+            value = value + int(offset) if sign == "+" else value - int(offset)
+        return str(value)
+
+    return PLACEHOLDER_RE.sub(repl, str(text))
+
+
+def expand_template(item):
+    """
+    Yield plain node dicts for a template node ({pattern: ..., k: 0..12}),
+    one per combination of its range variables.
+    """
+    variables = [k for k in item if k not in TEMPLATE_KEYS]
+    ranges = [parse_range(item[k]) for k in variables]
+    for combo in itertools.product(*ranges):
+        values = dict(zip(variables, combo))
+        path = fill_template(item["pattern"], values)
+        node = {
+            "id": (
+                fill_template(item["id"], values)
+                if item.get("id")
+                else os.path.splitext(os.path.basename(path))[0]
+            ),
+            "path": path,
+        }
+        if item.get("title"):
+            node["title"] = fill_template(item["title"], values)
+        for key in CHILD_KEYS:
+            if isinstance(item.get(key), list):
+                node[key] = item[key]
+                break
+        yield node
+
+
+def iter_items(items):
+    """Raw YAML list entries with template nodes expanded lazily."""
+    for item in items:
+        if isinstance(item, dict) and "pattern" in item:
+            yield from expand_template(item)
+        else:
+            yield item
+
+
+def build_tree(items, level=0, parent=None):
+    """
+    Convert raw YAML nodes into StructureNode objects.
+
+    Plain strings are treated as bare paths; anything that is neither a
+    string nor a dict is skipped, like the historical walkers did.
+    """
+    result = []
+    for item in iter_items(items):
+        if isinstance(item, str):
+            result.append(StructureNode(path=_normalize_path(item), level=level, parent=parent))
+            continue
+        if not isinstance(item, dict):
+            continue
+
+        path = item.get("path") or item.get("file")
+        node = StructureNode(
+            node_id=item.get("id"),
+            path=_normalize_path(path) if path else None,
+            title=item.get("title"),
+            level=level,
+            parent=parent,
+        )
+        node.children = build_tree(iter_children(item), level + 1, node)
+        result.append(node)
+    return result
+
+
+def parse_structure(data, source=None, digest=None):
+    """Build a CoreStructure from already-loaded YAML data."""
+    if data is None:
+        raise EmptyStructure("YAML пустой. Ожидал структуру секций.")
+    roots = build_tree(extract_root_nodes(data))
+    return CoreStructure(source, digest, data, roots)
+
+
+# --------------------------------------------------------------------
+# Cached loader
+# --------------------------------------------------------------------
+
+def _cache_path(yaml_path: Path) -> Path:
+    key = hashlib.sha1(str(yaml_path).encode("utf-8")).hexdigest()[:16]
+    return yaml_path.parent / CACHE_DIR / f"structure-{key}.pickle"
+
+
+def _read_cache(cache_path: Path):
+    try:
+        with cache_path.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return None
+
+
+def _write_cache(cache_path: Path, payload) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except OSError as e:
+        # A read-only checkout must still build; the cache is optional.
+        print(f"[structure] WARNING: cannot write cache {cache_path}: {e}", file=sys.stderr)
+
+
+def load_structure(path=STRUCTURE_FILE, use_cache: bool = True) -> CoreStructure:
+    """
+    Load and parse the structure YAML, reusing the pickled tree when the
+    file is unchanged.
+
+    The cache entry is trusted directly when mtime and size match; if only
+    the mtime moved (checkout, touch), the SHA-256 decides.
+    """
+    yaml_path = Path(path).resolve()
+    stat = yaml_path.stat()
+    cache_path = _cache_path(yaml_path)
+
+    cached = _read_cache(cache_path) if use_cache else None
+    if cached and cached.get("version") == CACHE_VERSION:
+        if cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            return cached["structure"]
+
+    raw = yaml_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if cached and cached.get("version") == CACHE_VERSION and cached["digest"] == digest:
+        structure = cached["structure"]
+    else:
+        structure = parse_structure(yaml.safe_load(raw.decode("utf-8")), str(path), digest)
+
+    if use_cache:
+        _write_cache(cache_path, {
+            "version": CACHE_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            "structure": structure,
+        })
+    return structure
+
+
+if __name__ == "__main__":
+    # Warm the cache and print a short overview.
+    target = sys.argv[1] if len(sys.argv) > 1 else STRUCTURE_FILE
+    s = load_structure(target)
+    nodes = list(s.iter_nodes())
+    print(f"[structure] {target}: {len(nodes)} node(s), {len(s.tex_paths())} unique path(s)")
@@ -1,49 +1,154 @@
 #!/usr/bin/env python3
-import re
+# -*- coding: utf-8 -*-
+r"""
+Heading normalization from the depth in master_core_structure.yaml.
+
+The old version applied \section→\subsection and then
+\subsection→\subsubsection to every module file, so a \section was demoted
+twice per run and every rerun demoted again. Now each file gets a target
+heading from its depth in the YAML tree (DEPTH_HEADINGS), and its headings
+are shifted down in one pass so that the file's top heading matches it.
+The relative structure inside a file is kept. Files already at (or below)
+their level are left alone, so the tool is idempotent and runs in every
+build (step [2.5/4]).
+
+The check uses the shared .tex index (tools/tex_index.py): the top heading
+of each file comes from the indexed entries, and the file hash + target of
+the last normalization is recorded in index.state["demote"]. Unchanged
+files are skipped without reading them.
+
+Usage (from repo root):
+
+    python tools/demote_module_headings.py            # normalize
+    python tools/demote_module_headings.py --check    # list wrong files, exit 1
+"""
+
+import argparse
+import sys
 from pathlib import Path
 
-# Каталоги модульных глав: 1 папка = 1 глава
-MODULE_DIRS = [
-    "content/k_levels",
-    "content/m_spaces",
-    "content/crossk",
-    "content/cycles",
-    "content/experiments",
-    "content/falsifiability",
-    "content/jets",
-    "content/predictions",
-    "content/processes",
-]
-
-# Паттерны: понижаем уровень заголовка на один шаг
-DEMOTE_RULES = [
-    (r"\\section(\*?)\{",     r"\\subsection\1{"),
-    (r"\\subsection(\*?)\{",  r"\\subsubsection\1{"),
-]
-
-def demote_in_file(path: Path):
-    text = path.read_text(encoding="utf-8")
-    original = text
-
-    for pattern, repl in DEMOTE_RULES:
-        text = re.sub(pattern, repl, text)
-
-    if text != original:
-        path.write_text(text, encoding="utf-8")
-        print(f"[demote] Updated headings in {path}")
-    else:
-        print(f"[demote] No changes in {path}")
-
-def main():
-    for d in MODULE_DIRS:
-        dir_path = Path(d)
-        if not dir_path.exists():
+from core_io import STATS, write_if_changed
+from core_structure import load_structure
+from latex_scan import iter_commands
+from tex_index import load_index, save_index, update_index
+
+STATE_KEY = "demote"
+
+HEADING_LEVELS = ["section", "subsection", "subsubsection", "paragraph", "subparagraph"]
+LEVEL = {name: i for i, name in enumerate(HEADING_LEVELS)}
+
+# Tiefe im YAML-Baum → Überschrift, mit der die Datei beginnt:
+#   0  Kapitel (01_intro ... 16_modules_master, toe_master)
+#   1  Modul-Master (eigene Kapitel: klevels_master, cycles_master, ...)
+#   2+ Modul-Dateien (K-Files) — das Ergebnis der früheren doppelten Demotion
+DEPTH_HEADINGS = ["section", "section", "subsubsection"]
+
+
+def target_heading(depth: int) -> str:
+    return DEPTH_HEADINGS[min(depth, len(DEPTH_HEADINGS) - 1)]
+
+
+def structure_targets(structure):
+    """path → target heading for every file of the structure tree."""
+    targets = {}
+    for node in structure.iter_nodes():
+        if node.path and node.path not in targets:
+            targets[node.path] = target_heading(node.level)
+    return targets
+
+
+def top_level(entries):
+    """Level of the shallowest sectioning command, or None."""
+    levels = [LEVEL[e.command] for e in entries if e.kind == "heading" and e.command in LEVEL]
+    return min(levels) if levels else None
+
+
+def shift_headings(text: str, delta: int) -> str:
+    """Move every sectioning command by delta levels (clamped)."""
+    out = []
+    pos = 0
+    for cmd in iter_commands(text, LEVEL):
+        level = max(0, min(len(HEADING_LEVELS) - 1, LEVEL[cmd.name] + delta))
+        name_start = cmd.start + 1
+        out.append(text[pos:name_start])
+        out.append(HEADING_LEVELS[level])
+        pos = name_start + len(cmd.name)
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def plan(index, targets, only=None):
+    """Return [(path, target, delta)] for files whose top heading is too high."""
+    state = index.state.setdefault(STATE_KEY, {})
+    todo = []
+    for path, want in targets.items():
+        if only is not None and path not in only:
+            continue
+        fi = index.files.get(path)
+        if fi is None:
+            continue                # fehlt — meldet validate_core_structure
+        if state.get(path) == (fi.sha256, want):
             continue
-        for tex in dir_path.glob("*.tex"):
-            # master-файлы оставляем как есть: они задают верхний уровень главы
-            if tex.name.endswith("master.tex"):
-                continue
-            demote_in_file(tex)
+        top = top_level(fi.entries)
+        # Nur demoten: eine Datei, die tiefer beginnt (z. B. nur \paragraph), bleibt.
+        if top is None or top >= LEVEL[want]:
+            state[path] = (fi.sha256, want)
+            continue
+        todo.append((path, want, LEVEL[want] - top))
+    return todo
+
+
+def normalize_headings(index, structure, only=None):
+    """Normalize the files that need it; returns the rewritten paths."""
+    todo = plan(index, structure_targets(structure), only)
+    changed = []
+    for path, want, delta in todo:
+        p = Path(path)
+        text = p.read_text(encoding="utf-8")
+        if write_if_changed(p, shift_headings(text, delta)):
+            print(f"[demote] {path}: top heading → \\{want} ({delta:+d} level(s))")
+            changed.append(p)
+    if todo:
+        update_index(index)
+        state = index.state[STATE_KEY]
+        for path, want, _ in todo:
+            fi = index.files.get(path)
+            if fi is not None:
+                state[path] = (fi.sha256, want)
+    return changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Normalize heading levels of the structure files (idempotent)"
+    )
+    parser.add_argument("--check", action="store_true",
+                        help="Only list files that need demotion (exit 1 if any)")
+    args = parser.parse_args()
+
+    index = load_index()
+    structure = load_structure()
+    targets = structure_targets(structure)
+
+    if args.check:
+        todo = plan(index, targets)
+        for path, want, delta in todo:
+            print(f"{path}: top heading should be \\{want} ({delta:+d} level(s))")
+        print(f"[demote] {len(todo)} of {len(targets)} file(s) at the wrong level.")
+        return 1 if todo else 0
+
+    state_before = dict(index.state.get(STATE_KEY, {}))
+    normalize_headings(index, structure)
+    # Einträge von Dateien, die nicht mehr in der YAML stehen, verwerfen
+    state = index.state[STATE_KEY]
+    for path in set(state) - set(targets):
+        del state[path]
+    if state != state_before:
+        save_index(index)
+
+    print(f"[demote] {len(targets)} file(s) in the structure, {len(STATS.written)} normalized.")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Content-addressed PDF cache for the TikZ sources in figures/.
+
+Every figures/*.tex is a bare tikzpicture that content/*.tex pulls in via
+\input{figures/<name>} and that XeLaTeX re-typesets on every pass. This
+tool compiles each figure once into a cropped PDF:
+
+    build/figcache/pdf/<name>-<key>.pdf
+
+where <key> hashes the figure source plus the preamble blocks a figure
+can depend on (fonts, languages, math, macros, TikZ) and the wrapper's
+class options. The wrapper takes the font size from main.tex's
+\documentclass (standalone alone would typeset at 10pt, smaller than
+the same TikZ inline). Changed figures are compiled in parallel;
+unchanged ones are reused.
+
+For each cached figure a shim build/figcache/figures/<name>.tex with a
+single \includegraphics is written. Running XeLaTeX with
+
+    TEXINPUTS=build/figcache:
+
+makes \input{figures/<name>} resolve to the shim, so no content file
+has to change. Figures that fail to compile get no shim and fall back
+to their TikZ source.
+
+Only figures that the document actually includes are compiled (the list
+comes from tools/generate_fig_index.py); unused sources in figures/ are
+skipped and their old renders garbage-collected. --all compiles every
+figures/*.tex regardless.
+
+Usage (from repo root):
+
+    python tools/figure_cache.py               # update the cache
+    python tools/figure_cache.py --jobs 8
+    python tools/figure_cache.py --all         # include unused figures
+    ./build_core.sh --figure-cache             # update + use it for all passes
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from core_io import write_if_changed
+from generate_fig_index import used_figures
+
+ENGINE = "xelatex"
+FIGURES_DIR = Path("figures")
+PREAMBLE = Path("preamble.tex")
+MAIN_TEX = Path("main.tex")
+CACHE_DIR = Path("build") / "figcache"
+PDF_DIR = CACHE_DIR / "pdf"
+WORK_DIR = CACHE_DIR / "work"
+SHIM_DIR = CACHE_DIR / "figures"
+
+# Bump when the wrapper document changes.
+# 2: font size from main.tex in the class options
+CACHE_VERSION = 2
+
+# preamble.tex is organised in "% --- Name ---" blocks; these are the
+# ones a standalone figure needs (no geometry/hyperref/biblatex).
+# Matched as prefixes of the block titles.
+FIGURE_BLOCKS = (
+    "Engine & fonts",
+    "Languages",
+    "Unicode helpers",
+    "Mathematics",
+    "OC Core: custom Greek macros",
+    "OC Core: operator macros",
+    "Graphics & TikZ",
+)
+
+BLOCK_HEADER_RE = re.compile(r"^%\s*---\s*(.+?)\s*-*\s*$")
+DOCUMENTCLASS_RE = re.compile(r"^\s*\\documentclass\[([^\]]*)\]", re.M)
+FONT_SIZE_RE = re.compile(r"^\d+(?:\.\d+)?pt$")
+
+WRAPPER_TEMPLATE = r"""% Auto-generated by tools/figure_cache.py — DO NOT EDIT
+\documentclass[{options}]{{standalone}}
+{preamble}
+\begin{{document}}
+\input{{{figure}}}
+\end{{document}}
+"""
+
+SHIM_TEMPLATE = r"""% Auto-generated by tools/figure_cache.py — cached render of {source}
+\includegraphics{{{pdf}}}%
+"""
+
+
+def figure_preamble(text: str) -> str:
+    """Concatenate the FIGURE_BLOCKS of preamble.tex, in file order."""
+    selected = []
+    keep = False
+    for line in text.splitlines():
+        m = BLOCK_HEADER_RE.match(line)
+        if m:
+            keep = m.group(1).startswith(FIGURE_BLOCKS)
+        if keep:
+            selected.append(line)
+    return "\n".join(selected) + "\n"
+
+
+def class_options(main: Path = MAIN_TEX) -> str:
+    """Options of the standalone wrapper: main.tex's font size + border."""
+    try:
+        m = DOCUMENTCLASS_RE.search(main.read_text(encoding="utf-8"))
+    except OSError:
+        m = None
+    options = [o.strip() for o in m.group(1).split(",")] if m else []
+    sizes = [o for o in options if FONT_SIZE_RE.match(o)]
+    return ",".join(sizes[-1:] + ["border=1pt"])
+
+
+def cache_key(source: bytes, preamble: str, options: str) -> str:
+    h = hashlib.sha256()
+    h.update(str(CACHE_VERSION).encode("ascii") + b"\0")
+    h.update(options.encode("utf-8") + b"\0")
+    h.update(preamble.encode("utf-8") + b"\0")
+    h.update(source)
+    return h.hexdigest()[:20]
+
+
+def compile_figure(name: str, key: str, preamble: str, options: str, engine: str):
+    """Render one figure; returns (name, pdf path or None, error text)."""
+    jobname = f"{name}-{key}"
+    wrapper = WORK_DIR / f"{jobname}.tex"
+    write_if_changed(
+        wrapper,
+        WRAPPER_TEMPLATE.format(options=options, preamble=preamble,
+                                figure=(FIGURES_DIR / name).as_posix()),
+    )
+    result = subprocess.run(
+        [
+            engine,
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            f"-output-directory={WORK_DIR}",
+            str(wrapper),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    produced = WORK_DIR / f"{jobname}.pdf"
+    if result.returncode != 0 or not produced.exists():
+        return name, None, f"exit code {result.returncode}, see {WORK_DIR / (jobname + '.log')}"
+    target = PDF_DIR / produced.name
+    os.replace(produced, target)
+    return name, target, None
+
+
+def write_shim(name: str, pdf: Path) -> None:
+    shim = SHIM_DIR / f"{name}.tex"
+    text = SHIM_TEMPLATE.format(
+        source=(FIGURES_DIR / f"{name}.tex").as_posix(),
+        pdf=pdf.as_posix(),
+    )
+    write_if_changed(shim, text)
+
+
+def drop_shim(name: str) -> None:
+    try:
+        (SHIM_DIR / f"{name}.tex").unlink()
+    except FileNotFoundError:
+        pass
+
+
+def update_cache(figures=None, jobs=None, engine: str = ENGINE) -> int:
+    """
+    Bring the cache in sync with the given figure sources (default: the
+    ones the document includes). Returns the number of figures that
+    failed to compile.
+    """
+    for d in (PDF_DIR, WORK_DIR, SHIM_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+
+    preamble = figure_preamble(PREAMBLE.read_text(encoding="utf-8"))
+    options = class_options()
+    sources = [Path(p) for p in used_figures()] if figures is None else figures
+
+    wanted = {}
+    stale = []
+    for src in sources:
+        name = src.stem
+        key = cache_key(src.read_bytes(), preamble, options)
+        wanted[name] = key
+        pdf = PDF_DIR / f"{name}-{key}.pdf"
+        if pdf.exists():
+            write_shim(name, pdf)
+        else:
+            stale.append((name, key))
+
+    print(f"[figcache] {len(wanted) - len(stale)} cached, {len(stale)} to compile")
+
+    failed = 0
+    if stale:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            results = pool.map(lambda item: compile_figure(*item, preamble, options, engine), stale)
+            for name, pdf, error in results:
+                if pdf is None:
+                    failed += 1
+                    drop_shim(name)
+                    print(f"[figcache] FAILED {name}: {error} (falls back to TikZ source)")
+                else:
+                    write_shim(name, pdf)
+                    print(f"[figcache] compiled {name}")
+
+    # Garbage-collect renders and shims that no longer match a source.
+    for pdf in PDF_DIR.glob("*.pdf"):
+        name, _, key = pdf.stem.rpartition("-")
+        if wanted.get(name) != key:
+            pdf.unlink()
+    for shim in SHIM_DIR.glob("*.tex"):
+        if shim.stem not in wanted:
+            shim.unlink()
+
+    return failed
+
+
+def texinputs_env():
+    """Environment for XeLaTeX so \\input{figures/x} finds the shims first."""
+    current = os.environ.get("TEXINPUTS", "")
+    return {"TEXINPUTS": f"{CACHE_DIR.as_posix()}:{current}"}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compile figures/*.tex once into a content-addressed PDF cache"
+    )
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel compilations")
+    parser.add_argument("--engine", default=ENGINE)
+    parser.add_argument("--all", action="store_true",
+                        help="Also compile figures the document does not include")
+    args = parser.parse_args()
+
+    figures = sorted(FIGURES_DIR.glob("*.tex")) if args.all else None
+    try:
+        failed = update_cache(figures, jobs=args.jobs, engine=args.engine)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e.filename} not found in PATH", file=sys.stderr)
+        return 127
+    # Failures are not fatal: those figures are typeset from source.
+    if failed:
+        print(f"[figcache] WARNING: {failed} figure(s) not cached.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
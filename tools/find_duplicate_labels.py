@@ -1,27 +1,9 @@
 #!/usr/bin/env python3
-from pathlib import Path
-import re
-
-# Сканируем весь репозиторий, кроме build/, .git/, tools/
-EXCLUDE = {".git", "build", "tools", ".venv", "venv"}
-
-LABEL_RE = re.compile(r"\\label\{([^}]+)\}")
-
-def iter_tex():
-    for path in Path(".").rglob("*.tex"):
-        if any(part in EXCLUDE for part in path.parts):
-            continue
-        yield path
+# Сканируем весь репозиторий, кроме build/, .git/, tools/ (см. tex_index.EXCLUDE)
+from tex_index import load_index
 
 def main():
-    labels = {}
-
-    for path in iter_tex():
-        text = path.read_text(encoding="utf-8", errors="ignore")
-        for lineno, line in enumerate(text.splitlines(), start=1):
-            for m in LABEL_RE.finditer(line):
-                name = m.group(1)
-                labels.setdefault(name, []).append((path, lineno))
+    labels = load_index().labels()
 
     dupes = {k: v for k, v in labels.items() if len(v) > 1}
 
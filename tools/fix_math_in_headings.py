@@ -1,23 +1,37 @@
 #!/usr/bin/env python3
+import hashlib
+import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from core_io import write_if_changed
+from latex_scan import replace_args
+from tex_index import PARALLEL_THRESHOLD, load_index
+
 # Welche Verzeichnisse scannen (falls du willst, kannst du später noch "appendix" hinzufügen)
 ROOTS = ["content"]
 
-# Überschriften + captions, Stern ist optional (\section{..} oder \section*{..})
-PATTERNS = [
-    r"(\\section\*?\{)([^}]*)(\})",
-    r"(\\subsection\*?\{)([^}]*)(\})",
-    r"(\\subsubsection\*?\{)([^}]*)(\})",
-    r"(\\paragraph\*?\{)([^}]*)(\})",
-    r"(\\subparagraph\*?\{)([^}]*)(\})",
-    r"(\\caption\*?\{)([^}]*)(\})",
-]
-
-# Math in Überschriften/Kapiteln: $, \(..\), \[..\]
+# Überschriften + captions, Stern ist optional (\section{..} oder \section*{..}).
+# Der Scanner (tools/latex_scan.py) liest die Argumente klammer-balanciert in
+# einem linearen Durchlauf: \section{The $\mathcal{K}_{3}$ level} wird komplett
+# erfasst, nicht nur bis zur ersten "}".
+HEADING_COMMANDS = {
+    "section", "subsection", "subsubsection", "paragraph", "subparagraph", "caption",
+}
+
+# Hash jeder Datei nach dem letzten Lauf: unveränderte Dateien werden übersprungen.
+CACHE_FILE = Path("build") / ".cache" / "fix_math.json"
+# Erhöhen, wenn sich die Umschreib-Logik ändert: sonst gelten alte Einträge
+# (gleicher Hash) weiter und die neue Logik erreicht diese Dateien nie.
+# 2: klammer-balancierte Argumente (replace_args) + neues MATH_RE.
+CACHE_VERSION = 2
+
+# Math in Überschriften/Kapiteln: $, \(..\), \[..\] (nicht-gierig, ohne Backtracking-Fallen)
 MATH_RE = re.compile(
-    r"(\$[^$]+\$|\\\([^)]*\\\)|\\\[[^\]]*\\\])"
+    r"(\$[^$]+\$|\\\(.*?\\\)|\\\[.*?\\\])", re.DOTALL
 )
 
 def make_texorpdfstring(text: str) -> str:
@@ -45,35 +59,101 @@ def make_texorpdfstring(text: str) -> str:
     return MATH_RE.sub(repl, text)
 
 
-def process_file(path: Path) -> bool:
-    content = path.read_text(encoding="utf-8")
-    original = content
+def fix_text(text: str) -> str:
+    return replace_args(text, HEADING_COMMANDS, lambda cmd: make_texorpdfstring(cmd.arg))
 
-    for pattern in PATTERNS:
-        def repl(m):
-            prefix, inner, suffix = m.group(1), m.group(2), m.group(3)
-            new_inner = make_texorpdfstring(inner)
-            return prefix + new_inner + suffix
 
-        content = re.sub(pattern, repl, content, flags=re.DOTALL)
+def process_file(path: Path) -> bool:
+    content = path.read_text(encoding="utf-8")
+    fixed = fix_text(content)
 
-    if content != original:
-        path.write_text(content, encoding="utf-8")
+    if fixed != content:
+        write_if_changed(path, fixed)
         print(f"[fix_math] Updated: {path}")
         return True
     return False
 
 
-def main():
-    changed_any = False
+def _worker(path: str):
+    """Pool-Einstieg: (Pfad, geändert?, SHA-256 nach dem Lauf)."""
+    changed = process_file(Path(path))
+    digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    return path, changed, digest
+
+
+def load_cache() -> dict:
+    try:
+        data = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_cache(files: dict) -> None:
+    write_if_changed(
+        CACHE_FILE,
+        json.dumps({"version": CACHE_VERSION, "files": files}, indent=1, sort_keys=True),
+    )
+
+
+def candidate_files(index, only=None):
+    """
+    Nur Dateien, deren Überschriften/Captions laut Index Math ohne
+    \\texorpdfstring enthalten — der Rest wird gar nicht erst gelesen.
+    `only` beschränkt die Suche auf die angegebenen Pfade (watch mode).
+    """
     for root in ROOTS:
-        for path in Path(root).rglob("*.tex"):
-            if process_file(path):
-                changed_any = True
+        paths = [p for p in index.paths_under(root) if p.endswith(".tex")]
+        for path in paths:
+            if only is not None and path not in only:
+                continue
+            entries = index.files[path].entries
+            if any(
+                e.kind in ("heading", "caption")
+                and r"\texorpdfstring" not in e.arg
+                and MATH_RE.search(e.arg)
+                for e in entries
+            ):
+                yield Path(path)
+
 
+def main():
+    index = load_index()
+    cache = load_cache()
+
+    content = [
+        p for root in ROOTS for p in index.paths_under(root) if p.endswith(".tex")
+    ]
+    new_cache = {p: index.files[p].sha256 for p in content}
+
+    # Nur Dateien, deren Hash sich seit dem letzten Lauf geändert hat
+    changed_files = {p for p in content if cache.get(p) != new_cache[p]}
+    todo = [p.as_posix() for p in candidate_files(index, only=changed_files)]
+
+    if len(todo) >= PARALLEL_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(_worker, todo, chunksize=8))
+    else:
+        results = [_worker(p) for p in todo]
+
+    changed_any = False
+    for path, changed, digest in results:
+        new_cache[path] = digest
+        changed_any = changed_any or changed
+    save_cache(new_cache)
+
+    print(
+        f"[fix_math] {len(changed_files)} file(s) changed since last run, "
+        f"{len(todo)} with math in headings/captions."
+    )
     if not changed_any:
         print("[fix_math] No changes made (already clean).")
+    else:
+        print(f"[fix_math] {sum(1 for r in results if r[1])} file(s) updated.")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -53,167 +53,38 @@ import argparse
 import sys
 from pathlib import Path
 
-try:
-    import yaml
-except ImportError:
-    print("[ERROR] PyYAML is required: pip install pyyaml", file=sys.stderr)
-    sys.exit(1)
+from core_io import STATS, write_if_changed
+from core_structure import CoreStructure, load_structure, parse_structure
 
 
 # --------------------------------------------------------------------
-# YAML loaders / extractors
+# Path extraction
 # --------------------------------------------------------------------
 
-def load_yaml(path: Path):
-    text = path.read_text(encoding="utf-8")
-    data = yaml.safe_load(text)
-    if data is None:
-        raise SystemExit("YAML пустой. Ожидал структуру секций.")
-    return data
-
-
-def extract_root_nodes(data):
-    """
-    Extract the top-level list of nodes from various wrapper schemes.
-
-    Supports:
-      - top-level list
-      - {root: {sections: [...]}}
-      - {sections: [...]}
-      - {root: [...]}
-      - {nodes|chapters|toc|content: [...]}
-      - first list-of-dicts in values
-      - dict-of-dicts fallback
-    """
-    # 1) Direct list
-    if isinstance(data, list):
-        return data
-
-    if isinstance(data, dict):
-        # Core 1.1 schema: root: {entrypoint: ..., sections: [...]}
-        root = data.get("root")
-        if isinstance(root, dict) and isinstance(root.get("sections"), list):
-            return root["sections"]
-
-        # Simple wrapper: sections: [...]
-        if isinstance(data.get("sections"), list):
-            return data["sections"]
-
-        # Legacy: root: [...]
-        if isinstance(root, list):
-            return root
-
-        # Legacy: other typical keys
-        for key in ("nodes", "chapters", "toc", "content"):
-            value = data.get(key)
-            if isinstance(value, list):
-                return value
-
-        # Fallback: first list-of-dicts
-        for value in data.values():
-            if isinstance(value, list) and (not value or isinstance(value[0], dict)):
-                return value
-
-        # Ultimate fallback: dict-of-dicts → list of nodes
-        nodes = []
-        for key, value in data.items():
-            node = {"title": str(key)}
-            if isinstance(value, dict):
-                node.update(value)
-            nodes.append(node)
-        return nodes
-
-    raise SystemExit(
-        "Не могу понять структуру YAML даже после всех попыток. "
-        "Ожидал list или dict с вложенными нодами."
-    )
-
-
-def iter_children(node):
-    """
-    Return list of children for a node.
-
-    Supports keys:
-      - children
-      - subsections
-      - nodes
-      - sections
+def extract_tex_paths(structure, nodes=None):
     """
-    if not isinstance(node, dict):
-        return []
-    for key in ("children", "subsections", "nodes", "sections"):
-        value = node.get(key)
-        if isinstance(value, list):
-            return value
-    return []
+    Unified extractor on top of the shared structure loader:
 
+    1) take the parsed node tree (or raw YAML data, parsed on the fly),
+    2) flatten the tree in DFS order (including children),
+    3) deduplicate while preserving order.
 
-def flatten_paths(nodes):
-    """
-    Recursively walk node tree and collect all path/file entries (DFS order).
-
-    Nodes may be:
-      - strings (treated directly as paths),
-      - dicts with "path"/"file" and optional children.
+    `nodes` restricts the walk to the given subtrees, e.g. one module.
 
     Core 1.1 behaviour:
 
       • For top-level sections 1–15, we just take their .tex paths.
-      • For the 'modules_master' section, we:
-            - include its own path (16_modules_master.tex),
-            - then, for EACH of its children (module-folders),
-              include module master.tex,
-              then all its K-files (k0..k12) in YAML order.
+      • For the 'modules_master' section, we include its own path
+        (16_modules_master.tex), then for EACH module-folder child its
+        master.tex followed by all K-files (k0..k12) in YAML order.
 
       This is achieved by a straightforward DFS with NO special-case that
       stops recursion at 'modules_master'.
     """
-    collected = []
-
-    def _walk(items):
-        for item in items:
-            # Plain string => direct path
-            if isinstance(item, str):
-                collected.append(item)
-                continue
-
-            if not isinstance(item, dict):
-                continue
-
-            path = item.get("path") or item.get("file")
-            if path:
-                collected.append(path)
-
-            # Always walk children (no stop at modules_master)
-            children = iter_children(item)
-            if children:
-                _walk(children)
-
-    _walk(nodes)
-    return collected
-
-
-def extract_tex_paths(yaml_data):
-    """
-    Unified extractor:
-
-    1) find root node list (extract_root_nodes),
-    2) flatten whole tree (including children),
-    3) deduplicate while preserving order.
-    """
-    nodes = extract_root_nodes(yaml_data)
-    paths = flatten_paths(nodes)
-
-    # Deduplicate by normalized string path, keep order
-    uniq = []
-    seen = set()
-    for p in paths:
-        s = str(p).replace("\\", "/")
-        if s in seen:
-            continue
-        seen.add(s)
-        uniq.append(s)
+    if not isinstance(structure, CoreStructure):
+        structure = parse_structure(structure)
 
+    uniq = structure.tex_paths(nodes)
     if not uniq:
         raise ValueError(
             "Не смог извлечь ни одного пути из YAML.\n"
@@ -228,10 +99,12 @@ def extract_tex_paths(yaml_data):
 # Writer
 # --------------------------------------------------------------------
 
-def write_inputs_file(output_path: Path, paths):
+def write_inputs_file(output_path: Path, paths) -> bool:
     """
     Write \\input lines into the given file.
     If list is empty, still write a comment header so LaTeX doesn't break.
+    The file is only rewritten if its content changes (keeps the mtime);
+    returns True if it was written.
     """
     header = [
         "% ==========================================",
@@ -252,8 +125,7 @@ def write_inputs_file(output_path: Path, paths):
             lines.append(f"\\input{{{s}}}")
         lines.append("")  # final newline
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(lines), encoding="utf-8")
+    return write_if_changed(output_path, "\n".join(lines))
 
 
 # --------------------------------------------------------------------
@@ -285,14 +157,14 @@ def main():
         sys.exit(1)
 
     try:
-        data = load_yaml(yaml_path)
+        structure = load_structure(yaml_path)
     except Exception as e:
         print(f"[ERROR] Failed to parse YAML: {e}", file=sys.stderr)
         write_inputs_file(out_path, [])
         sys.exit(1)
 
     try:
-        paths = extract_tex_paths(data)
+        paths = extract_tex_paths(structure)
     except Exception as e:
         print(f"[inputs] ERROR: {e}", file=sys.stderr)
         # Still write a minimal file to keep LaTeX happy
@@ -301,8 +173,11 @@ def main():
 
     print(f"[inputs] Using YAML: {yaml_path}")
     print(f"[inputs] Found {len(paths)} section(s) for auto-include.")
-    write_inputs_file(out_path, paths)
-    print(f"[inputs] Written {len(paths)} \\input lines to {out_path}")
+    if write_inputs_file(out_path, paths):
+        print(f"[inputs] Written {len(paths)} \\input lines to {out_path}")
+    else:
+        print(f"[inputs] {out_path} unchanged ({len(paths)} \\input lines)")
+    print(STATS.summary("[inputs]"))
 
 
 if __name__ == "__main__":
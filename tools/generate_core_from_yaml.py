@@ -6,6 +6,11 @@ Usage (from repo root):
 
     python tools/generate_core_from_yaml.py          # uses master_core_structure.yaml
     python tools/generate_core_from_yaml.py path/to/your.yaml
+    python tools/generate_core_from_yaml.py --dry-run   # only show what is missing
+    python tools/generate_core_from_yaml.py --quiet     # one summary line
+
+Each target directory is listed once (os.scandir); only the missing
+files are created. Existing files are never touched.
 
 Supported YAML shapes (tolerant):
 
@@ -40,18 +45,20 @@ Each node may contain:
   - children / subsections / nodes / sections: optional nested nodes
 """
 
+import argparse
 import os
-import sys
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 
-import yaml  # pip install pyyaml
+from core_io import write_if_changed
+from core_structure import load_structure
 
 # ------------------------------------------------------------
 # Settings
 # ------------------------------------------------------------
 
 # By default read master_core_structure.yaml from repo root.
-STRUCTURE_FILE = sys.argv[1] if len(sys.argv) > 1 else "master_core_structure.yaml"
+STRUCTURE_FILE = "master_core_structure.yaml"
 
 DEFAULT_PLACEHOLDER = textwrap.dedent(
     r"""
@@ -76,95 +83,6 @@ ADD_LATEX_HEADER = True
 # Helpers
 # ------------------------------------------------------------
 
-def load_yaml(path: str):
-    """Load raw YAML."""
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if data is None:
-        raise SystemExit("YAML пустой. Ожидал структуру секций.")
-    return data
-
-
-def extract_root_nodes(data):
-    """
-    Extract the top-level list of nodes from various wrapper schemes.
-
-    Supports:
-      - top-level list
-      - {root: {sections: [...]}}
-      - {sections: [...]}
-      - {root: [...]}
-      - any dict value that is a list[dict]
-      - dict-of-dicts fallback
-    """
-    # 1) Direct list
-    if isinstance(data, list):
-        return data
-
-    if isinstance(data, dict):
-        # New Core schema: root: {entrypoint: ..., sections: [...]}
-        root = data.get("root")
-        if isinstance(root, dict) and isinstance(root.get("sections"), list):
-            return root["sections"]
-
-        # Simple wrapper: sections: [...]
-        if isinstance(data.get("sections"), list):
-            return data["sections"]
-
-        # Legacy: root: [...]
-        if isinstance(root, list):
-            return root
-
-        # Legacy: other typical keys
-        for key in ("nodes", "chapters", "toc", "content"):
-            value = data.get(key)
-            if isinstance(value, list):
-                return value
-
-        # Fallback: first list-of-dicts in values
-        for value in data.values():
-            if isinstance(value, list) and (not value or isinstance(value[0], dict)):
-                return value
-
-        # Ultimate fallback: dict-of-dicts → list of nodes
-        nodes = []
-        for key, value in data.items():
-            node = {"title": str(key)}
-            if isinstance(value, dict):
-                node.update(value)
-            nodes.append(node)
-        return nodes
-
-    raise SystemExit(
-        "Не могу понять структуру YAML даже после всех попыток. "
-        "Ожидал list или dict с вложенными нодами."
-    )
-
-
-def iter_children(node):
-    """
-    Return list of children for a node.
-
-    Supports keys:
-      - children
-      - subsections
-      - nodes
-      - sections
-    """
-    for key in ("children", "subsections", "nodes", "sections"):
-        value = node.get(key)
-        if isinstance(value, list):
-            return value
-    return []
-
-
-def ensure_dir_for_file(filepath: str) -> None:
-    """Create directory for file if it does not exist."""
-    directory = os.path.dirname(filepath)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
-
-
 def make_latex_header(title: str, level: int) -> str:
     """
     level 0 -> \\section
@@ -187,48 +105,87 @@ def make_latex_header(title: str, level: int) -> str:
     return f"{cmd}{{{title}}}\n\n"
 
 
-def create_file_if_missing(filepath: str, title: str, level: int) -> None:
-    """Create .tex file if it does not exist yet."""
-    # Normalize separators
-    filepath = filepath.replace("\\", "/")
-    ensure_dir_for_file(filepath)
-
-    if os.path.exists(filepath):
-        print(f"[skip   ] {filepath} (already exists)")
-        return
-
-    header = make_latex_header(title, level)
-    body = DEFAULT_PLACEHOLDER.format(filepath=filepath)
-
+def render_placeholder(filepath: str, title: str, level: int) -> str:
     # Put header after the placeholder comment block — or before, as you prefer.
-    content = body + header
+    return DEFAULT_PLACEHOLDER.format(filepath=filepath) + make_latex_header(title, level)
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(content)
 
-    print(f"[create ] {filepath}")
+def list_directory(directory: str):
+    """Names of the regular files in a directory (None if it does not exist)."""
+    try:
+        with os.scandir(directory or ".") as it:
+            return {e.name for e in it if e.is_file()}
+    except FileNotFoundError:
+        return None
 
 
-def walk_nodes(nodes, level: int = 0) -> None:
-    """Recursively walk node tree and create files."""
-    for node in nodes:
-        if not isinstance(node, dict):
-            # Skip garbage in YAML
-            continue
+# ------------------------------------------------------------
+# Scaffolding engine
+# ------------------------------------------------------------
 
-        # Accept both "path" (new) and "file" (legacy)
-        file_path = node.get("path") or node.get("file")
-        if file_path:
+def collect_targets(nodes):
+    """(path, title, level) for every node with a path, DFS order, deduplicated."""
+    targets = []
+    seen = set()
+    for root in nodes:
+        for node in root.iter_subtree():
+            if not node.path:
+                continue
+            # Normalize separators
+            filepath = node.path.replace("\\", "/")
+            if filepath in seen:
+                continue
+            seen.add(filepath)
             title = (
-                node.get("title")
-                or node.get("id")
-                or os.path.splitext(os.path.basename(file_path))[0]
+                node.title
+                or node.id
+                or os.path.splitext(os.path.basename(filepath))[0]
             )
-            create_file_if_missing(file_path, title, level)
+            targets.append((filepath, title, node.level))
+    return targets
 
-        children = iter_children(node)
-        if children:
-            walk_nodes(children, level=level + 1)
+
+def plan_scaffold(targets):
+    """
+    Return (missing targets, number of directories listed). Every target
+    directory is listed exactly once (os.scandir, in a small thread pool)
+    instead of one os.path.exists() per node.
+    """
+    directories = sorted({os.path.dirname(path) for path, _, _ in targets})
+    with ThreadPoolExecutor(max_workers=min(8, len(directories) or 1)) as pool:
+        listings = dict(zip(directories, pool.map(list_directory, directories)))
+
+    missing = []
+    for target in targets:
+        path = target[0]
+        names = listings[os.path.dirname(path)]
+        if names is None or os.path.basename(path) not in names:
+            missing.append(target)
+    return missing, len(directories)
+
+
+def walk_nodes(nodes, dry_run: bool = False, quiet: bool = False):
+    """
+    Create the missing files of the parsed structure tree. Returns the
+    list of created (or, with dry_run, to-be-created) paths.
+    """
+    targets = collect_targets(nodes)
+    missing, listed = plan_scaffold(targets)
+
+    created = []
+    for filepath, title, level in missing:
+        if not dry_run:
+            write_if_changed(filepath, render_placeholder(filepath, title, level))
+        created.append(filepath)
+        if not quiet:
+            print(f"[{'plan' if dry_run else 'create':<7}] {filepath}")
+
+    verb = "would be created" if dry_run else "created"
+    print(
+        f"[scaffold] {len(targets)} file(s) in {listed} director(ies): "
+        f"{len(targets) - len(missing)} present, {len(created)} {verb}."
+    )
+    return created
 
 
 # ------------------------------------------------------------
@@ -236,14 +193,31 @@ def walk_nodes(nodes, level: int = 0) -> None:
 # ------------------------------------------------------------
 
 def main() -> None:
-    if not os.path.exists(STRUCTURE_FILE):
-        raise SystemExit(f"YAML не найден: {STRUCTURE_FILE}")
-
-    print(f"Использую YAML структуру: {STRUCTURE_FILE}")
-    data = load_yaml(STRUCTURE_FILE)
-    nodes = extract_root_nodes(data)
-    walk_nodes(nodes)
-    print("\nГотово: все недостающие .tex-файлы созданы (существующие не трогали).")
+    parser = argparse.ArgumentParser(
+        description="Create missing .tex files listed in the Core structure YAML"
+    )
+    parser.add_argument("yaml", nargs="?", default=STRUCTURE_FILE, help="Structure YAML")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the files that would be created",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Print only the summary line",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.yaml):
+        raise SystemExit(f"YAML не найден: {args.yaml}")
+
+    if not args.quiet:
+        print(f"Использую YAML структуру: {args.yaml}")
+    structure = load_structure(args.yaml)
+    walk_nodes(structure.roots, dry_run=args.dry_run, quiet=args.quiet)
+    if not (args.dry_run or args.quiet):
+        print("Готово: все недостающие .tex-файлы созданы (существующие не трогали).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Generate fig_index.md (and a JSON twin) from the shared .tex index.
+
+fig_index.md used to be maintained by hand and drifted from figures/ and
+from the \caption/\label pairs in content/*.tex. This tool derives it
+from the indexed entries (tools/tex_index.py) in one walk over the files
+reachable from main.tex, in typesetting order:
+
+  • every \input{figures/...} or \includegraphics{figures/...} starts a
+    figure; the next \caption and fig: \label of the same file within
+    FIGURE_SPAN lines belong to it,
+  • its section is the last \section/\subsection before it in
+    typesetting order (\input's are followed in place, so a heading of
+    the including file counts too); the include site is kept as
+    "Source" (file:line),
+  • the "Purpose" line is the description comment at the top of the
+    figure source ("% FILE: figures/x.tex" is followed by it).
+
+Flagged (Markdown "Issues" section, JSON keys, console):
+
+  missing       include of figures/... that does not resolve to a file
+  duplicate     a figure source included twice, or a fig: label defined twice
+  unused        figures/ sources no reachable file includes; they are
+                skipped by tools/figure_cache.py and do not count as
+                build inputs (tools/build_manifest.py)
+  unreferenced  included figures whose label is never \ref'd (informational)
+
+Exit code 1 on missing/duplicate (--strict: on unused too).
+
+Usage (from repo root):
+
+    python tools/generate_fig_index.py
+    python tools/generate_fig_index.py --json -          # JSON to stdout only
+    python tools/generate_fig_index.py --check           # don't write, exit 1 if stale
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from build_manifest import ENTRYPOINT
+from core_io import write_if_changed
+from latex_scan import iter_commands, read_args, resolve_tex
+from tex_index import load_index
+
+MARKDOWN_FILE = Path("fig_index.md")
+JSON_FILE = Path("build") / "fig_index.json"
+INDEX_VERSION = 2
+
+FIGURES_DIR = "figures"
+GRAPHICS_EXTS = (".pdf", ".png", ".jpg")
+SOURCE_GLOBS = ("*.tex",) + tuple("*" + ext for ext in GRAPHICS_EXTS)
+
+# A \caption / \label further than this below the include is not its own.
+FIGURE_SPAN = 15
+# Headings that name the "Section" of a figure (not \paragraph & co.).
+SECTION_COMMANDS = ("section", "subsection")
+
+MD_HEADER = """\
+<!-- Auto-generated by tools/generate_fig_index.py — DO NOT EDIT -->
+# Figure Index — Ontology of Continua Core 1.1
+
+Figures in typesetting order, derived from the \\input / \\includegraphics
+of figures/ in the files reachable from main.tex. Caption and label come
+from the including file, the purpose from the header comment of the
+figure source.
+"""
+
+
+def _one_line(text) -> str:
+    return " ".join(text.split()) if text else ""
+
+
+def _display(text) -> str:
+    r"""
+    Caption/heading as shown in the index: \texorpdfstring{tex}{pdf} (added
+    by tools/fix_math_in_headings.py) becomes its TeX argument.
+    """
+    if not text or "texorpdfstring" not in text:
+        return _one_line(text)
+    out = []
+    pos = 0
+    for cmd in iter_commands(text, {"texorpdfstring"}):
+        if cmd.start < pos:
+            continue            # inside a form already replaced
+        pdf = read_args(text, cmd.end)
+        out.append(text[pos:cmd.start])
+        out.append(cmd.arg)
+        pos = pdf[3] if pdf else cmd.end
+    out.append(text[pos:])
+    return _one_line("".join(out))
+
+
+def resolve_figure(arg: str, command: str, root: Path):
+    """Repo-relative path of a figure include, or None if it does not exist."""
+    if command == "includegraphics":
+        name = arg.strip()
+        candidates = [name] if Path(name).suffix else [name + ext for ext in GRAPHICS_EXTS]
+        for c in candidates:
+            if (root / c).is_file():
+                return c
+        return None
+    target = resolve_tex(arg, root)
+    return target.relative_to(root).as_posix() if target is not None else None
+
+
+def purpose(source: str, root: Path) -> str:
+    """First comment line after '% FILE: ...' in a TikZ source ('' otherwise)."""
+    if not source.endswith(".tex"):
+        return ""
+    try:
+        with open(root / source, encoding="utf-8", errors="ignore") as f:
+            head = [next(f, "") for _ in range(6)]
+    except OSError:
+        return ""
+    comments = [l.strip().lstrip("%").strip() for l in head if l.strip().startswith("%")]
+    comments = [c for c in comments if c and not c.startswith("FILE:")]
+    return comments[0] if comments else ""
+
+
+def document_entries(index, entry: str = ENTRYPOINT, root=Path(".")):
+    """
+    (path, entry) pairs of everything reachable from `entry`, in
+    typesetting order: an \input's entries come where it is included.
+    Each file is visited once.
+    """
+    root = Path(root)
+    seen = set()
+
+    def walk(path):
+        seen.add(path)
+        fi = index.files.get(path)
+        if fi is None:
+            return
+        for e in fi.entries:
+            yield path, e
+            if e.kind == "input" and not e.arg.startswith(FIGURES_DIR + "/"):
+                target = resolve_tex(e.arg, root)
+                if target is not None:
+                    rel = target.relative_to(root).as_posix()
+                    if rel not in seen:
+                        yield from walk(rel)
+
+    start = resolve_tex(entry, root)
+    if start is not None:
+        yield from walk(start.relative_to(root).as_posix())
+
+
+def collect(index, entry: str = ENTRYPOINT, root=Path(".")):
+    """Return the index dict (see module docstring)."""
+    root = Path(root)
+    figures = []
+    missing = []
+    section = ""
+    current = None
+    for path, e in document_entries(index, entry, root):
+        if current is not None and current["file"] != path:
+            current = None          # caption/label belong to the including file
+        if e.kind == "heading":
+            if e.command in SECTION_COMMANDS:
+                section = _display(e.arg)
+            current = None
+        elif e.kind in ("input", "graphics") and e.arg.startswith(FIGURES_DIR + "/"):
+            source = resolve_figure(e.arg, e.command, root)
+            if source is None:
+                missing.append({"file": path, "line": e.line, "target": e.arg})
+                current = None
+                continue
+            current = {
+                "source": source,
+                "file": path,
+                "line": e.line,
+                "section": section,
+                "label": None,
+                "caption": None,
+                "purpose": purpose(source, root),
+            }
+            figures.append(current)
+        elif current is not None and e.line - current["line"] > FIGURE_SPAN:
+            current = None
+        elif current is not None and e.kind == "caption" and current["caption"] is None:
+            current["caption"] = _display(e.arg)
+        elif current is not None and e.kind == "label" and e.arg.startswith("fig:"):
+            if current["label"] is None:
+                current["label"] = e.arg
+
+    refs = {}
+    for path, e in index.iter_entries("ref"):
+        refs.setdefault(e.arg, []).append({"file": path, "line": e.line})
+    for fig in figures:
+        fig["refs"] = refs.get(fig["label"], []) if fig["label"] else []
+
+    by_source = {}
+    by_label = {}
+    for fig in figures:
+        by_source.setdefault(fig["source"], []).append(fig)
+        if fig["label"]:
+            by_label.setdefault(fig["label"], []).append(fig)
+
+    def sites(figs):
+        return [{"file": f["file"], "line": f["line"]} for f in figs]
+
+    duplicates = {s: sites(f) for s, f in sorted(by_source.items()) if len(f) > 1}
+    duplicates.update({l: sites(f) for l, f in sorted(by_label.items()) if len(f) > 1})
+
+    sources = set()
+    for pattern in SOURCE_GLOBS:
+        sources.update(p.relative_to(root).as_posix() for p in (root / FIGURES_DIR).glob(pattern))
+    unused = sorted(sources - set(by_source))
+
+    report = {
+        "version": INDEX_VERSION,
+        "entry": entry,
+        "figures": figures,
+        "missing": missing,
+        "duplicate": duplicates,
+        "unused": unused,
+        "unreferenced": [f["source"] for f in figures if not f["refs"]],
+    }
+    report["ok"] = not (missing or duplicates)
+    return report
+
+
+def used_figures(index=None, entry: str = ENTRYPOINT, root=Path(".")):
+    """figures/*.tex sources included from the document (for figure_cache.py)."""
+    report = collect(index if index is not None else load_index(), entry, root)
+    return sorted({f["source"] for f in report["figures"] if f["source"].endswith(".tex")})
+
+
+# --------------------------------------------------------------------
+# Output
+# --------------------------------------------------------------------
+
+def _code(value) -> str:
+    return f"`{value}`" if value else "—"
+
+
+def render_markdown(report) -> str:
+    out = [MD_HEADER]
+    last_section = None
+    n = 0
+    for fig in report["figures"]:
+        where = (fig["file"], fig["section"])
+        if where != last_section:
+            last_section = where
+            title = f"{fig['section']} ({fig['file']})" if fig["section"] else fig["file"]
+            out.append(f"---\n\n## {title}\n")
+        n += 1
+        refs = ", ".join(f"{r['file']}:{r['line']}" for r in fig["refs"]) or "none"
+        out.append(f"### {n}. {Path(fig['source']).name}")
+        out.append(f"**File:** `{fig['source']}`  ")
+        out.append(f"**Section:** {fig['section'] or '—'}  ")
+        out.append(f"**Source:** `{fig['file']}:{fig['line']}`  ")
+        out.append(f"**Label:** {_code(fig['label'])}  ")
+        out.append(f"**Caption:** {fig['caption'] or '—'}  ")
+        if fig["purpose"]:
+            out.append(f"**Purpose:** {fig['purpose']}  ")
+        out.append(f"**Referenced from:** {refs}\n")
+
+    issues = []
+    for m in report["missing"]:
+        issues.append(f"- missing: `{m['target']}` ({m['file']}:{m['line']})")
+    for key, where in report["duplicate"].items():
+        places = ", ".join(f"{s['file']}:{s['line']}" for s in where)
+        issues.append(f"- duplicate: `{key}` ({places})")
+    for source in report["unused"]:
+        issues.append(f"- unused: `{source}` (not included anywhere)")
+    if report["unreferenced"]:
+        issues.append(f"- unreferenced: {len(report['unreferenced'])} figure(s) without a \\ref to their label")
+    out.append("---\n\n## Issues\n")
+    out.append("\n".join(issues) if issues else "None.")
+    return "\n".join(out).rstrip("\n") + "\n"
+
+
+def print_report(report) -> None:
+    for m in report["missing"]:
+        print(f"{m['file']}:{m['line']}: missing figure '{m['target']}'")
+    for key, where in report["duplicate"].items():
+        for s in where:
+            print(f"{s['file']}:{s['line']}: '{key}' appears {len(where)} times")
+    for source in report["unused"]:
+        print(f"{source}: figure not included from {report['entry']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate fig_index.md / JSON from the .tex index"
+    )
+    parser.add_argument("--entry", default=ENTRYPOINT, help=f"Root file (default: {ENTRYPOINT})")
+    parser.add_argument("--markdown", default=str(MARKDOWN_FILE), metavar="PATH")
+    parser.add_argument(
+        "--json",
+        default=str(JSON_FILE),
+        metavar="PATH",
+        help=f"JSON output ('-' = stdout only, default: {JSON_FILE})",
+    )
+    parser.add_argument("--check", action="store_true",
+                        help="Do not write; exit 1 if the Markdown index is out of date")
+    parser.add_argument("--strict", action="store_true", help="Unused figures are errors too")
+    args = parser.parse_args()
+
+    report = collect(load_index(), args.entry)
+    markdown = render_markdown(report)
+
+    if args.json == "-":
+        sys.stdout.write(json.dumps(report, indent=1, ensure_ascii=False) + "\n")
+        return 0 if report["ok"] else 1
+
+    if args.check:
+        try:
+            current = Path(args.markdown).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            current = None
+        if current != markdown:
+            print(f"[fig-index] {args.markdown} is out of date — run tools/generate_fig_index.py")
+            return 1
+    else:
+        write_if_changed(args.markdown, markdown)
+        write_if_changed(args.json, json.dumps(report, indent=1, ensure_ascii=False) + "\n")
+
+    print_report(report)
+    ok = report["ok"] and not (args.strict and report["unused"])
+    print(
+        f"[fig-index] {len(report['figures'])} figure(s); "
+        f"{len(report['missing'])} missing, {len(report['duplicate'])} duplicate, "
+        f"{len(report['unused'])} unused, {len(report['unreferenced'])} unreferenced"
+        f" — {'OK' if ok else 'issues found'}."
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
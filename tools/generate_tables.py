@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Render the appendix tables from their data sources in data/.
+
+The parameter tables of appendix/toe_data.tex and the K-level tables of
+appendix/C_klevels_tables.tex are kept as YAML (optionally with the rows
+in a CSV file) under data/appendix/. Each table is rendered into its own
+file
+
+    appendix/tables/<name>.tex      <name> = label without "tab:", "-" → "_"
+
+which the appendix pulls in with \input{appendix/tables/<name>}. The
+schema is described at the top of data/appendix/toe_data.yaml.
+
+Rendering is cached per table: build/.cache/tables.json maps every output
+file to the hash of the table's data (plus GENERATOR_VERSION). A table
+whose hash is unchanged and whose output exists is not rendered at all;
+the others go through write_if_changed(), so only tables whose data
+really changed get a new .tex file (and a new mtime).
+
+The loaded data can be exported as JSON for numerical work; row keys that
+are not columns (central, uncertainty, unit, ...) are only exported, not
+typeset.
+
+Usage (from repo root):
+
+    python tools/generate_tables.py                  # render changed tables
+    python tools/generate_tables.py --force          # ignore the cache
+    python tools/generate_tables.py --json build/tables.json
+    python tools/generate_tables.py --json -         # export only, to stdout
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+from core_io import write_if_changed
+
+DATA_DIR = Path("data")
+OUTPUT_DIR = Path("appendix") / "tables"
+CACHE_FILE = Path("build") / ".cache" / "tables.json"
+
+# Bump when the rendered LaTeX changes for the same data.
+GENERATOR_VERSION = 1
+
+DEFAULT_PLACEMENT = "h"
+
+HEADER = """\
+% Auto-generated by tools/generate_tables.py from {source}
+% DO NOT EDIT — change the data file and rerun the generator.
+"""
+
+# Rows longer than this put their last cell on a continuation line.
+WRAP_COLUMN = 78
+
+
+class TableError(ValueError):
+    """Malformed table definition in a data file."""
+
+
+# --------------------------------------------------------------------
+# Loading
+# --------------------------------------------------------------------
+
+def output_name(label: str) -> str:
+    name = label[4:] if label.startswith("tab:") else label
+    return name.replace("-", "_").replace(":", "_")
+
+
+def _number(value: str):
+    for kind in (int, float):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
+def _read_csv(path: Path, keys):
+    try:
+        with path.open(encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = [k for k in keys if k not in (reader.fieldnames or [])]
+            if missing:
+                raise TableError(f"{path}: CSV lacks column(s) {', '.join(missing)}")
+            # Extra (non-column) CSV fields are data for the export: numbers as numbers
+            return [
+                {k: v if k in keys else _number(v) for k, v in row.items()}
+                for row in reader
+            ]
+    except FileNotFoundError:
+        raise TableError(f"{path}: CSV file not found") from None
+
+
+def _check_table(table, source: Path):
+    label = table.get("label")
+    if not label:
+        raise TableError(f"{source}: table without label")
+    columns = table.get("columns") or []
+    if not columns or any(not isinstance(c, dict) or "key" not in c for c in columns):
+        raise TableError(f"{source}: {label}: columns need a 'key' each")
+    keys = [c["key"] for c in columns]
+
+    if "csv" in table:
+        rows = _read_csv(source.parent / table["csv"], keys)
+    else:
+        rows = table.get("rows") or []
+    for i, row in enumerate(rows, 1):
+        missing = [k for k in keys if k not in row]
+        if missing:
+            raise TableError(f"{source}: {label}: row {i} lacks {', '.join(missing)}")
+
+    return {
+        "label": label,
+        "caption": table.get("caption", ""),
+        "placement": table.get("placement", DEFAULT_PLACEMENT),
+        "size": table.get("size"),
+        "row_sep": table.get("row_sep"),
+        "columns": [
+            {"key": c["key"], "header": c.get("header", c["key"]), "align": c.get("align", "l")}
+            for c in columns
+        ],
+        "rows": rows,
+        "source": source.as_posix(),
+        "output": (OUTPUT_DIR / f"{output_name(label)}.tex").as_posix(),
+    }
+
+
+def load_tables(data_dir: Path = DATA_DIR):
+    """All tables of data/**/*.yaml, in file and definition order."""
+    tables = []
+    seen = {}
+    for source in sorted(data_dir.rglob("*.yaml")):
+        try:
+            data = yaml.safe_load(source.read_text(encoding="utf-8")) or {}
+        except yaml.YAMLError as e:
+            raise TableError(f"{source}: {e}") from None
+        for raw in data.get("tables") or []:
+            table = _check_table(raw, source)
+            if table["output"] in seen:
+                raise TableError(
+                    f"{source}: {table['label']} clashes with {seen[table['output']]}"
+                )
+            seen[table["output"]] = f"{table['label']} ({source})"
+            tables.append(table)
+    return tables
+
+
+def table_hash(table) -> str:
+    h = hashlib.sha256()
+    h.update(f"v{GENERATOR_VERSION}\0".encode("ascii"))
+    h.update(json.dumps(table, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# --------------------------------------------------------------------
+# Rendering
+# --------------------------------------------------------------------
+
+def _cell(value) -> str:
+    return "" if value is None else " ".join(str(value).split())
+
+
+def _row(cells, end: str) -> str:
+    line = "    " + " & ".join(cells) + " " + end
+    if len(line) <= WRAP_COLUMN or len(cells) < 2:
+        return line
+    head = "    " + " & ".join(cells[:-1])
+    if len(head) <= WRAP_COLUMN:
+        return head + "\n        & " + cells[-1] + " " + end
+    # long text columns: one cell per line
+    return " &\n      ".join(["    " + cells[0]] + cells[1:]) + " " + end
+
+
+def render_table(table) -> str:
+    keys = [c["key"] for c in table["columns"]]
+    spec = "".join(c["align"] for c in table["columns"])
+    sep = f"\\\\[{table['row_sep']}]" if table["row_sep"] else "\\\\"
+
+    out = [HEADER.format(source=table["source"]).rstrip("\n")]
+    out.append(f"\\begin{{table}}[{table['placement']}]")
+    out.append("  \\centering")
+    out.append(f"  \\caption{{{table['caption']}}}")
+    out.append(f"  \\label{{{table['label']}}}")
+    if table["size"]:
+        out.append(f"  \\{table['size']}")
+    out.append(f"  \\begin{{tabular}}{{{spec}}}")
+    out.append("    \\hline")
+    out.append("    " + " & ".join(_cell(c["header"]) for c in table["columns"]) + " \\\\")
+    out.append("    \\hline")
+    rows = table["rows"]
+    for i, row in enumerate(rows):
+        end = sep if i < len(rows) - 1 else "\\\\"
+        out.append(_row([_cell(row[k]) for k in keys], end))
+    out.append("    \\hline")
+    out.append("  \\end{tabular}")
+    out.append("\\end{table}")
+    return "\n".join(out) + "\n"
+
+
+# --------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------
+
+def load_cache(path: Path = CACHE_FILE):
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(cache, path: Path = CACHE_FILE) -> None:
+    write_if_changed(path, json.dumps(cache, indent=1, sort_keys=True) + "\n")
+
+
+def render_all(tables, force: bool = False, cache_file: Path = CACHE_FILE):
+    """
+    Render every table whose data hash changed. Returns the list of
+    output paths that were rewritten.
+    """
+    cache = {} if force else load_cache(cache_file)
+    new_cache = {}
+    written = []
+    for table in tables:
+        digest = table_hash(table)
+        out = Path(table["output"])
+        new_cache[table["output"]] = digest
+        if cache.get(table["output"]) == digest and out.exists():
+            continue
+        if write_if_changed(out, render_table(table)):
+            print(f"[tables] {table['label']} → {out}")
+            written.append(out)
+    if new_cache != cache:
+        save_cache(new_cache, cache_file)
+    return written
+
+
+def stale_outputs(tables):
+    """Generated files in appendix/tables/ that no data file produces anymore."""
+    known = {t["output"] for t in tables}
+    return sorted(
+        p.as_posix() for p in OUTPUT_DIR.glob("*.tex") if p.as_posix() not in known
+    )
+
+
+def export(tables):
+    """JSON-ready view of the loaded data (keyed by label)."""
+    return {
+        t["label"]: {
+            "caption": t["caption"],
+            "source": t["source"],
+            "columns": [{"key": c["key"], "header": c["header"]} for c in t["columns"]],
+            "rows": t["rows"],
+        }
+        for t in tables
+    }
+
+
+# --------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Render appendix tables from data/**/*.yaml (cached per table)"
+    )
+    parser.add_argument("--data", default=str(DATA_DIR), help="Data directory")
+    parser.add_argument("--force", action="store_true", help="Ignore the render cache")
+    parser.add_argument("--json", metavar="FILE",
+                        help="Export the loaded tables as JSON ('-' = stdout)")
+    parser.add_argument("--no-render", action="store_true",
+                        help="Only load (and export) the data")
+    args = parser.parse_args()
+
+    try:
+        tables = load_tables(Path(args.data))
+    except (TableError, OSError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        text = json.dumps(export(tables), indent=1, ensure_ascii=False) + "\n"
+        if args.json == "-":
+            sys.stdout.write(text)
+        else:
+            write_if_changed(Path(args.json), text)
+            print(f"[tables] Exported {len(tables)} table(s) → {args.json}")
+
+    if args.no_render or args.json == "-":
+        return 0
+
+    written = render_all(tables, force=args.force)
+    for path in stale_outputs(tables):
+        print(f"[WARN] {path} has no data source anymore (remove it or its \\input).")
+    print(f"[tables] {len(tables)} table(s), {len(written)} rendered.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
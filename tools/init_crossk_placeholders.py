@@ -3,7 +3,9 @@
 r"""
 Init placeholder content for CrossK module files.
 
-- Defines a set of standard cross-K chapter files up to MAX_K.
+- Takes the cross-K chapter files from the crossk_master subtree of
+  master_core_structure.yaml (range/template nodes, see
+  tools/core_structure.py) — the ladder length lives only in the YAML.
 - Creates them under content/crossk/ if missing.
 - Skips crossk_master.tex and the auto-include file.
 - If a file is empty or comment-only, writes a structured placeholder.
@@ -12,23 +14,13 @@ Init placeholder content for CrossK module files.
 from pathlib import Path
 import re
 
-CROSSK_DIR = Path("content/crossk")
-
-# ------------------------------------------------------------
-# Configuration: up to which K-level do we want CrossK stubs?
-# This gives neighbour bridges: K0–K1, K1–K2, ..., K11–K12.
-# Change this ONE number if you ever extend/shrink the ladder.
-# ------------------------------------------------------------
-MAX_K = 12
+from core_io import STATS, write_if_changed
+from core_structure import load_structure
+from tex_index import load_index
 
-# Build the default list of neighbour cross-K files
-CROSSK_FILES = [
-    f"crossk_k{i}_k{i+1}.tex"
-    for i in range(MAX_K)
-]
+CROSSK_DIR = Path("content/crossk")
 
-# Plus one global file
-CROSSK_FILES.append("crossk_global_landscape.tex")
+CROSSK_NODE = "crossk_master"
 
 HEADER_TEMPLATE = r"""% ======================================================================
 % Ontology of Continua — Core 1.1
@@ -52,17 +44,6 @@ HEADER_TEMPLATE = r"""% ========================================================
 
 """
 
-def is_empty_or_comment_only(text: str) -> bool:
-    """Return True if file has no non-comment, non-whitespace content."""
-    stripped = text.strip()
-    if not stripped:
-        return True
-    # Remove LaTeX comments line by line
-    lines = [re.sub(r"%.*", "", line).strip() for line in text.splitlines()]
-    joined = "".join(lines).strip()
-    return not joined
-
-
 def make_title_from_filename(fname: str) -> str:
     """
     'crossk_k3_k4.tex' -> 'K3–K4 cross-level structure'
@@ -95,19 +76,40 @@ def make_label_from_filename(fname: str) -> str:
     return base or "generic"
 
 
+def crossk_files():
+    """
+    File names of the cross-K chapters, from the YAML structure:
+    neighbour bridges K0–K1 ... plus the global landscape.
+    """
+    master = load_structure().find(CROSSK_NODE)
+    if master is None:
+        raise SystemExit(f"{CROSSK_NODE} not found in the structure YAML")
+    return [
+        Path(node.path).name
+        for child in master.children
+        for node in child.iter_subtree()
+        if node.path and Path(node.path).parent == CROSSK_DIR
+    ]
+
+
 def main():
     if not CROSSK_DIR.exists():
         raise SystemExit(f"{CROSSK_DIR} does not exist")
 
     # Ensure all desired files at least exist
-    for fname in CROSSK_FILES:
+    for fname in crossk_files():
         path = CROSSK_DIR / fname
         if not path.exists():
-            path.write_text("% auto-created CrossK stub\n", encoding="utf-8")
+            write_if_changed(path, "% auto-created CrossK stub\n")
             print(f"Created empty stub: {fname}")
 
-    # Now walk through all .tex in content/crossk
-    tex_files = sorted(CROSSK_DIR.glob("*.tex"))
+    # Now walk through all .tex in content/crossk (emptiness comes from the
+    # shared index, so unchanged files are not re-read)
+    index = load_index()
+    tex_files = [
+        Path(rel) for rel in index.paths_under(CROSSK_DIR.as_posix())
+        if Path(rel).parent == CROSSK_DIR and rel.endswith(".tex")
+    ]
     if not tex_files:
         print("No .tex files found in content/crossk/")
         return
@@ -118,8 +120,7 @@ def main():
             print(f"Skip meta file: {fname}")
             continue
 
-        text = path.read_text(encoding="utf-8")
-        if not is_empty_or_comment_only(text):
+        if not index.files[path.as_posix()].blank:
             print(f"Keep as-is (non-empty): {fname}")
             continue
 
@@ -131,8 +132,10 @@ def main():
             title=title,
             label=label,
         )
-        path.write_text(placeholder, encoding="utf-8")
-        print(f"Initialized placeholder in: {fname}")
+        if write_if_changed(path, placeholder):
+            print(f"Initialized placeholder in: {fname}")
+
+    print(STATS.summary("[crossk]"))
 
 
 if __name__ == "__main__":
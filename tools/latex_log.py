@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+XeLaTeX log reader: file stack, page spans and structured diagnostics.
+
+TeX writes `(./content/foo.tex` to the terminal and the .log when it opens
+a file, `)` when it closes it again, and `[12]` when page 12 is shipped
+out (the printed number may restart, e.g. after roman frontmatter, so
+pages are counted as PDF page indices). Replaying these tokens with a
+stack yields, for every \input'ed file, the pages it contributed to (its
+page span) and — when the lines carry timestamps, i.e. when
+run_latex.py streams the engine's stdout in profile mode — how long TeX
+spent inside it.
+
+TeX wraps log lines at max_print_line (79) characters, which also cuts
+file names; wrapped lines are joined before tokenizing. Parentheses that
+are not file names ("(see the transcript file ...)") are balanced on the
+stack like files but not reported.
+
+    from latex_log import LogAnalyzer
+
+    tracker = LogAnalyzer(keep_spans=True)
+    for line in open("build/main.log", encoding="utf-8", errors="replace"):
+        tracker.feed(line)
+    for span in tracker.finish():
+        print(span.path, span.first_page, span.last_page)
+
+FileStackTracker alone tokenizes every line, including the text TeX
+prints after an Overfull/Underfull box or a `!` error; a `(` there would
+push a file that was never opened. Spans of real logs are therefore
+read through LogAnalyzer, which builds on the same stack to attribute
+diagnostics to the file (and line) they belong to:
+
+  error               `! ...` or `./content/x.tex:12: ...` (-file-line-error),
+                      line from the message or the `l.12` context line
+  overfull/underfull  \hbox/\vbox messages, "at lines 3--5" → line 3
+  undefined-reference LaTeX Warning: Reference `x' ... on input line N
+  undefined-citation  LaTeX/biblatex Warning: Citation `x' ... undefined
+  warning             any other LaTeX/Package/Class Warning (multi-line
+                      "(pkg)   ..." continuations are joined)
+
+The log is read line by line and every diagnostic is handed to a sink as
+soon as it is complete, so memory stays constant in the size of the log
+(counters per kind and per file only). Error context, help text and box
+contents are not tokenized, so their parentheses cannot corrupt the stack.
+
+CLI (from repo root):
+
+    python tools/latex_log.py                          # build/main.log
+    python tools/latex_log.py build/main.log --json build/main.log.json
+    python tools/latex_log.py --format github          # ::error file=...::
+    python tools/latex_log.py --spans                  # page spans per file
+
+Exit code: 1 if the log contains errors (with --strict also on undefined
+references/citations), 0 otherwise.
+"""
+
+import argparse
+import json
+import re
+import sys
+
+MAX_PRINT_LINE = 79
+# A run of wrapped lines longer than this is tokenized anyway (bounded memory).
+MAX_JOINED_LINE = 64 * 1024
+
+# '(' + file name, ')' or a shipped page '[12' (the page number may be
+# followed by '{map}', '<image>', ']' or a line break).
+TOKEN_RE = re.compile(r"\((?P<file>[^\s()\[\]{}\"]*)|(?P<close>\))|\[(?P<page>\d+)(?=[\]\s{<]|$)")
+# A path ("./x", "/x", "../x", "C:/x") or a bare "name.ext" — not "12.0pt".
+FILE_RE = re.compile(r"^(?:\.{0,2}/|[A-Za-z]:[\\/])\S+$|^[A-Za-z][\w.-]*\.[A-Za-z]\w*$")
+
+# Diagnostics
+FILE_LINE_ERROR_RE = re.compile(r"^(?P<file>(?:\.{0,2}/)?[^\s:()\[\]]+):(?P<line>\d+): (?P<msg>.*)$")
+CONTEXT_LINE_RE = re.compile(r"^l\.(?P<line>\d+)\b")
+BOX_RE = re.compile(r"^(?P<kind>Overfull|Underfull) \\[hv]box \((?P<amount>[^)]*)\)(?P<rest>.*)$")
+BOX_LINE_RE = re.compile(r"at lines? (\d+)")
+WARNING_RE = re.compile(
+    r"^(?:(?P<latex>LaTeX)|LaTeX (?P<sub>Font|Info)|Package (?P<pkg>\S+)|Class (?P<cls>\S+)) "
+    r"Warning: (?P<msg>.*)$"
+)
+INPUT_LINE_RE = re.compile(r"on input line (\d+)")
+UNDEFINED_RE = re.compile(r"^(?P<what>Reference|Citation) [`'](?P<key>[^']*)' (?:on page \d+ )?undefined")
+# Stop waiting for `l.NN` after this many lines of an error message.
+MAX_ERROR_CONTEXT = 20
+
+
+class FileSpan:
+    """Pages (and optionally time) attributed to one opening of a file."""
+
+    __slots__ = ("path", "depth", "first_page", "last_page", "start", "end", "child_time")
+
+    def __init__(self, path, depth, first_page, start):
+        self.path = path
+        self.depth = depth          # 0 = opened at top level (the root file)
+        self.first_page = first_page
+        self.last_page = first_page
+        self.start = start          # timestamp of the opening line (or None)
+        self.end = None
+        self.child_time = 0.0       # time spent in nested files
+
+    @property
+    def pages(self) -> int:
+        return self.last_page - self.first_page + 1
+
+    @property
+    def elapsed(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    @property
+    def self_time(self):
+        elapsed = self.elapsed
+        return None if elapsed is None else max(0.0, elapsed - self.child_time)
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "depth": self.depth,
+            "first_page": self.first_page,
+            "last_page": self.last_page,
+            "start": self.start,
+            "end": self.end,
+            "self_time": self.self_time,
+        }
+
+
+def normalize(path: str) -> str:
+    return path[2:] if path.startswith("./") else path
+
+
+class FileStackTracker:
+    """
+    Incremental parser: feed() log lines in order (with an optional
+    timestamp each), then finish() returns the FileSpans in opening order.
+    Memory is bounded by the include depth plus the number of spans.
+    """
+
+    def __init__(self, max_print_line: int = MAX_PRINT_LINE, keep_spans: bool = True):
+        self.max_print_line = max_print_line
+        self.keep_spans = keep_spans
+        self.stack = []             # FileSpan or None (plain parenthesis)
+        self.spans = []
+        self.shipped = 0            # pages shipped out so far (PDF page index)
+        self._pending = ""          # wrapped line waiting for its continuation
+        self._pending_time = None
+
+    def feed(self, line: str, timestamp=None) -> None:
+        line = line.rstrip("\r\n")
+        if self._pending:
+            line = self._pending + line
+            timestamp = self._pending_time if timestamp is None else timestamp
+            self._pending = ""
+        if line and len(line) % self.max_print_line == 0 and len(line) < MAX_JOINED_LINE:
+            # Wrapped at max_print_line: the token may continue on the next line.
+            self._pending = line
+            self._pending_time = timestamp
+            return
+        self.line(line, timestamp)
+
+    def line(self, line: str, timestamp) -> None:
+        """One logical (unwrapped) log line; subclasses filter here."""
+        self._tokens(line, timestamp)
+
+    def current_file(self):
+        """Innermost open file, or None."""
+        for span in reversed(self.stack):
+            if span is not None:
+                return span.path
+        return None
+
+    def _tokens(self, line: str, timestamp) -> None:
+        if "(" not in line and ")" not in line and "[" not in line:
+            return
+        for m in TOKEN_RE.finditer(line):
+            kind = m.lastgroup
+            if kind == "page":
+                self.shipped += 1
+            elif kind == "close":
+                if self.stack:
+                    self._close(self.stack.pop(), timestamp)
+            else:
+                name = m.group("file")
+                if name and FILE_RE.match(name):
+                    depth = sum(1 for s in self.stack if s is not None)
+                    span = FileSpan(normalize(name), depth, self.shipped + 1, timestamp)
+                    if self.keep_spans:
+                        self.spans.append(span)
+                    self.stack.append(span)
+                else:
+                    self.stack.append(None)
+
+    def _close(self, span, timestamp) -> None:
+        if span is None:
+            return
+        span.last_page = max(span.first_page, self.shipped)
+        span.end = timestamp
+        elapsed = span.elapsed
+        if elapsed is not None:
+            for parent in reversed(self.stack):
+                if parent is not None:
+                    parent.child_time += elapsed
+                    break
+
+    def finish(self, timestamp=None):
+        """Flush a pending wrapped line, close what is still open, return spans."""
+        if self._pending:
+            line, self._pending = self._pending, ""
+            self.line(line, self._pending_time)
+        while self.stack:
+            self._close(self.stack.pop(), timestamp)
+        return self.spans
+
+
+class Diagnostic:
+    """One error/warning attributed to a source file."""
+
+    __slots__ = ("kind", "severity", "file", "line", "page", "message", "key")
+
+    def __init__(self, kind, severity, file, line, page, message, key=None):
+        self.kind = kind
+        self.severity = severity    # "error" | "warning"
+        self.file = file
+        self.line = line
+        self.page = page            # page being built when it was reported
+        self.message = message
+        self.key = key              # label/citation key for undefined-*
+
+    def location(self) -> str:
+        if self.file is None:
+            return "[log]"
+        return f"{self.file}:{self.line}" if self.line else self.file
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class LogAnalyzer(FileStackTracker):
+    """
+    FileStackTracker that also recognizes diagnostics. Each complete
+    Diagnostic is passed to sink(diagnostic); only counters are kept.
+    """
+
+    def __init__(self, sink=None, max_print_line: int = MAX_PRINT_LINE, keep_spans: bool = False):
+        super().__init__(max_print_line, keep_spans=keep_spans)
+        self.sink = sink
+        self.counts = {}            # kind → n
+        self.per_file = {}          # file → n
+        self._open = None           # diagnostic that may continue ("(pkg)  ...")
+        self._continuation = None
+        self._error_diag = None     # error waiting for its `l.NN` context line
+        self._skip = None           # "error" | "context" | "box": lines not tokenized
+        self._skip_lines = 0
+
+    # ---------------- line dispatch ----------------
+
+    def line(self, line: str, timestamp) -> None:
+        if self._open is not None:
+            if self._continuation and line.startswith(self._continuation):
+                self._open.message += " " + line[len(self._continuation):].strip()
+                return
+            self._emit(self._open)
+
+        if self._skip is not None and self._skipped(line):
+            return
+
+        # Cheap substring tests first: most lines are none of these.
+        if ": " in line:
+            m = FILE_LINE_ERROR_RE.match(line)
+            if m and not line.startswith(("l.", "<")):
+                self._error(m.group("msg"), normalize(m.group("file")), int(m.group("line")))
+                return
+            if " Warning: " in line:
+                m = WARNING_RE.match(line)
+                if m:
+                    self._warning(m)
+                    return
+        if line.startswith("! "):
+            self._error(line[2:], self.current_file(), None)
+            return
+        if line.startswith(("Overfull", "Underfull")):
+            m = BOX_RE.match(line)
+            if m:
+                self._box(m)
+                return
+        self._tokens(line, timestamp)
+
+    def _skipped(self, line: str) -> bool:
+        """Consume error context / box contents; True if the line is used up."""
+        if self._skip == "error":
+            m = CONTEXT_LINE_RE.match(line)
+            self._skip_lines += 1
+            if m:
+                d = self._error_diag
+                if d is not None and d.line is None:
+                    d.line = int(m.group("line"))
+                self._flush_error()
+                self._skip = "context"
+                return True
+            if self._skip_lines > MAX_ERROR_CONTEXT:
+                self._flush_error()
+                self._skip = None
+                return False
+            return True
+        # "context" (the two l.NN lines) and "box" (box contents) end at a blank line
+        if not line.strip():
+            self._skip = None
+        return True
+
+    # ---------------- kinds ----------------
+
+    def _error(self, msg: str, file, line) -> None:
+        self._flush_error()
+        self._skip, self._skip_lines = "error", 0
+        if msg.startswith("==> Fatal error occurred") or (
+            msg == "Emergency stop." and self.counts.get("error")
+        ):
+            return                  # consequences of the error already reported
+        self._error_diag = Diagnostic("error", "error", file, line, self.shipped + 1, msg)
+
+    def _flush_error(self) -> None:
+        if self._error_diag is not None:
+            d, self._error_diag = self._error_diag, None
+            self._emit(d)
+
+    def _box(self, m) -> None:
+        kind = m.group("kind").lower()
+        rest = m.group("rest").strip()
+        line = BOX_LINE_RE.search(rest)
+        msg = m.group(0).strip()
+        self._open = Diagnostic(kind, "warning", self.current_file(),
+                                int(line.group(1)) if line else None, self.shipped + 1, msg)
+        self._continuation = None
+        if "paragraph" in rest or "alignment" in rest or "detected at" in rest:
+            self._skip = "box"
+
+    def _warning(self, m) -> None:
+        source = m.group("pkg") or m.group("cls") or m.group("sub")
+        self._continuation = f"({source})" if source else None
+        self._open = Diagnostic("warning", "warning", self.current_file(), None,
+                                self.shipped + 1, m.group("msg").strip())
+
+    def _emit(self, d: Diagnostic) -> None:
+        if d is self._open:
+            self._open = None
+        if d.kind == "warning":
+            undefined = UNDEFINED_RE.match(d.message)
+            if undefined:
+                d.kind = f"undefined-{undefined.group('what').lower()}"
+                d.key = undefined.group("key")
+            line = INPUT_LINE_RE.search(d.message)
+            if line:
+                d.line = int(line.group(1))
+        self.counts[d.kind] = self.counts.get(d.kind, 0) + 1
+        if d.file is not None:
+            self.per_file[d.file] = self.per_file.get(d.file, 0) + 1
+        if self.sink is not None:
+            self.sink(d)
+
+    def finish(self, timestamp=None):
+        super().finish(timestamp)
+        if self._open is not None:
+            self._emit(self._open)
+        self._flush_error()
+        return self.spans
+
+    # ---------------- results ----------------
+
+    @property
+    def errors(self) -> int:
+        return self.counts.get("error", 0)
+
+    def summary(self, top: int = 10):
+        worst = sorted(self.per_file.items(), key=lambda kv: (-kv[1], kv[0]))[:top]
+        return {
+            "counts": dict(sorted(self.counts.items())),
+            "pages": self.shipped,
+            "files": [{"file": f, "diagnostics": n} for f, n in worst],
+        }
+
+    def summary_line(self, log) -> str:
+        c = self.counts
+        return (
+            f"[log] {log}: {c.get('error', 0)} error(s), "
+            f"{c.get('undefined-reference', 0)} undefined reference(s), "
+            f"{c.get('undefined-citation', 0)} undefined citation(s), "
+            f"{c.get('overfull', 0)} overfull, {c.get('underfull', 0)} underfull, "
+            f"{c.get('warning', 0)} other warning(s), {self.shipped} page(s)"
+        )
+
+
+class JsonReport:
+    """Streams diagnostics into a JSON document (constant memory)."""
+
+    def __init__(self, out, log):
+        self.out = out
+        self.first = True
+        out.write('{"log": %s, "diagnostics": [' % json.dumps(str(log)))
+
+    def __call__(self, d: Diagnostic) -> None:
+        self.out.write(("\n " if self.first else ",\n ") + json.dumps(d.as_dict()))
+        self.first = False
+
+    def close(self, summary) -> None:
+        self.out.write('\n], "summary": %s}\n' % json.dumps(summary))
+
+
+def format_text(d: Diagnostic) -> str:
+    return f"{d.location()}: {d.kind}: {d.message}"
+
+
+def format_github(d: Diagnostic) -> str:
+    """GitHub Actions workflow command → inline PR annotation."""
+    level = "error" if d.severity == "error" else "warning"
+    where = ""
+    if d.file is not None and not d.file.startswith("/"):
+        where = f" file={d.file}" + (f",line={d.line}" if d.line else "")
+    msg = d.message.replace("%", "%25").replace("\r", "%0D").replace("\n", "%0A")
+    return f"::{level}{where}::{d.kind}: {msg}"
+
+
+def analyze(path, sink=None) -> LogAnalyzer:
+    """Stream one log file through a LogAnalyzer."""
+    analyzer = LogAnalyzer(sink)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            analyzer.feed(line)
+    analyzer.finish()
+    return analyzer
+
+
+def print_diagnostics(path, limit: int = 20) -> LogAnalyzer:
+    """Print the first `limit` errors/undefined refs (e.g. after a failed pass)."""
+    shown = [0]
+
+    def sink(d):
+        if d.kind in ("overfull", "underfull", "warning") or shown[0] >= limit:
+            return
+        shown[0] += 1
+        print(format_text(d))
+
+    analyzer = analyze(path, sink)
+    print(analyzer.summary_line(path))
+    return analyzer
+
+
+def read_spans(path):
+    # LogAnalyzer, not FileStackTracker: box and error text is not tokenized
+    tracker = LogAnalyzer(keep_spans=True)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            tracker.feed(line)
+    return tracker.finish()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Structured diagnostics from a XeLaTeX log")
+    parser.add_argument("log", nargs="?", default="build/main.log")
+    parser.add_argument("--json", metavar="PATH", help="Write all diagnostics as JSON ('-' for stdout)")
+    parser.add_argument("--format", choices=("text", "github"), default="text",
+                        help="Printed diagnostics: file:line (text) or GitHub annotations")
+    parser.add_argument("--max", type=int, default=50, help="Print at most this many diagnostics")
+    parser.add_argument("--boxes", action="store_true", help="Also print overfull/underfull boxes")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit 1 on undefined references/citations too")
+    parser.add_argument("--spans", action="store_true", help="Print the page span of every file instead")
+    parser.add_argument("--all", action="store_true",
+                        help="With --spans: also list files outside the repo (packages, fonts)")
+    args = parser.parse_args()
+
+    if args.spans:
+        try:
+            spans = read_spans(args.log)
+        except OSError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            return 1
+        for span in spans:
+            if not args.all and span.path.startswith("/"):
+                continue                # TeX distribution files
+            indent = "  " * span.depth
+            print(f"{span.first_page:>5}-{span.last_page:<5} {indent}{span.path}")
+        return 0
+
+    fmt = format_github if args.format == "github" else format_text
+    console = sys.stderr if args.json == "-" else sys.stdout
+    shown = [0]
+    out = report = None
+    if args.json:
+        out = sys.stdout if args.json == "-" else open(args.json, "w", encoding="utf-8")
+        report = JsonReport(out, args.log)
+
+    def sink(d):
+        if report is not None:
+            report(d)
+        if d.kind in ("overfull", "underfull") and not args.boxes:
+            return
+        if shown[0] < args.max:
+            shown[0] += 1
+            print(fmt(d), file=console)
+
+    try:
+        analyzer = analyze(args.log, sink)
+    except OSError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    if report is not None:
+        report.close(analyzer.summary())
+        if out is not sys.stdout:
+            out.close()
+
+    print(analyzer.summary_line(args.log), file=console)
+    failed = analyzer.errors or (
+        args.strict and (analyzer.counts.get("undefined-reference") or analyzer.counts.get("undefined-citation"))
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Brace-aware, linear-time LaTeX command scanner shared by the tools/ scripts.
+
+The historical regexes (`\section\*?\{([^}]*)\}` and friends) stop at the
+first `}`, so `\section{The $\mathcal{K}_{3}$ level}` was only partially
+seen, and DOTALL variants could backtrack on large files. This module
+walks the text once:
+
+  • comments (`%` to end of line, unless escaped) are skipped, and so
+    are verbatim-like environments and `\verb|...|` (an \input shown in
+    a verbatim block is not an include),
+  • control words are read with one anchored regex,
+  • for the requested commands, an optional `*`, any number of `[...]`
+    optional arguments and one `{...}` mandatory argument are parsed
+    with brace balancing (`\{`, `\}` and `\\` are escapes; `%` inside an
+    argument starts a comment as in TeX).
+
+Brace groups are matched once per file with a stack (_brace_groups), so
+finding the end of an argument is a lookup and a file costs O(n) however
+the braces nest, unterminated brace groups included. Only a '{' that the
+stack pass tokenized differently (e.g. one that follows verbatim text
+containing a stray backslash or '%') falls back to a direct scan.
+
+    from latex_scan import iter_commands
+
+    for cmd in iter_commands(text, {"section", "caption"}):
+        print(cmd.name, cmd.star, cmd.arg, cmd.arg_start, cmd.arg_end)
+
+replace_args() rewrites the mandatory arguments of matching commands in
+one pass (used by fix_math_in_headings.py for \texorpdfstring);
+read_args() parses the arguments at a given offset (preview_html.py).
+resolve_tex() maps an \input argument to the file TeX would open.
+"""
+
+import bisect
+import re
+from pathlib import Path
+
+# Next interesting position for the top-level scan.
+SPECIAL_RE = re.compile(r"[\\%]")
+# Next interesting position inside an argument.
+ARG_SPECIAL_RE = re.compile(r"[\\%{}\[\]]")
+BRACE_SPECIAL_RE = re.compile(r"[\\%{}]")
+CONTROL_WORD_RE = re.compile(r"[A-Za-z]+")
+SPACE_RE = re.compile(r"[ \t]*\n?[ \t]*")
+
+# Environments whose body is not scanned for commands.
+VERBATIM_ENVS = {"verbatim", "verbatim*", "Verbatim", "lstlisting", "minted", "comment"}
+BEGIN_ENV_RE = re.compile(r"\s*\{([A-Za-z*]+)\}")
+
+
+class Command:
+    """One command occurrence with its parsed arguments."""
+
+    __slots__ = ("name", "star", "options", "arg", "start", "end", "arg_start", "arg_end")
+
+    def __init__(self, name, star, options, arg, start, end, arg_start, arg_end):
+        self.name = name
+        self.star = star
+        self.options = options      # list of [...] contents
+        self.arg = arg              # mandatory {...} content, braces stripped
+        self.start = start          # offset of the backslash
+        self.end = end              # offset after the closing brace
+        self.arg_start = arg_start  # offset after '{'
+        self.arg_end = arg_end      # offset of the matching '}'
+
+    def __repr__(self):
+        star = "*" if self.star else ""
+        return f"Command(\\{self.name}{star}{{{self.arg}}} @ {self.start})"
+
+
+def _skip_comment(text: str, i: int) -> int:
+    """i points at '%'; return the offset after the end of the line."""
+    nl = text.find("\n", i)
+    return len(text) if nl < 0 else nl + 1
+
+
+def _group_end(text: str, i: int, close: str) -> int:
+    """
+    i points just after an opening '{' or '['; return the offset of the
+    matching closer, or -1 if the group is unterminated. Braces nest;
+    inside '[...]' only a top-level ']' closes.
+    """
+    depth = 0
+    n = len(text)
+    while i < n:
+        m = ARG_SPECIAL_RE.search(text, i)
+        if not m:
+            return -1
+        i = m.start()
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "%":
+            i = _skip_comment(text, i)
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            if depth == 0:
+                return i if close == "}" else -1
+            depth -= 1
+        elif ch == "]" and close == "]" and depth == 0:
+            return i
+        i += 1
+    return -1
+
+
+def _brace_groups(text: str) -> dict:
+    """
+    One stack pass over the whole text with the tokenization of
+    _group_end(): offset after each '{' → offset of its matching '}',
+    or -1 if it is never closed. A group's end depends only on the text
+    after it, so this equals _group_end(text, i, "}") for every key i.
+    """
+    groups = {}
+    stack = []
+    i = 0
+    n = len(text)
+    while i < n:
+        m = BRACE_SPECIAL_RE.search(text, i)
+        if not m:
+            break
+        i = m.start()
+        ch = text[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "%":
+            i = _skip_comment(text, i)
+            continue
+        if ch == "{":
+            groups[i + 1] = -1
+            stack.append(i + 1)
+        elif stack:
+            groups[stack.pop()] = i
+        i += 1
+    return groups
+
+
+def _parse_args(text: str, i: int, mandatory: bool = True, groups=None):
+    """
+    Parse `*`, `[...]`* and `{...}` starting at i (after the control
+    word). Returns (star, options, arg_start, arg_end) or None. With
+    mandatory=False a missing `{...}` gives (star, options, None, i), i
+    after the last option. `groups` is an optional _brace_groups() table.
+    """
+    star = False
+    if text.startswith("*", i):
+        star = True
+        i += 1
+    options = []
+    while True:
+        i = SPACE_RE.match(text, i).end()
+        if text.startswith("[", i):
+            close = _group_end(text, i + 1, "]")
+            if close < 0:
+                return None
+            options.append(text[i + 1:close])
+            i = close + 1
+            continue
+        break
+    if not text.startswith("{", i):
+        return None if mandatory else (star, options, None, i)
+    if groups is not None and i + 1 in groups:
+        close = groups[i + 1]
+    else:
+        close = _group_end(text, i + 1, "}")
+    if close < 0:
+        return None
+    return star, options, i + 1, close
+
+
+def read_args(text: str, i: int, mandatory: bool = True):
+    """
+    Arguments of the command whose control word ends at i, for converters
+    that walk the text themselves: (star, options, arg, end) with `end`
+    after the consumed text, arg None if optional and absent, or None if
+    the mandatory argument is missing or unterminated.
+    """
+    parsed = _parse_args(text, i, mandatory)
+    if parsed is None:
+        return None
+    star, options, arg_start, arg_end = parsed
+    if arg_start is None:
+        # nothing after the control word but options: keep the spacing
+        return star, options, None, arg_end if options or star else i
+    return star, options, text[arg_start:arg_end], arg_end + 1
+
+
+def iter_commands(text: str, names):
+    """Yield Command objects for every `\\name` in `names`, in text order."""
+    i = 0
+    n = len(text)
+    groups = None               # built on the first candidate command
+    while i < n:
+        m = SPECIAL_RE.search(text, i)
+        if not m:
+            return
+        i = m.start()
+        if text[i] == "%":
+            i = _skip_comment(text, i)
+            continue
+        word = CONTROL_WORD_RE.match(text, i + 1)
+        if not word:
+            i += 2              # control symbol such as \% or \\
+            continue
+        name = word.group(0)
+        i = word.end()
+        if name == "verb":
+            # \verb<d>...<d>: skip to the closing delimiter (same line)
+            j = i + 1 if text.startswith("*", i) else i
+            if j < n:
+                close = text.find(text[j], j + 1)
+                i = n if close < 0 else close + 1
+            continue
+        if name == "begin":
+            env = BEGIN_ENV_RE.match(text, i)
+            if env and env.group(1) in VERBATIM_ENVS:
+                close = text.find(f"\\end{{{env.group(1)}}}", env.end())
+                i = n if close < 0 else close
+                continue
+        if name not in names:
+            continue
+        if groups is None:
+            groups = _brace_groups(text)
+        parsed = _parse_args(text, i, groups=groups)
+        if parsed is None:
+            continue
+        star, options, arg_start, arg_end = parsed
+        yield Command(name, star, options, text[arg_start:arg_end],
+                      m.start(), arg_end + 1, arg_start, arg_end)
+        # Continue inside the argument: nested commands (e.g. a \label in
+        # a \caption) are reported as well.
+        i = arg_start
+
+
+def replace_args(text: str, names, fn) -> str:
+    """
+    Return text with the mandatory argument of every matching command
+    replaced by fn(command). Nested matches inside a replaced argument
+    are left to fn.
+    """
+    out = []
+    pos = 0
+    for cmd in iter_commands(text, names):
+        if cmd.arg_start < pos:
+            continue            # nested inside an argument already replaced
+        out.append(text[pos:cmd.arg_start])
+        out.append(fn(cmd))
+        pos = cmd.arg_end
+    out.append(text[pos:])
+    return "".join(out)
+
+
+def resolve_tex(name: str, root: Path):
+    """
+    Resolve an \\input argument the way TeX does for our tree:
+    'name.tex' first (unless an extension is given), then 'name' as-is.
+    """
+    name = name.strip()
+    candidates = [name] if name.endswith(".tex") else [name + ".tex", name]
+    for c in candidates:
+        p = root / c
+        if p.is_file():
+            return p
+    return None
+
+
+class LineMap:
+    """Offset → 1-based line number, via binary search over newlines."""
+
+    def __init__(self, text: str):
+        self._newlines = [m.start() for m in re.finditer("\n", text)]
+
+    def line(self, offset: int) -> int:
+        return bisect.bisect_left(self._newlines, offset) + 1
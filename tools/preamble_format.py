@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Precompile preamble.tex into a dumped XeLaTeX format (mylatexformat).
+
+Every XeLaTeX pass normally re-executes preamble.tex (fontspec,
+polyglossia, TikZ, hyperref, biblatex, ...). This tool dumps that work
+once into build/fmt/core-preamble.fmt and generates roots that load it:
+
+    python tools/preamble_format.py            # (re)build format if stale
+    python tools/preamble_format.py --force    # always rebuild
+    ./build_core.sh --format                   # use it for all passes
+
+XeTeX cannot dump OpenType (native) fonts, so font declarations
+(\setmainfont, \newfontfamily, ...) are split off and executed after
+\endofdump on every run; everything else in preamble.tex is dumped.
+
+Generated files (all under build/fmt/):
+
+  core-preamble.tex   preamble.tex without the font declarations
+  core-fonts.tex      the font declarations, in original order
+  core-format.tex     \documentclass + core-preamble + \endofdump
+  core-preamble.fmt   the dumped format
+  format.json         cache key: preamble hash + engine version
+  main.tex            main.tex with \input{preamble} replaced by the
+                      format-aware block (jobname "main", output build/)
+
+The format is rebuilt whenever preamble.tex, main.tex's \documentclass
+line or the engine version (`xelatex --version`) change.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from core_io import write_if_changed
+
+ENGINE = "xelatex"
+ENTRYPOINT = Path("main.tex")
+PREAMBLE = Path("preamble.tex")
+FMT_DIR = Path("build") / "fmt"
+FORMAT_NAME = "core-preamble"
+KEY_FILE = FMT_DIR / "format.json"
+
+# Bump when the generated files change shape.
+FORMAT_VERSION = 1
+
+DOCUMENTCLASS_RE = re.compile(r"^\s*\\documentclass.*$", re.MULTILINE)
+PREAMBLE_INPUT_RE = re.compile(r"^[ \t]*\\input\{preamble(?:\.tex)?\}[ \t]*$", re.MULTILINE)
+
+# Commands that load native fonts and therefore cannot be dumped.
+DEFERRED_RE = re.compile(
+    r"^\s*\\(?:setmainfont|setsansfont|setmonofont|setmathfont"
+    r"|newfontfamily|newfontface|setfontfamily|renewfontfamily)\b"
+)
+
+
+def split_preamble(text: str):
+    """
+    Return (dumpable, deferred) preamble text. Deferred commands may span
+    several lines; they end when their braces/brackets are balanced.
+    """
+    dumpable, deferred = [], []
+    depth = 0
+    for line in text.splitlines():
+        if depth > 0 or DEFERRED_RE.match(line):
+            deferred.append(line)
+            code = re.sub(r"(?<!\\)%.*", "", line)
+            depth += code.count("{") + code.count("[") - code.count("}") - code.count("]")
+            depth = max(depth, 0)
+        else:
+            dumpable.append(line)
+    return "\n".join(dumpable) + "\n", "\n".join(deferred) + "\n"
+
+
+def read_documentclass() -> str:
+    m = DOCUMENTCLASS_RE.search(ENTRYPOINT.read_text(encoding="utf-8"))
+    if not m:
+        raise SystemExit(f"{ENTRYPOINT}: kein \\documentclass gefunden.")
+    return m.group(0).strip()
+
+
+def engine_version(engine: str = ENGINE) -> str:
+    out = subprocess.run([engine, "--version"], capture_output=True, text=True, check=True)
+    return out.stdout.splitlines()[0].strip() if out.stdout else ""
+
+
+def format_key(documentclass: str, preamble: str, version: str) -> str:
+    h = hashlib.sha256()
+    for part in (str(FORMAT_VERSION), documentclass, preamble, version):
+        h.update(part.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+def preamble_block() -> str:
+    r"""Replacement for '\input{preamble}' in roots that use the format."""
+    return (
+        f"\\input{{{(FMT_DIR / 'core-preamble').as_posix()}}}\n"
+        "\\endofdump\n"
+        f"\\input{{{(FMT_DIR / 'core-fonts').as_posix()}}}"
+    )
+
+
+def job_options():
+    """LatexJob keyword arguments that make XeLaTeX load the dumped format."""
+    return {
+        "engine_args": [f"-fmt={FORMAT_NAME}"],
+        # Trailing separator keeps the default format search path.
+        "env": {"TEXFORMATS": f"{FMT_DIR.as_posix()}:"},
+    }
+
+
+def ensure_format(engine: str = ENGINE, force: bool = False) -> bool:
+    """Build the format if stale. Returns True if it was (re)built."""
+    documentclass = read_documentclass()
+    preamble = PREAMBLE.read_text(encoding="utf-8")
+    key = format_key(documentclass, preamble, engine_version(engine))
+
+    fmt = FMT_DIR / f"{FORMAT_NAME}.fmt"
+    try:
+        cached = json.loads(KEY_FILE.read_text(encoding="utf-8")).get("key")
+    except (OSError, ValueError):
+        cached = None
+    if not force and cached == key and fmt.exists():
+        print(f"[format] {fmt} is up to date.")
+        return False
+
+    FMT_DIR.mkdir(parents=True, exist_ok=True)
+    dumpable, deferred = split_preamble(preamble)
+    write_if_changed(FMT_DIR / "core-preamble.tex", dumpable)
+    write_if_changed(FMT_DIR / "core-fonts.tex", deferred)
+    source = FMT_DIR / "core-format.tex"
+    write_if_changed(
+        source,
+        f"{documentclass}\n"
+        f"\\input{{{(FMT_DIR / 'core-preamble').as_posix()}}}\n"
+        "\\endofdump\n",
+    )
+
+    print(f"[format] Dumping {PREAMBLE} into {fmt} ...")
+    subprocess.run(
+        [
+            engine,
+            "-ini",
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            f"-jobname={FORMAT_NAME}",
+            f"-output-directory={FMT_DIR}",
+            f"&{engine}",
+            "mylatexformat.ltx",
+            source.as_posix(),
+        ],
+        check=True,
+    )
+    write_if_changed(KEY_FILE, json.dumps({"key": key}, indent=1))
+    return True
+
+
+def write_root(body_source: Path = ENTRYPOINT, target: Path = FMT_DIR / "main.tex") -> Path:
+    r"""Copy a root .tex with its '\input{preamble}' line replaced."""
+    text = body_source.read_text(encoding="utf-8")
+    new, count = PREAMBLE_INPUT_RE.subn(lambda _: preamble_block(), text, count=1)
+    if count == 0:
+        raise SystemExit(f"{body_source}: \\input{{preamble}} nicht gefunden.")
+    write_if_changed(target, new)
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Precompile preamble.tex into a cached XeLaTeX format"
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    parser.add_argument("--engine", default=ENGINE)
+    args = parser.parse_args()
+
+    try:
+        ensure_format(args.engine, force=args.force)
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] Format dump failed with exit code {e.returncode}", file=sys.stderr)
+        return e.returncode or 1
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e.filename} not found in PATH", file=sys.stderr)
+        return 127
+
+    root = write_root()
+    print(f"[format] Root using the format: {root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
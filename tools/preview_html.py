@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Fast HTML preview of the Core sources, without XeLaTeX.
+
+Reviewing prose in content/ should not need a full XeLaTeX + biber run of
+main.tex. This tool walks content/_auto_core_inputs.tex (the order
+generate_auto_inputs.py writes from master_core_structure.yaml), follows
+every \input in place and converts the LaTeX subset this repo uses:
+
+  • \section ... \paragraph       → <h2> ... <h5> (numbered by CSS
+                                    counters, starred forms unnumbered)
+  • itemize / enumerate / description → <ul> / <ol> / <dl>
+  • table + tabular, figure        → <figure> with <table> / a placeholder
+                                    for the TikZ or image source, caption
+  • \label / \ref, \eqref, \cref   → anchors and links; the link text is
+                                    the heading the label belongs to (from
+                                    the shared .tex index), else the label
+  • inline and display math        → passed through unchanged (HTML
+                                    escaped) to MathJax in the browser; the
+                                    preamble's \providecommand /
+                                    \DeclareMathOperator macros are handed
+                                    to MathJax as well
+  • \emph, \textbf, \texttt, \cite, \footnote, verbatim, TeX dashes and
+    quotes; unknown commands keep their argument text.
+
+Every file is converted on its own into an HTML fragment; \input and
+\ref stay as markers in the fragment and are resolved while the page is
+assembled. Fragments are cached by file SHA-256 (taken from the .tex
+index) in build/.cache/preview_fragments.pickle, so after an edit only
+that file is converted again, and the page is streamed fragment by
+fragment into build/preview/index.html.
+
+Not a typesetter: counters, cross-reference numbers, bibliography and
+figures are only hinted at — the PDF from ./build_core.sh stays the
+reference.
+
+Usage (from repo root):
+
+    python tools/preview_html.py                     # build/preview/index.html
+    python tools/preview_html.py --only content/k_levels/
+    python tools/preview_html.py --entry main.tex    # whole document
+    python tools/preview_html.py --force             # ignore the fragment cache
+"""
+
+import argparse
+import html
+import json
+import os
+import pickle
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from core_io import atomic_open, write_bytes_if_changed
+from latex_scan import read_args, resolve_tex
+from tex_index import COMMAND_KINDS, COMMENT_RE, PARALLEL_THRESHOLD, load_index
+
+DEFAULT_ENTRY = "content/_auto_core_inputs.tex"
+OUTPUT_FILE = Path("build") / "preview" / "index.html"
+CACHE_FILE = Path("build") / ".cache" / "preview_fragments.pickle"
+PREAMBLE = Path("preamble.tex")
+
+# Bump when the generated HTML changes for the same source.
+RENDER_VERSION = 1
+
+MATHJAX_URL = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"
+
+# A \label this many lines below a heading names it.
+LABEL_SPAN = 2
+
+HEADINGS = {
+    "section": "h2", "subsection": "h3", "subsubsection": "h4",
+    "paragraph": "h5", "subparagraph": "h6",
+}
+LISTS = {"itemize": "ul", "enumerate": "ol", "description": "dl"}
+FLOATS = {"figure": "figure", "figure*": "figure", "table": "table", "table*": "table"}
+WRAP = {
+    "emph": "em", "textit": "em", "textsl": "em", "textbf": "strong",
+    "texttt": "code", "textsubscript": "sub", "textsuperscript": "sup",
+    "underline": "u", "textsc": "small",
+}
+REFS = {"ref", "autoref", "cref", "Cref", "nameref", "pageref", "eqref"}
+# the cite family of the .tex index (\nocite prints nothing, see DROP_ARGS)
+CITES = {name for name, kind in COMMAND_KINDS.items() if kind == "cite"} - {"nocite"}
+# Commands dropped together with their mandatory arguments (count).
+DROP_ARGS = {
+    "vspace": 1, "hspace": 1, "addcontentsline": 3, "setcounter": 2,
+    "addtocounter": 2, "pagestyle": 1, "thispagestyle": 1, "nocite": 1,
+    "graphicspath": 1, "setlength": 2,
+}
+# \$ stays escaped: MathJax (processEscapes) shows it as a plain dollar.
+SYMBOLS = {
+    "\\": "<br>\n", "%": "%", "&": "&amp;", "_": "_", "#": "#", "$": "\\$",
+    "{": "{", "}": "}", " ": " ", ",": "&thinsp;", "-": "", "@": "", "/": "",
+    ";": " ", "!": "",
+}
+TEXT_MACROS = {"LaTeX": "LaTeX", "TeX": "TeX", "ldots": "…", "dots": "…", "textbackslash": "\\"}
+
+# Math and verbatim are cut out before the text is converted; comments go.
+PROTECT_RE = re.compile(
+    r"\\begin\{(verbatim\*?)\}\n?(?P<verb>.*?)\\end\{\1\}"
+    r"|\\verb\*?(?P<d>[^A-Za-z\s*])(?P<inline_verb>.*?)(?P=d)"
+    r"|(?P<comment>(?<!\\)%[^\n]*)"
+    r"|(?P<display>\\begin\{(?P<env>equation|align|gather|multline|eqnarray|displaymath|flalign|alignat)"
+    r"(?P<star>\*?)\}.*?\\end\{(?P=env)(?P=star)\}|(?<!\\)\\\[.*?\\\]|(?<!\\)\$\$.*?\$\$)"
+    r"|(?P<inline>(?<!\\)\\\(.*?\\\)|(?<!\\)\$(?:\\.|[^$\\])+\$)",
+    re.S,
+)
+LABEL_RE = re.compile(r"\\label\{([^}]*)\}")
+TOKEN_RE = re.compile(r"\\([A-Za-z]+)|\\(.)|\x01(\d+)\x02|\n[ \t]*\n\s*|[{}~]|---|--|``|''", re.S)
+PIECE_RE = re.compile(r"\x01(\d+)\x02")
+MARKER_RE = re.compile(r"\x00(input|ref|eqref):([^\x00]*)\x00")
+ROW_SEP_RE = re.compile(r"\\\\(?:\s*\[[^\]]*\])?")
+CELL_SEP_RE = re.compile(r"(?<!\\)&")
+RULE_RE = re.compile(r"\\(?:hline|toprule|midrule|bottomrule|cline\{[^}]*\}|cmidrule(?:\([^)]*\))?\{[^}]*\})")
+MACRO_RE = re.compile(
+    r"\\(?:providecommand|newcommand|renewcommand|DeclareMathOperator)\*?"
+    r"\s*\{?\\([A-Za-z]+)\}?\s*\{(.*)\}\s*$"
+)
+OPERATOR_RE = re.compile(r"\\DeclareMathOperator")
+
+
+# --------------------------------------------------------------------
+# Converter
+# --------------------------------------------------------------------
+
+def _protect(text: str, pieces):
+    """Cut math/verbatim out (→ \\x01n\\x02 placeholders), drop comments."""
+
+    def sub(m):
+        if m.group("comment") is not None:
+            return ""
+        if m.group("verb") is not None:
+            pieces.append((f"<pre>{html.escape(m.group('verb'))}</pre>", True))
+        elif m.group("inline_verb") is not None:
+            pieces.append((f"<code>{html.escape(m.group('inline_verb'))}</code>", False))
+        elif m.group("display") is not None:
+            math = m.group("display")
+            anchors = "".join(_anchor(label) for label in LABEL_RE.findall(math))
+            pieces.append((f'{anchors}<div class="math">{html.escape(math, quote=False)}</div>', True))
+        else:
+            pieces.append((html.escape(m.group("inline"), quote=False), False))
+        return f"\x01{len(pieces) - 1}\x02"
+
+    return PROTECT_RE.sub(sub, text)
+
+
+def _anchor(label: str) -> str:
+    return f'<a id="{html.escape(label.strip())}"></a>'
+
+
+def _marker(kind: str, arg: str) -> str:
+    return f"\x00{kind}:{arg.strip()}\x00"
+
+
+class _Converter:
+    """One pass over a protected LaTeX text; see render_fragment()."""
+
+    def __init__(self, pieces, inline: bool = False):
+        self.pieces = pieces
+        self.inline = inline        # argument text: no paragraphs
+        self.out = []
+        self.envs = []              # [name, tag, item_open]
+        self.para = False
+
+    # -- output helpers ----------------------------------------------
+
+    def _flows(self) -> bool:
+        """Text here is wrapped in <p> (not in lists, floats, arguments)."""
+        if self.inline:
+            return False
+        return not self.envs or self.envs[-1][1] == "div"
+
+    def text(self, s: str) -> None:
+        if not s:
+            return
+        if not self.para and s.strip() and self._flows():
+            self.out.append("<p>")
+            self.para = True
+        self.out.append(s)
+
+    def block(self, s: str = "") -> None:
+        if self.para:
+            self.out.append("</p>\n")
+            self.para = False
+        if s:
+            self.out.append(s)
+
+    def sub(self, text: str) -> str:
+        """Convert an argument (inline, sharing the placeholders)."""
+        conv = _Converter(self.pieces, inline=True)
+        conv.run(text)
+        return "".join(conv.out).strip()
+
+    # -- main loop ---------------------------------------------------
+
+    def run(self, text: str) -> None:
+        i = 0
+        n = len(text)
+        while i < n:
+            m = TOKEN_RE.search(text, i)
+            if not m:
+                self.text(html.escape(text[i:], quote=False))
+                break
+            self.text(html.escape(text[i:m.start()], quote=False))
+            i = m.end()
+            tok = m.group(0)
+            if m.group(1):
+                i = self.command(m.group(1), text, i)
+            elif m.group(2) is not None:
+                self.text(SYMBOLS.get(m.group(2), html.escape(m.group(2))))
+            elif m.group(3):
+                piece, is_block = self.pieces[int(m.group(3))]
+                if is_block and not self.inline:
+                    self.block()
+                    self.out.append(f"\x01{m.group(3)}\x02\n")
+                else:
+                    self.text(f"\x01{m.group(3)}\x02")
+            elif tok in "{}":
+                continue
+            elif tok == "~":
+                self.text("&nbsp;")
+            elif tok == "---":
+                self.text("—")
+            elif tok == "--":
+                self.text("–")
+            elif tok == "``":
+                self.text("“")
+            elif tok == "''":
+                self.text("”")
+            elif self.inline or not self._flows():
+                self.out.append("\n")
+            else:
+                self.block()
+        self.close_all()
+
+    def close_all(self) -> None:
+        while self.envs:
+            self.end_env(self.envs[-1][0])
+        self.block()
+
+    # -- commands ----------------------------------------------------
+
+    def command(self, name: str, text: str, i: int) -> int:
+        """Handle \\name whose control word ends at i; return the new offset."""
+        if name == "begin":
+            args = read_args(text, i)
+            if args is None:
+                return i
+            return self.begin_env(args[2].strip(), text, args[3])
+        if name == "end":
+            args = read_args(text, i)
+            if args is None:
+                return i
+            self.end_env(args[2].strip())
+            return args[3]
+        if name == "item":
+            args = read_args(text, i, mandatory=False)
+            if args is None:        # unterminated [ — take it as text
+                self.item(None)
+                return i
+            self.item(args[1][0] if args[1] else None)
+            return args[3]
+        if name in TEXT_MACROS:
+            self.text(TEXT_MACROS[name])
+            return i
+        if name in DROP_ARGS:
+            for _ in range(DROP_ARGS[name]):
+                args = read_args(text, i)
+                if args is None:
+                    break
+                i = args[3]
+            return i
+
+        args = read_args(text, i, mandatory=False)
+        if args is None or args[2] is None:
+            # \noindent, \centering, \hline, ... (and unknown switches)
+            return i
+        star, options, arg, end = args
+
+        if name in HEADINGS:
+            tag = HEADINGS[name]
+            cls = ' class="nonum"' if star else ""
+            self.block(f"<{tag}{cls}>{self.sub(arg)}</{tag}>\n")
+        elif name == "label":
+            anchor = _anchor(arg)
+            if self.para or self.inline:
+                self.out.append(anchor)
+            else:
+                self.block(anchor + "\n")
+        elif name in REFS:
+            self.text(_marker("eqref" if name == "eqref" else "ref", arg.split(",")[0]))
+        elif name in CITES:
+            keys = ", ".join(html.escape(k.strip()) for k in arg.split(","))
+            self.text(f'<cite>[{keys}]</cite>')
+        elif name in ("input", "include"):
+            if arg.strip().startswith("figures/"):
+                self.block(f'<div class="placeholder">{html.escape(arg.strip())}</div>\n')
+            else:
+                self.block(_marker("input", arg) + "\n")
+        elif name == "includegraphics":
+            self.block(f'<div class="placeholder">{html.escape(arg.strip())}</div>\n')
+        elif name == "caption":
+            self.block(f"<figcaption>{self.sub(arg)}</figcaption>\n")
+        elif name == "footnote":
+            self.text(f'<small class="footnote">({self.sub(arg)})</small>')
+        elif name == "texorpdfstring":
+            self.text(self.sub(arg))
+            second = read_args(text, end)
+            return second[3] if second is not None else end
+        elif name == "href":
+            second = read_args(text, end)
+            if second is None:
+                self.text(self.sub(arg))
+                return end
+            self.text(f'<a href="{html.escape(arg.strip())}">{self.sub(second[2])}</a>')
+            return second[3]
+        elif name == "url":
+            url = html.escape(arg.strip())
+            self.text(f'<a href="{url}">{url}</a>')
+        elif name in WRAP:
+            tag = WRAP[name]
+            self.text(f"<{tag}>{self.sub(arg)}</{tag}>")
+        else:
+            # \text, \mbox, \title, ... and unknown commands: keep the text
+            self.text(self.sub(arg))
+        return end
+
+    # -- environments ------------------------------------------------
+
+    def begin_env(self, env: str, text: str, i: int) -> int:
+        if env == "tabular" or env == "tabular*":
+            return self.tabular(env, text, i)
+        if env in LISTS:
+            tag = LISTS[env]
+            self.block(f"<{tag}>\n")
+        elif env in FLOATS:
+            # skip the placement option
+            args = read_args(text, i, mandatory=False)
+            i = args[3] if args is not None else i
+            tag = "figure"
+            self.block(f'<figure class="{FLOATS[env]}">\n')
+        else:
+            tag = "div"
+            self.block(f'<div class="{html.escape(env)}">\n')
+        self.envs.append([env, tag, False])
+        return i
+
+    def end_env(self, env: str) -> None:
+        if not any(e[0] == env for e in self.envs):
+            return                  # \end without \begin in this file
+        while self.envs:
+            name, tag, item_open = self.envs.pop()
+            self.block()
+            if item_open:
+                self.out.append("</dd>\n" if tag == "dl" else "</li>\n")
+            self.out.append(f"</{tag}>\n")
+            if name == env:
+                return
+
+    def item(self, label) -> None:
+        top = next((e for e in reversed(self.envs) if e[1] in ("ul", "ol", "dl")), None)
+        if top is None:
+            self.text("• ")
+            return
+        # close environments left open inside the previous item
+        while self.envs[-1] is not top:
+            self.end_env(self.envs[-1][0])
+        self.block()
+        tag = top[1]
+        if top[2]:
+            self.out.append("</dd>\n" if tag == "dl" else "</li>\n")
+        top[2] = True
+        if tag == "dl":
+            self.out.append(f"<dt>{self.sub(label or '')}</dt><dd>")
+        elif label is not None:
+            self.out.append(f'<li class="labelled"><strong>{self.sub(label)}</strong> ')
+        else:
+            self.out.append("<li>")
+
+    def tabular(self, env: str, text: str, i: int) -> int:
+        args = read_args(text, i)           # column spec (tabular* has width first)
+        if args is not None:
+            i = args[3]
+            if env == "tabular*":
+                args = read_args(text, i)
+                i = args[3] if args is not None else i
+        close = text.find(f"\\end{{{env}}}", i)
+        if close < 0:
+            close = len(text)
+        body = text[i:close]
+
+        rows = ROW_SEP_RE.split(body)
+        header = len(rows) > 1 and RULE_RE.match(rows[1].lstrip()) is not None
+        self.block('<table>\n')
+        first = True
+        for raw in rows:
+            row = RULE_RE.sub("", raw).strip()
+            if not row:
+                continue
+            cell_tag = "th" if first and header else "td"
+            first = False
+            cells = "".join(
+                f"<{cell_tag}>{self.sub(cell.strip())}</{cell_tag}>"
+                for cell in CELL_SEP_RE.split(row)
+            )
+            self.out.append(f"<tr>{cells}</tr>\n")
+        self.out.append("</table>\n")
+        return min(len(text), close + len(f"\\end{{{env}}}"))
+
+
+def render_fragment(text: str) -> str:
+    r"""
+    HTML fragment of one LaTeX source. \input and \ref targets are left as
+    \x00input:arg\x00 / \x00ref:label\x00 markers for assemble().
+    """
+    pieces = []
+    conv = _Converter(pieces)
+    conv.run(_protect(text, pieces))
+    return PIECE_RE.sub(lambda m: pieces[int(m.group(1))][0], "".join(conv.out))
+
+
+def render_inline(text: str) -> str:
+    """HTML of a short LaTeX snippet (heading or caption text)."""
+    pieces = []
+    conv = _Converter(pieces, inline=True)
+    conv.run(_protect(text, pieces))
+    return PIECE_RE.sub(lambda m: pieces[int(m.group(1))][0], "".join(conv.out)).strip()
+
+
+def render_file(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f'<section class="source" data-file="{html.escape(path)}">\n' + \
+            render_fragment(f.read()) + "</section>\n"
+
+
+# --------------------------------------------------------------------
+# Fragment cache
+# --------------------------------------------------------------------
+
+def load_fragments(path: Path = CACHE_FILE):
+    try:
+        with path.open("rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return {}
+    if payload.get("version") != RENDER_VERSION:
+        return {}
+    return payload["fragments"]
+
+
+def save_fragments(fragments, path: Path = CACHE_FILE) -> None:
+    data = pickle.dumps({"version": RENDER_VERSION, "fragments": fragments},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    write_bytes_if_changed(path, data)
+
+
+def update_fragments(index, paths, force: bool = False):
+    """
+    {path: (sha256, html)} for the given files; only files whose hash
+    changed are converted. Returns (fragments, converted paths).
+    """
+    old = {} if force else load_fragments()
+    fragments = {}
+    todo = []
+    for path in paths:
+        frag = old.get(path)
+        if frag is None or frag[0] != index.files[path].sha256:
+            todo.append(path)
+        else:
+            fragments[path] = frag
+    if len(todo) >= PARALLEL_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as pool:
+            for path, frag in zip(todo, pool.map(render_file, todo, chunksize=8)):
+                fragments[path] = (index.files[path].sha256, frag)
+    else:
+        for path in todo:
+            fragments[path] = (index.files[path].sha256, render_file(path))
+    # keep fragments of files outside this walk (other --only / --entry runs)
+    merged = dict(old)
+    merged.update(fragments)
+    if todo or set(merged) != set(old):
+        save_fragments(merged)
+    return fragments, todo
+
+
+# --------------------------------------------------------------------
+# Assembly
+# --------------------------------------------------------------------
+
+def ref_titles(index):
+    """label → LaTeX source of the heading it names (figures etc. have none)."""
+    titles = {}
+    for fi in index.files.values():
+        last = None
+        for e in fi.entries:
+            if e.kind == "heading":
+                last = e
+            elif e.kind == "label" and e.arg not in titles:
+                if last is not None and 0 <= e.line - last.line <= LABEL_SPAN:
+                    titles[e.arg] = " ".join(last.arg.split())
+    return titles
+
+
+class _Refs:
+    """Resolves ref markers; link texts are converted on first use."""
+
+    def __init__(self, index):
+        self.labels = index.labels()
+        self.titles = ref_titles(index)
+        self.cache = {}
+        self.missing = set()
+
+    def link(self, kind: str, label: str) -> str:
+        key = (kind, label)
+        if key in self.cache:
+            return self.cache[key]
+        target = html.escape(label)
+        if label not in self.labels:
+            self.missing.add(label)
+            out = f'<span class="ref missing">??{target}</span>'
+        elif kind == "eqref":
+            out = f'<a class="ref" href="#{target}">({target})</a>'
+        else:
+            title = self.titles.get(label)
+            text = render_inline(title) if title else target
+            out = f'<a class="ref" href="#{target}" title="{target}">{text}</a>'
+        self.cache[key] = out
+        return out
+
+
+def assemble(out, top_level, fragments, refs, root: Path = Path(".")) -> int:
+    """
+    Stream the fragments of `top_level` (and what they \\input, in place)
+    into the file object `out`. Returns the number of fragments written.
+    """
+    written = 0
+    seen = set()
+
+    def emit(path: str) -> None:
+        nonlocal written
+        if path in seen:
+            out.write(f'<p class="warn">{html.escape(path)} included again</p>\n')
+            return
+        seen.add(path)
+        frag = fragments.get(path)
+        if frag is None:
+            out.write(f'<p class="warn">{html.escape(path)}: not indexed</p>\n')
+            return
+        pos = 0
+        body = frag[1]
+        for m in MARKER_RE.finditer(body):
+            out.write(body[pos:m.start()])
+            pos = m.end()
+            if m.group(1) == "input":
+                target = resolve_tex(m.group(2), root)
+                if target is None:
+                    out.write(f'<p class="warn">missing \\input{{{html.escape(m.group(2))}}}</p>\n')
+                else:
+                    emit(target.relative_to(root).as_posix())
+            else:
+                out.write(refs.link(m.group(1), m.group(2)))
+        out.write(body[pos:])
+        written += 1
+
+    for path in top_level:
+        emit(path)
+    return written
+
+
+def top_level_files(index, entry: str, root: Path = Path(".")):
+    """Files \\input by the entry file, in order (the entry itself if it has none)."""
+    target = resolve_tex(entry, root)
+    if target is None:
+        return []
+    rel = target.relative_to(root).as_posix()
+    fi = index.files.get(rel)
+    if fi is None:
+        return []
+    paths = []
+    for e in fi.iter_entries("input"):
+        child = resolve_tex(e.arg, root)
+        if child is not None:
+            paths.append(child.relative_to(root).as_posix())
+    return paths or [rel]
+
+
+def mathjax_macros(preamble: Path = PREAMBLE):
+    """Argument-free macros of the preamble as a MathJax `macros` table."""
+    macros = {}
+    try:
+        lines = preamble.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return macros
+    for line in lines:
+        line = COMMENT_RE.sub("", line).strip()
+        m = MACRO_RE.match(line)
+        if not m or "#" in m.group(2):
+            continue
+        body = m.group(2)
+        if OPERATOR_RE.match(line):
+            body = f"\\operatorname{{{body}}}"
+        macros[m.group(1)] = body
+    return macros
+
+
+PAGE_HEAD = """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script>
+window.MathJax = {{
+  tex: {{
+    inlineMath: [["$", "$"], ["\\\\(", "\\\\)"]],
+    displayMath: [["$$", "$$"], ["\\\\[", "\\\\]"]],
+    processEnvironments: true,
+    processEscapes: true,
+    processRefs: false,
+    macros: {macros}
+  }},
+  options: {{ skipHtmlTags: ["script", "style", "textarea", "pre", "code"] }}
+}};
+</script>
+<script defer src="{mathjax}"></script>
+<style>
+body {{ max-width: 52em; margin: 2em auto; padding: 0 1em; font: 16px/1.5 "DejaVu Serif", serif;
+       counter-reset: h2; }}
+h2:not(.nonum) {{ counter-increment: h2; counter-reset: h3; }}
+h3:not(.nonum) {{ counter-increment: h3; counter-reset: h4; }}
+h4:not(.nonum) {{ counter-increment: h4; }}
+h2:not(.nonum)::before {{ content: counter(h2) " "; }}
+h3:not(.nonum)::before {{ content: counter(h2) "." counter(h3) " "; }}
+h4:not(.nonum)::before {{ content: counter(h2) "." counter(h3) "." counter(h4) " "; }}
+h5 {{ font-size: 1em; margin: 1em 0 0.2em; }}
+section.source {{ border-left: 2px solid transparent; }}
+section.source:hover {{ border-left-color: #ddd; }}
+section.source::before {{ content: attr(data-file); display: block; font: 11px monospace; color: #999; }}
+figure {{ margin: 1em 0; padding: 0.5em; border: 1px solid #eee; }}
+figcaption {{ font-size: 0.9em; color: #444; }}
+table {{ border-collapse: collapse; margin: 0.5em auto; }}
+th, td {{ border: 1px solid #ccc; padding: 0.2em 0.5em; vertical-align: top; }}
+.placeholder {{ padding: 1em; background: #f4f4f4; font: 12px monospace; text-align: center; }}
+.ref.missing, .warn {{ color: #b00; }}
+dt {{ font-weight: bold; }}
+</style>
+</head>
+<body>
+"""
+
+PAGE_TAIL = """\
+</body>
+</html>
+"""
+
+
+def build_preview(entry: str = DEFAULT_ENTRY, only=None, output: Path = OUTPUT_FILE,
+                  force: bool = False, verbose: bool = True, index=None):
+    """
+    Convert changed files and stream the page. `index` is an up-to-date
+    TexIndex (watch mode keeps one in memory); loaded if omitted.
+    """
+    started = time.perf_counter()
+    if index is None:
+        index = load_index()
+    top_level = top_level_files(index, entry)
+    if only:
+        top_level = [p for p in top_level if p.startswith(tuple(only))]
+    # figures/ sources are TikZ code: shown as placeholders, not converted
+    walk = [p for p in index.reachable(top_level)
+            if p in index.files and not p.startswith("figures/")]
+    fragments, converted = update_fragments(index, walk, force=force)
+
+    refs = _Refs(index)
+    title = "Preview — " + (", ".join(only) if only else entry)
+    head = PAGE_HEAD.format(
+        title=html.escape(title),
+        macros=json.dumps(mathjax_macros(), ensure_ascii=False),
+        mathjax=MATHJAX_URL,
+    )
+    with atomic_open(output) as out:
+        out.write(head)
+        count = assemble(out, top_level, fragments, refs)
+        out.write(PAGE_TAIL)
+
+    if verbose:
+        for label in sorted(refs.missing):
+            print(f"[WARN] \\ref to undefined label '{label}'")
+        print(
+            f"[preview] {count} file(s), {len(converted)} converted → {output} "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Fast HTML preview of the Core sources (no XeLaTeX)"
+    )
+    parser.add_argument("--entry", default=DEFAULT_ENTRY,
+                        help=f"File whose \\input's are previewed (default: {DEFAULT_ENTRY})")
+    parser.add_argument("--only", nargs="+", metavar="PREFIX",
+                        help="Only top-level files starting with these paths")
+    parser.add_argument("-o", "--output", default=str(OUTPUT_FILE), help="HTML file to write")
+    parser.add_argument("--force", action="store_true", help="Ignore the fragment cache")
+    args = parser.parse_args()
+
+    build_preview(args.entry, args.only, Path(args.output), force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fixed-point XeLaTeX + biber driver.
+
+Replaces the hard-coded "xelatex, biber, xelatex, xelatex" sequence of
+build_core.sh. After every pass the driver hashes the state files
+(<job>.aux, <job>.toc, <job>.out) and:
+
+  • runs biber only when <job>.bcf or the mirrored .bib files changed
+    since the last biber run (or <job>.bbl is missing),
+  • runs another XeLaTeX pass only when biber ran or the state files
+    changed during the last pass,
+  • stops at the fixed point, or after --max-passes with a warning.
+
+The number of passes and the wall time of every pass are reported. With
+CORE_PROFILE=1 (./build_core.sh --profile) every pass and biber run is
+also recorded with CPU time and peak RSS, and the per-file page spans and
+timings of each pass go to build/profile/ (tools/build_profile.py).
+
+Usage (from repo root):
+
+    python tools/run_latex.py                     # main.tex → build/main.pdf
+    python tools/run_latex.py --fresh             # drop old .aux/.bcf/... first
+    python tools/run_latex.py --root other.tex --outdir build/partial
+    python tools/run_latex.py --format --root build/fmt/main.tex --jobname main
+        # load the dumped preamble (tools/preamble_format.py)
+    python tools/run_latex.py --figure-cache
+        # \input{figures/x} → cached PDFs (tools/figure_cache.py)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from build_manifest import fingerprint
+from build_profile import measure, profiling_enabled, record, record_files
+from latex_log import LogAnalyzer, print_diagnostics
+
+ENGINE = "xelatex"
+ENGINE_FLAGS = ("-interaction=nonstopmode", "-halt-on-error", "-file-line-error")
+
+DEFAULT_MAX_PASSES = 6
+
+# Extensions whose content decides whether another pass is needed.
+STATE_EXTS = (".aux", ".toc", ".out")
+
+# Removed by --fresh (mirrors the old "rm -f build/main.{...}").
+FRESH_EXTS = (".aux", ".bcf", ".blg", ".bbl", ".log", ".run.xml", ".toc", ".out")
+
+
+class LatexJob:
+    """Paths and settings of one XeLaTeX job."""
+
+    def __init__(self, root="main.tex", outdir="build", jobname=None,
+                 engine=ENGINE, engine_args=(), env=None, quiet=False):
+        self.root = Path(root)
+        self.outdir = Path(outdir)
+        self.jobname = jobname or self.root.stem
+        self.engine = engine
+        self.engine_args = list(engine_args)
+        self.env = env
+        # quiet: discard engine stdout (the .log file is still written);
+        # used when several jobs run concurrently.
+        self.quiet = quiet
+
+    def out(self, ext: str) -> Path:
+        return self.outdir / f"{self.jobname}{ext}"
+
+    @property
+    def state_file(self) -> Path:
+        return self.out(".latexrun.json")
+
+    def state_fingerprint(self) -> str:
+        return fingerprint([self.out(ext) for ext in STATE_EXTS])
+
+    def biber_fingerprint(self) -> str:
+        bibs = sorted((self.outdir / "bib").glob("*.bib"))
+        return fingerprint([self.out(".bcf"), *bibs])
+
+    def command(self):
+        cmd = [self.engine, *ENGINE_FLAGS, f"-output-directory={self.outdir}"]
+        if self.jobname != self.root.stem:
+            cmd.append(f"-jobname={self.jobname}")
+        cmd.extend(self.engine_args)
+        cmd.append(str(self.root))
+        return cmd
+
+
+class BuildReport:
+    """Timings collected by run_build()."""
+
+    def __init__(self):
+        self.passes = []        # wall seconds per XeLaTeX pass
+        self.biber = []         # wall seconds per biber run
+        self.converged = False
+
+    @property
+    def total(self) -> float:
+        return sum(self.passes) + sum(self.biber)
+
+    def summary(self) -> str:
+        parts = [f"pass {i}: {t:.1f}s" for i, t in enumerate(self.passes, start=1)]
+        parts += [f"biber: {t:.1f}s" for t in self.biber]
+        status = "converged" if self.converged else "NOT converged"
+        return (
+            f"[latex] {len(self.passes)} XeLaTeX pass(es), {status}, "
+            f"total {self.total:.1f}s ({', '.join(parts)})"
+        )
+
+
+def _load_state(job: LatexJob):
+    try:
+        return json.loads(job.state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(job: LatexJob, state) -> None:
+    job.state_file.write_text(json.dumps(state, indent=1), encoding="utf-8")
+
+
+def _run(cmd, cwd=None, env=None, quiet=False, on_line=None):
+    """Run cmd, raise on failure; returns a build_profile.Measurement."""
+    env = dict(os.environ, **env) if env else None
+    m = measure(cmd, cwd=cwd, env=env, quiet=quiet, on_line=on_line)
+    if m.returncode != 0:
+        raise subprocess.CalledProcessError(m.returncode, cmd)
+    return m
+
+
+def clean_aux(job: LatexJob) -> None:
+    for ext in FRESH_EXTS:
+        try:
+            job.out(ext).unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        job.state_file.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _say(job: LatexJob, message: str) -> None:
+    if not job.quiet:
+        print(message, flush=True)
+
+
+def run_pass(job: LatexJob, report: BuildReport) -> None:
+    n = len(report.passes) + 1
+    _say(job, f"---- [latex] XeLaTeX pass {n} ({job.root}) ----")
+    # Profile mode: follow the engine's file stack while it runs (box and
+    # error text skipped like in the log analysis, so its parens don't count).
+    tracker = LogAnalyzer(keep_spans=True) if profiling_enabled() else None
+    m = _run(job.command(), env=job.env, quiet=job.quiet,
+             on_line=tracker.feed if tracker else None)
+    report.passes.append(m.wall)
+    if tracker is not None:
+        record(f"{job.jobname}: xelatex pass {n}", "pass", m, job=job.jobname, n=n)
+        record_files(tracker.finish(m.start + m.wall), job=job.jobname, **{"pass": n})
+    _say(job, f"[latex] pass {n} finished in {report.passes[-1]:.1f}s")
+
+
+def maybe_run_biber(job: LatexJob, report: BuildReport, state) -> bool:
+    """Run biber if its inputs changed; return True when it ran."""
+    if not job.out(".bcf").exists():
+        return False
+
+    inputs = job.biber_fingerprint()
+    if job.out(".bbl").exists() and state.get("biber_inputs") == inputs:
+        return False
+
+    _say(job, "---- [latex] Run biber ----")
+    m = _run(["biber", job.jobname], cwd=job.outdir, env=job.env, quiet=job.quiet)
+    report.biber.append(m.wall)
+    record(f"{job.jobname}: biber", "pass", m, job=job.jobname)
+    _say(job, f"[latex] biber finished in {report.biber[-1]:.1f}s")
+    state["biber_inputs"] = inputs
+    _save_state(job, state)
+    return True
+
+
+def run_build(job: LatexJob, max_passes: int = DEFAULT_MAX_PASSES,
+              fresh: bool = False) -> BuildReport:
+    """Run XeLaTeX/biber until .aux/.toc/.out reach a fixed point."""
+    job.outdir.mkdir(parents=True, exist_ok=True)
+    if fresh:
+        clean_aux(job)
+
+    state = _load_state(job)
+    report = BuildReport()
+    previous = job.state_fingerprint()
+
+    while len(report.passes) < max_passes:
+        run_pass(job, report)
+        current = job.state_fingerprint()
+        biber_ran = maybe_run_biber(job, report, state)
+        if not biber_ran and current == previous:
+            report.converged = True
+            break
+        previous = current
+
+    if not report.converged:
+        print(
+            f"[WARN] .aux/.toc/.out did not stabilize after {max_passes} passes.",
+            file=sys.stderr,
+        )
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Run XeLaTeX/biber until cross-references reach a fixed point"
+    )
+    parser.add_argument("--root", default="main.tex", help="Root .tex file")
+    parser.add_argument("--outdir", default="build", help="Output directory")
+    parser.add_argument("--jobname", default=None, help="Job name (default: root stem)")
+    parser.add_argument(
+        "--max-passes",
+        type=int,
+        default=DEFAULT_MAX_PASSES,
+        help=f"Upper bound for XeLaTeX passes (default: {DEFAULT_MAX_PASSES})",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Delete old auxiliary files before the first pass",
+    )
+    parser.add_argument(
+        "--format",
+        action="store_true",
+        help="Use the precompiled preamble format from build/fmt/",
+    )
+    parser.add_argument(
+        "--figure-cache",
+        action="store_true",
+        help="Resolve \\input{figures/...} to the PDFs in build/figcache/",
+    )
+    args = parser.parse_args()
+
+    options = {"env": {}}
+    if args.format:
+        from preamble_format import job_options
+        fmt = job_options()
+        options["engine_args"] = fmt["engine_args"]
+        options["env"].update(fmt["env"])
+    if args.figure_cache:
+        from figure_cache import texinputs_env
+        options["env"].update(texinputs_env())
+
+    job = LatexJob(root=args.root, outdir=args.outdir, jobname=args.jobname, **options)
+    try:
+        report = run_build(job, max_passes=args.max_passes, fresh=args.fresh)
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] {e.cmd[0]} failed with exit code {e.returncode}", file=sys.stderr)
+        if e.cmd[0] == job.engine and job.out(".log").exists():
+            print_diagnostics(job.out(".log"))
+        return e.returncode or 1
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e.filename} not found in PATH", file=sys.stderr)
+        return 127
+
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Full-text search over the Core sources: incremental index + query CLI.
+
+Files are indexed in document order: the DFS order of
+master_core_structure.yaml (the order generate_auto_inputs writes into
+content/_auto_core_inputs.tex), each followed by the files it \input's
+(appendix tables, ...), then the rest of what main.tex pulls in from
+content/ and appendix/; figures/ (TikZ code) is left out. Each line is
+reduced to plain words — comments, math delimiters, command names and
+\label/\ref/\cite/\input arguments are dropped, Greek letters are kept
+as words, and subscripted symbols are indexed both joined and bare, so
+"K5" finds \(K_5\) and K_{5}, "theta" finds \Theta_0.
+
+Every hit is shown with its anchor: the last heading and the last \label
+at or before the line, taken from the shared .tex index
+(tools/tex_index.py). Results print as
+
+    content/k_levels/k5.tex:42: [Excitable continua K5] sec:k5-overview
+        ... matching source line ...
+
+Storage:
+
+  build/.cache/search_segments.pickle  per-file postings, keyed by the
+                                       file's SHA-256 — only changed files
+                                       are re-tokenized
+  build/search_index.bin               merged index, fixed-size records,
+                                       read through mmap with a binary
+                                       search over the sorted terms; a
+                                       query touches only its own postings
+
+Layout of search_index.bin (little-endian):
+
+  header   MAGIC, FORMAT_VERSION, n_files, n_anchors, n_terms, n_postings,
+           strings_len
+  files    n_files    × (path_off, path_len, first_anchor, n_anchors)
+  anchors  n_anchors  × (line, heading_off, heading_len, label_off, label_len),
+                        per file in line order
+  terms    n_terms    × (term_off, term_len, first_posting, n_postings), sorted
+  postings n_postings × file_id, then n_postings × line (two columns, each
+                        term's slice in document order)
+  strings  UTF-8 blob the *_off/*_len fields point into
+
+Merging copies whole per-file line arrays, so rebuilding the merged file
+after an edit costs little more than reading the cached segments.
+
+The build refreshes the index only with ./build_core.sh --search-index;
+a query builds it if it does not exist yet, --refresh updates it first.
+
+Usage (from repo root):
+
+    python tools/search_core.py index                # update the index
+    python tools/search_core.py query threshold K5   # lines with all terms
+    python tools/search_core.py query --any R Q      # lines with any term
+    python tools/search_core.py query 'percol*'      # prefix match
+    python tools/search_core.py query --refresh membrane --max 50
+"""
+
+import argparse
+import linecache
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from pathlib import Path
+
+from build_manifest import ENTRYPOINT
+from core_io import write_bytes_if_changed
+from core_structure import load_structure
+from tex_index import COMMENT_RE, PARALLEL_THRESHOLD, load_index
+
+INDEX_FILE = Path("build") / "search_index.bin"
+SEGMENTS_FILE = Path("build") / ".cache" / "search_segments.pickle"
+
+MAGIC = b"OCSX"
+# Bump when the tokenizer or the file layout change.
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4s6I")
+FILE_REC = struct.Struct("<4I")
+ANCHOR_REC = struct.Struct("<5I")
+TERM_REC = struct.Struct("<4I")
+# array typecode with 4-byte items (posting columns, cached segments)
+POSTING_ITEM = "I" if array("I").itemsize == 4 else "L"
+
+# figures/ holds TikZ code, main.tex / preamble.tex no prose
+INDEXED_PREFIXES = ("content/", "appendix/")
+DEFAULT_MAX = 20
+
+# A \label this close below a heading names that heading.
+HEADING_LABEL_SPAN = 2
+
+GREEK = {
+    "alpha", "beta", "gamma", "delta", "epsilon", "varepsilon", "zeta", "eta",
+    "theta", "vartheta", "iota", "kappa", "lambda", "mu", "nu", "xi", "pi",
+    "rho", "sigma", "tau", "upsilon", "phi", "varphi", "chi", "psi", "omega",
+    "Gamma", "Delta", "Theta", "Lambda", "Xi", "Pi", "Sigma", "Phi", "Psi", "Omega",
+}
+
+# Commands whose argument is a key, not prose.
+KEY_ARG_RE = re.compile(
+    r"\\(?:label|ref|eqref|autoref|pageref|nameref|cref|Cref|cite[a-z]*|[a-z]*cite|"
+    r"input|include|includegraphics|begin|end|usepackage|documentclass)\*?"
+    r"(?:\[[^\]]*\])*\{[^}]*\}"
+)
+GREEK_RE = re.compile(r"\\(" + "|".join(sorted(GREEK, key=len, reverse=True)) + r")(?![A-Za-z])")
+CONTROL_RE = re.compile(r"\\[A-Za-z]+\*?|\\.")
+SUBSCRIPT_RE = re.compile(r"([^\W\d_]+)_\{?([^\W_]+)\}?")
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+# --------------------------------------------------------------------
+# Tokenizer
+# --------------------------------------------------------------------
+
+def _plain(line: str) -> str:
+    """Source line without comments, key arguments and command names."""
+    line = COMMENT_RE.sub("", line)
+    line = KEY_ARG_RE.sub(" ", line)
+    line = GREEK_RE.sub(r"\1", line)
+    return CONTROL_RE.sub(" ", line)
+
+
+def line_terms(line: str):
+    """Normalized search terms of one source line (a set)."""
+    plain = _plain(line)
+    terms = {(m.group(1) + m.group(2)).lower() for m in SUBSCRIPT_RE.finditer(plain)}
+    terms.update(w.lower() for w in WORD_RE.findall(plain))
+    return terms
+
+
+def query_terms(words):
+    """Normalize query words like the sources; 'K_5' searches k5, not k."""
+    out = []
+    for word in words:
+        star = "*" if word.endswith("*") else ""
+        plain = _plain(word.rstrip("*"))
+        joined = [(m.group(1) + m.group(2)).lower() for m in SUBSCRIPT_RE.finditer(plain)]
+        out.extend(t + star for t in joined or [w.lower() for w in WORD_RE.findall(plain)])
+    return out
+
+
+def file_anchors(fi):
+    """[(line, heading, label)] of one indexed file, ascending by line."""
+    anchors = [(0, "", "")]
+    heading = ""
+    for e in fi.entries:
+        if e.kind == "heading":
+            heading = " ".join(e.arg.split())
+            anchors.append((e.line, heading, ""))
+        elif e.kind == "label":
+            line, head, label = anchors[-1]
+            if not label and head == heading and line and e.line - line <= HEADING_LABEL_SPAN:
+                anchors[-1] = (line, head, e.arg)
+            else:
+                anchors.append((e.line, heading, e.arg))
+    return anchors
+
+
+def scan_segment(path: str, fi):
+    """
+    Per-file segment: (sha256, anchors, terms, counts, lines) — the lines of
+    terms[i] are the next counts[i] entries of `lines` (packed arrays, so
+    the cache pickles as a few objects per file).
+    """
+    postings = {}
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for lineno, line in enumerate(f, 1):
+            for term in line_terms(line):
+                postings.setdefault(term, []).append(lineno)
+    terms = list(postings)
+    counts = array(POSTING_ITEM, (len(postings[t]) for t in terms))
+    lines = array(POSTING_ITEM, chain.from_iterable(postings[t] for t in terms))
+    return fi.sha256, file_anchors(fi), terms, counts.tobytes(), lines.tobytes()
+
+
+def _scan_pair(args):
+    return scan_segment(*args)
+
+
+# --------------------------------------------------------------------
+# Index build
+# --------------------------------------------------------------------
+
+def document_order(index, structure):
+    """
+    Structure DFS order, each file followed by what it \\input's, then the
+    rest of main.tex (appendix, ...) that the YAML does not list.
+    """
+    paths = index.reachable(structure.tex_paths())
+    seen = set(paths)
+    paths += [p for p in index.reachable([ENTRYPOINT]) if p not in seen]
+    return [p for p in paths if p in index.files and p.startswith(INDEXED_PREFIXES)]
+
+
+def load_segments(path: Path = SEGMENTS_FILE):
+    try:
+        with path.open("rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return {}
+    if payload.get("version") != FORMAT_VERSION:
+        return {}
+    return payload["segments"]
+
+
+def save_segments(segments, path: Path = SEGMENTS_FILE) -> None:
+    data = pickle.dumps({"version": FORMAT_VERSION, "segments": segments},
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    write_bytes_if_changed(path, data)
+
+
+class _Strings:
+    """Deduplicating UTF-8 string blob."""
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.seen = {}
+
+    def add(self, text: str):
+        ref = self.seen.get(text)
+        if ref is None:
+            data = text.encode("utf-8")
+            ref = self.seen[text] = (len(self.blob), len(data))
+            self.blob += data
+        return ref
+
+
+def encode_index(order, segments) -> bytes:
+    """Merge the per-file segments (in document order) into the binary index."""
+    strings = _Strings()
+    files = []
+    anchors = []
+    merged = {}
+    for file_id, path in enumerate(order):
+        _, file_anchors_, terms, counts, lines = segments[path]
+        files.append(FILE_REC.pack(*strings.add(path), len(anchors), len(file_anchors_)))
+        for line, heading, label in file_anchors_:
+            anchors.append(ANCHOR_REC.pack(line, *strings.add(heading), *strings.add(label)))
+        counts = array(POSTING_ITEM, counts)
+        lines = array(POSTING_ITEM, lines)
+        pos = 0
+        for term, n in zip(terms, counts):
+            bucket = merged.get(term)
+            if bucket is None:
+                bucket = merged[term] = (array(POSTING_ITEM), array(POSTING_ITEM))
+            bucket[0].extend(repeat(file_id, n))
+            bucket[1].extend(lines[pos:pos + n])
+            pos += n
+
+    terms = []
+    file_col = array(POSTING_ITEM)
+    line_col = array(POSTING_ITEM)
+    for term in sorted(merged, key=lambda t: t.encode("utf-8")):
+        ids, term_lines = merged[term]
+        terms.append(TERM_REC.pack(*strings.add(term), len(file_col), len(ids)))
+        file_col.extend(ids)
+        line_col.extend(term_lines)
+    if sys.byteorder != "little":
+        file_col.byteswap()
+        line_col.byteswap()
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(files), len(anchors), len(terms),
+                         len(file_col), len(strings.blob))
+    return b"".join([header, *files, *anchors, *terms,
+                     file_col.tobytes(), line_col.tobytes(), bytes(strings.blob)])
+
+
+def update(verbose: bool = True) -> bool:
+    """Bring the segments and the merged index up to date; True if rewritten."""
+    started = time.perf_counter()
+    index = load_index()
+    order = document_order(index, load_structure())
+
+    old = load_segments()
+    segments = {}
+    to_scan = []
+    for path in order:
+        seg = old.get(path)
+        if seg is None or seg[0] != index.files[path].sha256:
+            to_scan.append(path)
+        else:
+            segments[path] = seg
+    scanned = len(to_scan)
+    if scanned >= PARALLEL_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as pool:
+            pairs = [(path, index.files[path]) for path in to_scan]
+            for path, seg in zip(to_scan, pool.map(_scan_pair, pairs, chunksize=16)):
+                segments[path] = seg
+    else:
+        for path in to_scan:
+            segments[path] = scan_segment(path, index.files[path])
+    segments = {path: segments[path] for path in order}
+
+    changed = scanned or list(old) != order
+    if changed:
+        save_segments(segments)
+    written = False
+    if changed or not INDEX_FILE.exists():
+        written = write_bytes_if_changed(INDEX_FILE, encode_index(order, segments))
+    if verbose:
+        print(
+            f"[search] {len(order)} file(s), {scanned} re-tokenized, "
+            f"index {'written' if written else 'unchanged'} "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+    return written
+
+
+# --------------------------------------------------------------------
+# Query
+# --------------------------------------------------------------------
+
+class SearchIndex:
+    """Read-only view of search_index.bin through mmap."""
+
+    def __init__(self, path: Path = INDEX_FILE):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_files, n_anchors, self.n_terms, n_postings, _ = \
+            HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a search index of version {FORMAT_VERSION}")
+        self.files_at = HEADER.size
+        self.anchors_at = self.files_at + self.n_files * FILE_REC.size
+        self.terms_at = self.anchors_at + n_anchors * ANCHOR_REC.size
+        self.file_col_at = self.terms_at + self.n_terms * TERM_REC.size
+        self.line_col_at = self.file_col_at + n_postings * 4
+        self.strings_at = self.line_col_at + n_postings * 4
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def _str(self, off: int, length: int) -> str:
+        start = self.strings_at + off
+        return self.mm[start:start + length].decode("utf-8")
+
+    def _term(self, i: int):
+        off, length, first, count = TERM_REC.unpack_from(self.mm, self.terms_at + i * TERM_REC.size)
+        start = self.strings_at + off
+        return self.mm[start:start + length], first, count
+
+    def _column(self, at: int, first: int, count: int):
+        col = array(POSTING_ITEM, self.mm[at + first * 4:at + (first + count) * 4])
+        if sys.byteorder != "little":
+            col.byteswap()
+        return col
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def postings(self, term: str):
+        """Set of (file_id, line) for a term; 'abc*' matches a prefix."""
+        prefix = term.endswith("*")
+        key = term.rstrip("*").encode("utf-8")
+        found = set()
+        i = self._lower_bound(key)
+        while i < self.n_terms:
+            name, first, count = self._term(i)
+            if name != key and not (prefix and name.startswith(key)):
+                break
+            found.update(zip(self._column(self.file_col_at, first, count),
+                             self._column(self.line_col_at, first, count)))
+            if not prefix:
+                break
+            i += 1
+        return found
+
+    def locate(self, file_id: int, line: int):
+        """(path, heading, label) for a line: the nearest anchor at or above it."""
+        path_off, path_len, first, count = FILE_REC.unpack_from(
+            self.mm, self.files_at + file_id * FILE_REC.size
+        )
+        lo, hi = first, first + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ANCHOR_REC.unpack_from(self.mm, self.anchors_at + mid * ANCHOR_REC.size)[0] <= line:
+                lo = mid + 1
+            else:
+                hi = mid
+        _, h_off, h_len, l_off, l_len = ANCHOR_REC.unpack_from(
+            self.mm, self.anchors_at + (lo - 1) * ANCHOR_REC.size
+        )
+        return self._str(path_off, path_len), self._str(h_off, h_len), self._str(l_off, l_len)
+
+    def search(self, terms, any_term: bool = False):
+        """Matching (file_id, line) pairs in document order."""
+        hits = None
+        for term in terms:
+            found = self.postings(term)
+            if hits is None:
+                hits = found
+            else:
+                hits = hits | found if any_term else hits & found
+            if not hits and not any_term:
+                break
+        return sorted(hits or ())
+
+
+def format_hit(index: SearchIndex, file_id: int, line: int) -> str:
+    path, heading, label = index.locate(file_id, line)
+    where = f"[{heading}]" if heading else ""
+    if label:
+        where = f"{where} {label}".strip()
+    text = " ".join(linecache.getline(path, line).split())
+    return f"{path}:{line}: {where}\n    {text}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Full-text search over the Core sources")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("index", help="Update the search index (changed files only)")
+
+    q = sub.add_parser("query", help="Search the index")
+    q.add_argument("words", nargs="+", help="Search terms ('prefix*' allowed)")
+    q.add_argument("--any", action="store_true", help="Lines with any term (default: all)")
+    q.add_argument("--max", type=int, default=DEFAULT_MAX, help="Hits to print (0 = all)")
+    q.add_argument("--refresh", action="store_true", help="Update the index first")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        update()
+        return 0
+
+    if args.refresh or not INDEX_FILE.exists():
+        update(verbose=False)
+    started = time.perf_counter()
+    terms = query_terms(args.words)
+    if not terms:
+        print("[search] nothing to search for")
+        return 2
+    index = SearchIndex()
+    try:
+        hits = index.search(terms, any_term=args.any)
+        shown = hits if args.max == 0 else hits[:args.max]
+        for file_id, line in shown:
+            print(format_hit(index, file_id, line))
+    finally:
+        index.close()
+    more = f", showing {len(shown)}" if len(shown) < len(hits) else ""
+    print(
+        f"[search] {len(hits)} hit(s) for {' '.join(terms)}{more} "
+        f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+    )
+    return 0 if hits else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
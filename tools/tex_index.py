@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Shared .tex index: one scan of the repository for all tools/ scripts.
+
+find_duplicate_labels.py, fix_math_in_headings.py,
+demote_module_headings.py and init_crossk_placeholders.py used to rglob
+the tree and re-read / re-regex every .tex file on their own. This module
+reads each file once, tokenizes the commands the tools care about and
+keeps the result in build/.cache/tex_index.pickle. On the next run only
+files whose mtime/size changed are re-read, and only files whose SHA-256
+changed are re-tokenized, so the pre-LaTeX phase costs O(changed files).
+
+Indexed commands (comments are ignored, line numbers are 1-based):
+
+  kind       commands
+  ---------  ------------------------------------------------------------
+  label      \label
+  ref        \ref \eqref \autoref \pageref \nameref \cref \Cref
+  cite       \cite \parencite \textcite \autocite \footcite \nocite ...
+  input      \input \include
+  graphics   \includegraphics
+  heading    \section \subsection \subsubsection \paragraph \subparagraph
+  caption    \caption
+
+Comma-separated arguments of ref/cite commands yield one entry per key.
+
+Tools that rewrite sources can keep per-file bookkeeping next to the
+tokens in `index.state[<tool>]` (persisted by save_index()), e.g.
+demote_module_headings.py records which file hash it already normalized.
+
+Usage from another script in tools/:
+
+    from tex_index import load_index
+
+    index = load_index()
+    for path, entry in index.iter_entries("label"):
+        print(path, entry.line, entry.arg)
+
+CLI (from repo root):
+
+    python tools/tex_index.py                 # update + summary
+    python tools/tex_index.py --dump label    # print all entries of a kind
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from latex_scan import LineMap, iter_commands, read_args, resolve_tex
+
+INDEX_FILE = Path("build") / ".cache" / "tex_index.pickle"
+
+# Bump whenever TexEntry / FileIndex or the tokenizer change.
+INDEX_VERSION = 5
+
+# Same exclusions the historical scanners used.
+EXCLUDE = {".git", "build", "tools", ".venv", "venv"}
+
+# Below this many changed files a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 32
+
+COMMAND_KINDS = {
+    "label": "label",
+    "ref": "ref", "eqref": "ref", "autoref": "ref", "pageref": "ref",
+    "nameref": "ref", "cref": "ref", "Cref": "ref",
+    "cite": "cite", "Cite": "cite", "parencite": "cite", "Parencite": "cite",
+    "textcite": "cite", "Textcite": "cite", "autocite": "cite", "Autocite": "cite",
+    "smartcite": "cite", "Smartcite": "cite", "footcite": "cite", "footcitetext": "cite",
+    "supercite": "cite", "fullcite": "cite", "footfullcite": "cite", "nocite": "cite",
+    "citeauthor": "cite", "Citeauthor": "cite", "citetitle": "cite", "Citetitle": "cite",
+    "citeyear": "cite", "citedate": "cite", "citeurl": "cite",
+    "citep": "cite", "citet": "cite", "Citep": "cite", "Citet": "cite",
+    "citealp": "cite", "citealt": "cite",
+    "input": "input", "include": "input",
+    "includegraphics": "graphics",
+    "section": "heading", "subsection": "heading", "subsubsection": "heading",
+    "paragraph": "heading", "subparagraph": "heading",
+    "caption": "caption",
+}
+MULTI_KEY_KINDS = {"ref", "cite"}
+# biblatex multicite commands: \cites[pre][post]{a}[pre][post]{b}...
+MULTICITE_COMMANDS = {
+    "cites", "Cites", "parencites", "Parencites", "textcites", "Textcites",
+    "autocites", "Autocites", "smartcites", "Smartcites", "footcites",
+    "footcitetexts", "supercites",
+}
+COMMAND_KINDS.update(dict.fromkeys(MULTICITE_COMMANDS, "cite"))
+
+COMMENT_RE = re.compile(r"(?<!\\)%[^\n]*")
+
+
+class TexEntry:
+    """One indexed command occurrence."""
+
+    __slots__ = ("kind", "command", "star", "arg", "line")
+
+    def __init__(self, kind, command, star, arg, line):
+        self.kind = kind
+        self.command = command
+        self.star = star
+        self.arg = arg
+        self.line = line
+
+    def __repr__(self):
+        star = "*" if self.star else ""
+        return f"TexEntry(\\{self.command}{star}{{{self.arg}}} @ {self.line})"
+
+
+class FileIndex:
+    """Tokens of one file plus the stat/hash data used for invalidation."""
+
+    __slots__ = ("path", "mtime_ns", "size", "sha256", "blank", "entries")
+
+    def __init__(self, path, mtime_ns, size, sha256, blank, entries):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.blank = blank          # True if only comments/whitespace
+        self.entries = entries
+
+    def iter_entries(self, kind=None):
+        for e in self.entries:
+            if kind is None or e.kind == kind:
+                yield e
+
+
+class TexIndex:
+    """All indexed files, keyed by repo-relative POSIX path."""
+
+    def __init__(self, files=None, state=None):
+        self.files = files or {}
+        self.state = state or {}    # tool name → tool-specific dict
+        self.scanned = 0            # files re-tokenized in the last update
+        self.rehashed = 0           # files re-read but unchanged
+
+    def iter_entries(self, kind=None, paths=None):
+        """Yield (path, entry) pairs, optionally restricted to kind/paths."""
+        for path in sorted(self.files) if paths is None else paths:
+            fi = self.files.get(path)
+            if fi is None:
+                continue
+            for e in fi.iter_entries(kind):
+                yield path, e
+
+    def labels(self):
+        """Map label → list of (path, line)."""
+        table = {}
+        for path, e in self.iter_entries("label"):
+            table.setdefault(e.arg, []).append((path, e.line))
+        return table
+
+    def reachable(self, entries, root="."):
+        r"""
+        Files reachable from the given entry points via \input/\include,
+        in DFS (= typesetting) order. Uses only the indexed input entries.
+        """
+        root = Path(root)
+        order = []
+        seen = set()
+        stack = []
+        for entry in reversed(list(entries)):
+            target = resolve_tex(entry, root)
+            if target is not None:
+                stack.append(target.relative_to(root).as_posix())
+        while stack:
+            rel = stack.pop()
+            if rel in seen:
+                continue
+            seen.add(rel)
+            order.append(rel)
+            fi = self.files.get(rel)
+            if fi is None:
+                continue
+            children = []
+            for e in fi.iter_entries("input"):
+                child = resolve_tex(e.arg, root)
+                if child is not None:
+                    children.append(child.relative_to(root).as_posix())
+            stack.extend(reversed(children))
+        return order
+
+    def paths_under(self, prefix: str):
+        prefix = prefix.rstrip("/") + "/"
+        return [p for p in sorted(self.files) if p.startswith(prefix)]
+
+
+# --------------------------------------------------------------------
+# Tokenizer
+# --------------------------------------------------------------------
+
+def tokenize(text: str):
+    """
+    Return (blank, entries) for the given LaTeX source. Arguments are
+    extracted brace-balanced (tools/latex_scan.py), so headings such as
+    \\section{The $\\mathcal{K}_{3}$ level} are indexed in full.
+    """
+    lines = LineMap(text)
+    entries = []
+    for cmd in iter_commands(text, COMMAND_KINDS):
+        command, star, arg = cmd.name, cmd.star, cmd.arg
+        kind = COMMAND_KINDS[command]
+        line = lines.line(cmd.start)
+        if command in MULTICITE_COMMANDS:
+            # the first {keys} came with cmd, the others follow it
+            more = read_args(text, cmd.end)
+            while more is not None:
+                arg += "," + more[2]
+                more = read_args(text, more[3])
+        if kind in MULTI_KEY_KINDS:
+            for key in arg.split(","):
+                key = key.strip()
+                if key:
+                    entries.append(TexEntry(kind, command, star, key, line))
+        elif kind in ("heading", "caption"):
+            entries.append(TexEntry(kind, command, star, arg, line))
+        else:
+            entries.append(TexEntry(kind, command, star, arg.strip(), line))
+    blank = not COMMENT_RE.sub("", text).strip()
+    return blank, entries
+
+
+def scan_file(root: str, rel: str) -> FileIndex:
+    """Read and tokenize one file (module-level so it can run in a pool)."""
+    path = Path(root) / rel
+    st = path.stat()
+    raw = path.read_bytes()
+    blank, entries = tokenize(raw.decode("utf-8", errors="ignore"))
+    return FileIndex(rel, st.st_mtime_ns, st.st_size, hashlib.sha256(raw).hexdigest(), blank, entries)
+
+
+def _scan_pair(args):
+    return scan_file(*args)
+
+
+# --------------------------------------------------------------------
+# Discovery / persistence
+# --------------------------------------------------------------------
+
+def discover(root: Path):
+    """All .tex files below root outside EXCLUDE (repo-relative POSIX)."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in EXCLUDE]
+        for name in filenames:
+            if name.endswith(".tex"):
+                found.append((Path(dirpath) / name).relative_to(root).as_posix())
+    return sorted(found)
+
+
+def _read_index(path: Path):
+    """Return (files, state) of the persisted index, or empty dicts."""
+    try:
+        with path.open("rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        return {}, {}
+    if payload.get("version") != INDEX_VERSION:
+        return {}, {}
+    return payload["files"], payload.get("state", {})
+
+
+def _write_index(path: Path, files, state) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump({"version": INDEX_VERSION, "files": files, "state": state}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[tex-index] WARNING: cannot write {path}: {e}", file=sys.stderr)
+
+
+def _refresh(root: Path, rels, old, jobs):
+    """Return (files, scanned, rehashed) for the given relative paths."""
+    files = {}
+    to_scan = []
+    rehashed = 0
+    for rel in rels:
+        prev = old.get(rel)
+        try:
+            st = (root / rel).stat()
+        except FileNotFoundError:
+            continue
+        if prev and prev.mtime_ns == st.st_mtime_ns and prev.size == st.st_size:
+            files[rel] = prev
+            continue
+        if prev:
+            digest = hashlib.sha256((root / rel).read_bytes()).hexdigest()
+            if digest == prev.sha256:
+                prev.mtime_ns, prev.size = st.st_mtime_ns, st.st_size
+                files[rel] = prev
+                rehashed += 1
+                continue
+        to_scan.append(rel)
+
+    if len(to_scan) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(_scan_pair, [(str(root), rel) for rel in to_scan], chunksize=16)
+            for fi in results:
+                files[fi.path] = fi
+    else:
+        for rel in to_scan:
+            files[rel] = scan_file(str(root), rel)
+    return files, len(to_scan), rehashed
+
+
+def update_index(index: TexIndex, root=".", jobs=None) -> bool:
+    """
+    Bring an (in-memory) index up to date with the tree. Returns True if
+    anything changed. Used by load_index() and by long-running callers
+    such as tools/watch_core.py that keep the index between rebuilds.
+
+    Besides every *.tex file, extensionless files reached through
+    \\input (e.g. content/toe/toe_k3) are indexed as well.
+    """
+    root = Path(root)
+    old = index.files
+    files, scanned, rehashed = _refresh(root, discover(root), old, jobs)
+
+    # Follow \input targets that are not *.tex files themselves.
+    pending = True
+    while pending:
+        extra = set()
+        for fi in list(files.values()):
+            for e in fi.iter_entries("input"):
+                target = resolve_tex(e.arg, root)
+                if target is None:
+                    continue
+                rel = target.relative_to(root).as_posix()
+                if rel not in files and not any(part in EXCLUDE for part in Path(rel).parts):
+                    extra.add(rel)
+        pending = bool(extra)
+        if extra:
+            more, n, r = _refresh(root, sorted(extra), old, jobs)
+            files.update(more)
+            scanned += n
+            rehashed += r
+
+    changed = bool(scanned or rehashed or set(files) != set(old))
+    index.files = files
+    index.scanned = scanned
+    index.rehashed = rehashed
+    return changed
+
+
+def save_index(index: TexIndex, root=".") -> None:
+    _write_index(Path(root) / INDEX_FILE, index.files, index.state)
+
+
+def load_index(root=".", update: bool = True, jobs=None) -> TexIndex:
+    """Load the persisted index and (by default) bring it up to date."""
+    index = TexIndex(*_read_index(Path(root) / INDEX_FILE))
+    if update and update_index(index, root, jobs):
+        save_index(index, root)
+    return index
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Update and query the shared .tex index")
+    parser.add_argument("--dump", metavar="KIND", help="Print all entries of a kind")
+    parser.add_argument("--jobs", "-j", type=int, default=None)
+    args = parser.parse_args()
+
+    index = load_index(jobs=args.jobs)
+    if args.dump:
+        for path, e in index.iter_entries(args.dump):
+            star = "*" if e.star else ""
+            print(f"{path}:{e.line}: \\{e.command}{star}{{{e.arg}}}")
+        return 0
+
+    counts = {}
+    for _, e in index.iter_entries():
+        counts[e.kind] = counts.get(e.kind, 0) + 1
+    print(
+        f"[tex-index] {len(index.files)} file(s), {index.scanned} re-tokenized, "
+        f"{index.rehashed} unchanged after rehash"
+    )
+    for kind in sorted(counts):
+        print(f"  {kind:<9} {counts[kind]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
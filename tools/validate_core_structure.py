@@ -46,7 +46,7 @@ import sys
 from pathlib import Path
 from typing import Iterable, Set, Dict, Any
 
-import yaml  # pip install pyyaml
+from core_structure import CoreStructure, EmptyStructure, StructureError, load_structure
 
 STRUCTURE_FILE = "master_core_structure.yaml"
 CONTENT_ROOT = Path("content")
@@ -59,13 +59,18 @@ def _iter_nodes_list(nodes: Iterable[Any]) -> Iterable[Dict[str, Any]]:
             yield n
 
 
-def collect_paths_from_yaml(data: Any) -> Set[str]:
+def collect_paths_from_yaml(structure: CoreStructure) -> Set[str]:
     """
     Sammle alle relevanten .tex-Pfade aus der YAML-Struktur.
     Gibt relative Pfade wie 'content/01_intro.tex' zurück.
+
+    Der Knotenbaum (sections + children) kommt aus dem gemeinsamen Loader
+    (core_structure.py); zusätzlich werden die Nebenschemata aus den
+    Rohdaten gelesen (core.main_article, modules.*.master).
     """
 
-    paths: Set[str] = set()
+    paths: Set[str] = set(structure.tex_paths())
+    data = structure.data
 
     # --- 1) Core-Schema: core.main_article.sections[*].path
     if isinstance(data, dict):
@@ -80,37 +85,7 @@ def collect_paths_from_yaml(data: Any) -> Set[str]:
                         if isinstance(p, str):
                             paths.add(p)
 
-    # --- 2) Top-level sections: sections[*].path
-    if isinstance(data, dict):
-        sections = data.get("sections")
-        if isinstance(sections, list):
-            for node in _iter_nodes_list(sections):
-                p = node.get("path")
-                if isinstance(p, str):
-                    paths.add(p)
-
-    # --- 3) root/sections/nodes-bäume
-    def walk_tree(node: Any):
-        if isinstance(node, dict):
-            p = node.get("file") or node.get("path")
-            if isinstance(p, str):
-                paths.add(p)
-            # typische Schlüssel für Kinder:
-            for key in ("children", "subsections", "nodes", "sections"):
-                child = node.get(key)
-                if isinstance(child, list):
-                    for c in child:
-                        walk_tree(c)
-        elif isinstance(node, list):
-            for c in node:
-                walk_tree(c)
-
-    if isinstance(data, dict):
-        for key in ("root", "toc", "content"):
-            if key in data:
-                walk_tree(data[key])
-
-    # --- 4) Modules.*.master.path
+    # --- 2) Modules.*.master.path
     if isinstance(data, dict):
         modules = data.get("modules")
         if isinstance(modules, dict):
@@ -122,29 +97,23 @@ def collect_paths_from_yaml(data: Any) -> Set[str]:
                         if isinstance(p, str):
                             paths.add(p)
 
-    # --- 5) Fallback: einfaches oberes Listenformat
-    if not paths and isinstance(data, list):
-        for node in _iter_nodes_list(data):
-            p = node.get("file") or node.get("path")
-            if isinstance(p, str):
-                paths.add(p)
-
     return paths
 
 
-def load_structure_file(path: Path) -> Any:
+def load_structure_file(path: Path) -> CoreStructure:
     if not path.exists():
         print(f"[ERROR] Structure file not found: {path}", file=sys.stderr)
         sys.exit(1)
 
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    if data is None:
+    try:
+        return load_structure(path)
+    except EmptyStructure:
         print(f"[ERROR] YAML {path} ist leer.", file=sys.stderr)
         sys.exit(1)
-
-    return data
+    except StructureError as e:
+        # Template-/Bereichsfehler usw.: die Meldung des Loaders durchreichen
+        print(f"[ERROR] {path}: {e.code}", file=sys.stderr)
+        sys.exit(1)
 
 
 def collect_tex_files(root: Path) -> Set[str]:
@@ -164,8 +133,8 @@ def main():
     structure_path = Path(STRUCTURE_FILE)
     print(f"[validate] YAML: {structure_path}")
 
-    data = load_structure_file(structure_path)
-    yaml_paths = collect_paths_from_yaml(data)
+    structure = load_structure_file(structure_path)
+    yaml_paths = collect_paths_from_yaml(structure)
     tex_files = collect_tex_files(CONTENT_ROOT)
 
     # Normalisieren: alles in forward slashes, keine ./-Präfixe
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Watch mode: rebuild build/main.pdf on every save, from one warm process.
+
+Instead of re-running ./build_core.sh (four Python cold starts plus a
+fresh XeLaTeX sequence per edit), this daemon
+
+  • watches the repository with Linux inotify (via ctypes, no extra
+    dependency) — same directory exclusions as tools/tex_index.py,
+  • keeps the parsed master_core_structure.yaml and the .tex index in
+    memory and only refreshes them when their inputs change,
+  • debounces bursts of saves (editors often write several times),
+  • runs only the affected stages:
+        YAML changed   → create missing files, regenerate
+                         content/_auto_core_inputs.tex
+        .tex changed   → heading normalization + fix_math_in_headings on
+                         the changed files only
+        .bib changed   → mirror bib/*.bib into build/bib
+        data/ changed  → re-render the affected appendix tables
+    followed by the fixed-point XeLaTeX/biber driver (tools/run_latex.py)
+    on the existing .aux — usually a single pass; with --preview the
+    HTML preview (tools/preview_html.py) is refreshed instead, without
+    XeLaTeX,
+  • records the new state in build/core_manifest.json, so a later
+    ./build_core.sh --incremental does not redo the work.
+
+Files written by the daemon itself are ignored in the next event batch.
+
+Usage (from repo root):
+
+    python tools/watch_core.py
+    python tools/watch_core.py --debounce 0.5 --max-passes 4
+    python tools/watch_core.py --preview     # build/preview/index.html only
+
+Stop with Ctrl-C.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from build_manifest import (
+    MANIFEST_FILE,
+    STRUCTURE_FILE,
+    load_manifest,
+    affected_stages,
+    scan,
+    write_manifest,
+)
+from build_partial import mirror_bib
+from core_structure import load_structure
+from demote_module_headings import normalize_headings
+from fix_math_in_headings import candidate_files, process_file
+from generate_auto_inputs import write_inputs_file
+from generate_core_from_yaml import walk_nodes
+from generate_tables import TableError, load_tables, render_all
+from latex_log import print_diagnostics
+from preview_html import build_preview
+from run_latex import DEFAULT_MAX_PASSES, LatexJob, run_build
+from tex_index import EXCLUDE, load_index, save_index, update_index
+
+AUTO_INPUTS = Path("content") / "_auto_core_inputs.tex"
+DEFAULT_DEBOUNCE = 0.3
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+
+WATCHED_SUFFIXES = {".tex", ".bib", ".yaml", ".csv"}
+
+
+class Inotify:
+    """Minimal ctypes binding: recursive directory watches on one fd."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.watches = {}       # wd → directory
+
+    def add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            print(f"[watch] WARNING: cannot watch {directory}: {os.strerror(err)}")
+            return
+        self.watches[wd] = directory
+
+    def add_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDE]
+            self.add_watch(Path(dirpath))
+
+    def read(self):
+        """Return (path, mask) of all queued events (empty if none)."""
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(buf):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buf, pos)
+                pos += EVENT_HEADER.size
+                name = buf[pos:pos + length].rstrip(b"\0").decode("utf-8", errors="replace")
+                pos += length
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is None and not mask & IN_Q_OVERFLOW:
+                    continue
+                path = directory / name if directory is not None and name else directory
+                events.append((path, mask))
+
+    def wait(self, timeout=None) -> bool:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(readable)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def relevant(path: Path) -> bool:
+    """Skip editor droppings (backups, swap files, lock files)."""
+    name = path.name
+    if name.startswith(".") or name.endswith(("~", ".swp", ".swx", ".bak", ".tmp")):
+        return False
+    if not path.suffix:
+        # extensionless \input targets such as content/toe/toe_k3
+        return path.parts[0] == "content"
+    return path.suffix in WATCHED_SUFFIXES
+
+
+def classify(path: Path) -> str:
+    if path.as_posix() == STRUCTURE_FILE:
+        return "structure"
+    if path.suffix == ".bib":
+        return "bib"
+    if path.parts[0] == "data":
+        return "data"
+    return "tex"
+
+
+class Watcher:
+    def __init__(self, root: Path, max_passes: int, debounce: float, preview: bool = False):
+        self.root = root
+        self.max_passes = max_passes
+        self.debounce = debounce
+        self.preview = preview  # HTML preview instead of the PDF
+        self.structure = load_structure()
+        self.index = load_index()
+        self.job = LatexJob(root="main.tex", outdir="build")
+        self.ignore = set()     # files the last rebuild wrote itself
+
+    # ---------------- stages ----------------
+
+    def regenerate_structure(self) -> None:
+        self.structure = load_structure()
+        for path in walk_nodes(self.structure.roots):
+            self.ignore.add(Path(path))
+        write_inputs_file(AUTO_INPUTS, self.structure.tex_paths())
+        self.ignore.add(AUTO_INPUTS)
+        print(f"[watch] Regenerated {AUTO_INPUTS}")
+
+    def render_tables(self) -> None:
+        try:
+            tables = load_tables()
+        except TableError as e:
+            print(f"[watch] {e} — tables not re-rendered.")
+            return
+        for path in render_all(tables):
+            self.ignore.add(path)
+
+    def fix_headings(self, changed) -> None:
+        """changed=None: every file (initial build, overflow, new structure)."""
+        only = None if changed is None else {p.as_posix() for p in changed}
+        for path in normalize_headings(self.index, self.structure, only=only):
+            self.ignore.add(path)
+        for path in candidate_files(self.index, only=only):
+            if process_file(path):
+                self.ignore.add(path)
+
+    def rebuild(self, stages, changed=None) -> None:
+        """changed=None means the rebuild is not driven by specific files."""
+        started = time.perf_counter()
+        if "structure" in stages:
+            self.regenerate_structure()
+            # Neue Titel/Ebenen und frisch angelegte Dateien: alle prüfen,
+            # nicht nur die geänderten (die neuen stehen in self.ignore)
+            changed = None
+        if "data" in stages:
+            self.render_tables()
+        if stages & {"structure", "data", "tex"}:
+            if update_index(self.index):
+                save_index(self.index)
+            self.fix_headings(changed)
+        if "bib" in stages:
+            mirror_bib(self.job.outdir)
+            print("[watch] Mirrored bib/*.bib into build/bib/")
+
+        if self.preview:
+            if update_index(self.index):
+                save_index(self.index)
+            build_preview(index=self.index)
+            return
+
+        try:
+            report = run_build(self.job, max_passes=self.max_passes)
+        except subprocess.CalledProcessError as e:
+            print(f"[watch] {e.cmd[0]} failed with exit code {e.returncode} — waiting for the next save.")
+            if e.cmd[0] == self.job.engine and self.job.out(".log").exists():
+                print_diagnostics(self.job.out(".log"))
+            return
+        print(report.summary())
+
+        write_manifest(MANIFEST_FILE, scan(self.root, load_manifest(MANIFEST_FILE)))
+        print(f"[watch] Rebuilt in {time.perf_counter() - started:.1f}s → {self.job.out('.pdf')}")
+
+    # ---------------- loop ----------------
+
+    def initial_build(self) -> None:
+        if self.preview:
+            if not AUTO_INPUTS.exists():
+                self.regenerate_structure()
+            build_preview(index=self.index)
+            return
+        previous = load_manifest(MANIFEST_FILE)
+        if not self.job.out(".pdf").exists():
+            previous = None
+        stages = set(affected_stages(previous, scan(self.root, previous)))
+        if not AUTO_INPUTS.exists():
+            stages.add("structure")
+        if not stages:
+            print("[watch] build/main.pdf is up to date.")
+            return
+        print(f"[watch] Initial build, stages: {' '.join(sorted(stages))}")
+        self.rebuild(stages)
+
+    def collect(self, inotify: Inotify):
+        """Block for the first event, then gather until `debounce` of quiet."""
+        changed = set()
+        overflow = False
+        inotify.wait()
+        while True:
+            for path, mask in inotify.read():
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and path.name not in EXCLUDE:
+                        inotify.add_tree(path)
+                    continue
+                rel = Path(os.path.relpath(path, self.root))
+                if relevant(rel):
+                    changed.add(rel)
+            if not inotify.wait(self.debounce):
+                return changed, overflow
+
+    def run(self) -> None:
+        inotify = Inotify()
+        inotify.add_tree(self.root)
+        print(f"[watch] Watching {len(inotify.watches)} director(ies). Ctrl-C to stop.")
+        try:
+            self.initial_build()
+            while True:
+                changed, overflow = self.collect(inotify)
+                changed -= self.ignore
+                self.ignore.clear()
+                if overflow:
+                    print("[watch] Event queue overflowed — rebuilding all stages.")
+                    self.rebuild({"structure", "data", "tex", "bib"})
+                    continue
+                stages = {classify(p) for p in changed}
+                if not stages:
+                    continue
+                for p in sorted(changed):
+                    print(f"[watch] changed: {p.as_posix()}")
+                self.rebuild(stages, changed)
+        finally:
+            inotify.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the Core PDF on file changes (inotify, warm process)"
+    )
+    parser.add_argument("--max-passes", type=int, default=DEFAULT_MAX_PASSES)
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f"Seconds of quiet before a rebuild starts (default: {DEFAULT_DEBOUNCE})",
+    )
+    parser.add_argument("--preview", action="store_true",
+                        help="Refresh build/preview/index.html instead of running XeLaTeX")
+    args = parser.parse_args()
+
+    try:
+        Watcher(Path("."), args.max_passes, args.debounce, args.preview).run()
+    except KeyboardInterrupt:
+        print("\n[watch] Stopped.")
+    except OSError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())